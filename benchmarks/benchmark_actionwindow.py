@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+#
+# Pardus Flatpak GUI action window benchmark script
+# Copyright (C) 2020 Erdem Ersoy
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+# Compares the creation time of an action window built from its GUI file on
+# disk, as every install, uninstall and update window did, with the
+# ActionWindow template class from the compiled resources. The resources are
+# compiled from the source tree into a temporary directory. Needs PyGObject,
+# Gtk, glib-compile-resources and a display (e.g. xvfb-run); run from the
+# source tree:
+#
+#     python3 benchmarks/benchmark_actionwindow.py [--windows N]
+
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+SourceDir = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, SourceDir)
+
+import gi
+gi.require_version('Gtk', '3.0')
+from gi.repository import Gtk
+
+
+class Handler(object):
+    def on_delete_action_window(self, widget, event):
+        widget.hide_on_delete()
+
+    def on_press_cancel(self, button):
+        pass
+
+
+# The action window GUI file as it was before it became a template.
+def write_builder_file(file_name):
+    with open(os.path.join(SourceDir, "ui", "actionwindow.glade")) as template_file:
+        contents = template_file.read()
+    contents = contents.replace('<template class="ActionWindow" parent="GtkApplicationWindow">',
+                                '<object class="GtkApplicationWindow" id="ActionWindow">')
+    contents = contents.replace("</template>", "</object>")
+    with open(file_name, "w") as builder_file:
+        builder_file.write(contents)
+
+
+def builder_window(file_name, handler):
+    builder = Gtk.Builder.new_from_file(file_name)
+    builder.connect_signals(handler)
+    return builder.get_object("ActionWindow")
+
+
+def measure(function, windows):
+    start = time.perf_counter()
+    for number in range(windows):
+        function().destroy()
+    return (time.perf_counter() - start) / windows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Action window benchmark")
+    parser.add_argument("--windows", type=int, default=200, help="windows created")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        builder_file_name = os.path.join(directory, "actionwindow.glade")
+        write_builder_file(builder_file_name)
+
+        resource_file_name = os.path.join(directory, "pardus-flatpak-gui.gresource")
+        subprocess.run(["glib-compile-resources", "--sourcedir=" + os.path.join(SourceDir, "ui"),
+                        "--target=" + resource_file_name,
+                        os.path.join(SourceDir, "ui", "pardus-flatpak-gui.gresource.xml")],
+                       check=True)
+        os.environ["PARDUS_FLATPAK_GUI_RESOURCES"] = resource_file_name
+        from pardusflatpakgui.actionwindow import ActionWindow
+
+        handler = Handler()
+        file_time = measure(lambda: builder_window(builder_file_name, handler), args.windows)
+        template_time = measure(lambda: ActionWindow(None, handler), args.windows)
+
+    print("{} windows".format(args.windows))
+    print("Gtk.Builder from file: {:.3f} ms per window".format(file_time * 1000))
+    print("template class:        {:.3f} ms per window".format(template_time * 1000))
+    print("speedup:               {:.2f}x".format(file_time / max(template_time, 1e-9)))
+
+
+if __name__ == "__main__":
+    main()
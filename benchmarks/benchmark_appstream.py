@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+#
+# Pardus Flatpak GUI AppStream index benchmark script
+# Copyright (C) 2020 Erdem Ersoy
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+# Compares parsing an AppStream file into a full tree with the streaming
+# index builder, and reports the peak Python memory of both, the index size
+# and the cost of opening and querying the memory-mapped index. Uses the given
+# appstream.xml.gz (e.g. from
+# /var/lib/flatpak/appstream/flathub/x86_64/active/) or a synthetic file of
+# FlatHub size. Run from the source tree:
+#
+#     python3 benchmarks/benchmark_appstream.py [--file appstream.xml.gz]
+#         [--components N] [--translations N]
+
+import argparse
+import gzip
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+import xml.etree.ElementTree as ElementTree
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from pardusflatpakgui.appstreamindex import AppStreamIndex, iterate_components, write_index
+
+
+def synthetic_appstream(file_name, components, translations):
+    languages = ["l" + str(number) for number in range(translations)]
+    with gzip.open(file_name, "wt", encoding="utf-8") as xml_file:
+        xml_file.write('<?xml version="1.0" encoding="UTF-8"?>\n'
+                       '<components version="0.8" origin="flathub">\n')
+        for number in range(components):
+            app_id = "org.example.App" + str(number)
+            xml_file.write('<component type="desktop">\n<id>' + app_id + '</id>\n')
+            xml_file.write('<name>Example App ' + str(number) + '</name>\n')
+            xml_file.write('<summary>Does example things</summary>\n')
+            for language in languages:
+                xml_file.write('<name xml:lang="' + language + '">Example ' + language + '</name>\n')
+                xml_file.write('<summary xml:lang="' + language + '">Example ' + language +
+                               '</summary>\n')
+                xml_file.write('<description xml:lang="' + language + '"><p>' +
+                               'Long description text. ' * 20 + '</p></description>\n')
+            xml_file.write('<project_license>GPL-3.0+</project_license>\n'
+                           '<categories><category>Utility</category></categories>\n'
+                           '<icon type="cached" height="64" width="64">' + app_id +
+                           '.png</icon>\n<bundle type="flatpak">app/' + app_id +
+                           '/x86_64/stable</bundle>\n</component>\n')
+        xml_file.write('</components>\n')
+
+
+def measure(function, *args):
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = function(*args)
+    elapsed = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return elapsed, peak, result
+
+
+def full_parse(xml_file_name):
+    with gzip.open(xml_file_name, "rb") as xml_file:
+        return len(ElementTree.parse(xml_file).getroot())
+
+
+def streaming_index(xml_file_name, index_file_name):
+    write_index(iterate_components(xml_file_name, "icons"), index_file_name, "0" * 64)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="AppStream index benchmark")
+    parser.add_argument("--file", help="appstream.xml.gz to index")
+    parser.add_argument("--components", type=int, default=3000,
+                        help="component count of the synthetic file")
+    parser.add_argument("--translations", type=int, default=40,
+                        help="translations per component of the synthetic file")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        xml_file_name = args.file
+        if xml_file_name is None:
+            xml_file_name = os.path.join(directory, "appstream.xml.gz")
+            synthetic_appstream(xml_file_name, args.components, args.translations)
+        index_file_name = os.path.join(directory, "appstream.index")
+
+        parse_time, parse_peak, component_count = measure(full_parse, xml_file_name)
+        index_time, index_peak, _result = measure(streaming_index, xml_file_name,
+                                                  index_file_name)
+
+        start = time.perf_counter()
+        index = AppStreamIndex(index_file_name)
+        open_time = time.perf_counter() - start
+
+        app_ids = [index.record_app_id(number).decode("utf-8") for number in range(len(index))]
+        start = time.perf_counter()
+        for app_id in app_ids:
+            index.get(app_id)
+        lookup_time = (time.perf_counter() - start) / max(len(app_ids), 1)
+        index.close()
+
+        print("{} components, {:.1f} MiB compressed".format(
+            component_count, os.path.getsize(xml_file_name) / 1048576))
+        print("full tree parse:     {:.3f} s, peak {:.1f} MiB".format(
+            parse_time, parse_peak / 1048576))
+        print("streaming index:     {:.3f} s, peak {:.1f} MiB".format(
+            index_time, index_peak / 1048576))
+        print("index file:          {:.2f} MiB, {} records".format(
+            os.path.getsize(index_file_name) / 1048576, len(app_ids)))
+        print("index open (mmap):   {:.3f} ms".format(open_time * 1000))
+        print("index lookup:        {:.2f} us".format(lookup_time * 1000000))
+
+
+if __name__ == "__main__":
+    main()
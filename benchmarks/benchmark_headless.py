@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+#
+# Pardus Flatpak GUI headless mode benchmark script
+# Copyright (C) 2020 Erdem Ersoy
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+# Compares the startup of headless mode with the GUI: the time a new Python
+# process takes to import each entry module, and the time of a whole
+# "--headless list --installed" run. Needs PyGObject, Gtk and libflatpak; run
+# from the source tree:
+#
+#     python3 benchmarks/benchmark_headless.py [--runs N]
+
+import argparse
+import os
+import subprocess
+import sys
+import time
+
+SourceDir = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+
+
+def median_time(command, runs):
+    times = []
+    for run in range(runs):
+        start = time.perf_counter()
+        subprocess.run(command, cwd=SourceDir, check=True, stdout=subprocess.DEVNULL)
+        times.append(time.perf_counter() - start)
+    times.sort()
+    return times[len(times) // 2]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Headless mode benchmark")
+    parser.add_argument("--runs", type=int, default=5, help="runs of every command")
+    args = parser.parse_args()
+
+    headless_import = median_time(
+        [sys.executable, "-c", "import pardusflatpakgui.cli"], args.runs)
+    gui_import = median_time(
+        [sys.executable, "-c", "import pardusflatpakgui.flatpakguiapp, "
+                               "pardusflatpakgui.mainwindow"], args.runs)
+    headless_list = median_time(
+        [sys.executable, "pardus-flatpak-gui", "--headless", "list", "--installed"], args.runs)
+
+    print("headless import:          {:.3f} s".format(headless_import))
+    print("GUI import:               {:.3f} s".format(gui_import))
+    print("headless/GUI:             {:.2f}".format(headless_import / max(gui_import, 1e-9)))
+    print("headless list --installed: {:.3f} s".format(headless_list))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,280 @@
+#!/usr/bin/env python3
+#
+# Pardus Flatpak GUI main window benchmark suite
+# Copyright (C) 2020 Erdem Ersoy
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+# Runs the real main window on the in-memory backend of fakeflatpak.py and
+# measures, for every ref count:
+#
+#     population        construction to the full list (and first paint)
+#     reconciliation    applying new summaries of every remote after 1% of
+#                       their refs changed
+#     sort              sorting by each column
+#     search            keystroke to filtered result, for each prefix of a
+#                       query (without the search entry's debounce delay)
+#     row update        per operation, from opening the install or uninstall
+#                       window to the updated rows, with their progress,
+#                       statistics and log
+#
+# Every ref count runs in a new process. The results are printed as JSON;
+# --compare prints the ratio of every result to an earlier results file.
+# Needs PyGObject, Gtk, libflatpak, glib-compile-resources and a display;
+# run from the source tree, e.g.:
+#
+#     xvfb-run -a python3 benchmarks/benchmark_mainwindow.py [SIZE ...] \
+#         [--output results.json] [--compare old-results.json]
+
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+
+SourceDir = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, SourceDir)
+
+SortColumns = ["Real Name", "Arch", "Branch", "Remote Name", "Installed Size",
+               "Download Size", "Name"]
+SearchQuery = "editor12"
+
+
+def run_until(context, predicate):
+    while not predicate():
+        context.iteration(True)
+
+
+def run_pending(context):
+    while context.pending():
+        context.iteration(False)
+
+
+def compile_resources(directory):
+    resource_file_name = os.path.join(directory, "pardus-flatpak-gui.gresource")
+    subprocess.run(["glib-compile-resources", "--sourcedir=" + os.path.join(SourceDir, "ui"),
+                    "--target=" + resource_file_name,
+                    os.path.join(SourceDir, "ui", "pardus-flatpak-gui.gresource.xml")],
+                   check=True)
+    return resource_file_name
+
+
+# Runs the benchmarks of one ref count in this process; the environment must
+# be set up before the GUI modules are imported.
+def run_benchmarks(size, installed_count, remote_count, operation_count, directory):
+    for variable in ("XDG_CONFIG_HOME", "XDG_CACHE_HOME", "XDG_DATA_HOME"):
+        os.environ[variable] = os.path.join(directory, variable.lower())
+    os.environ["PARDUS_FLATPAK_GUI_RESOURCES"] = compile_resources(directory)
+
+    import gi
+    gi.require_version('Gtk', '3.0')
+    gi.require_version('Flatpak', '1.0')
+    gi.require_version('GLib', '2.0')
+    gi.require_version('Gio', '2.0')
+    from gi.repository import Gtk, Flatpak, GLib, Gio
+
+    from fakeflatpak import FakeInstallation, FakeTransaction
+    from pardusflatpakgui import transactions
+    from pardusflatpakgui.installations import ThreadInstallations
+    from pardusflatpakgui.installwindow import InstallWindow
+    from pardusflatpakgui.jobqueue import job_queue
+    from pardusflatpakgui.mainwindow import MainWindow
+    from pardusflatpakgui.profiling import startup_timer
+    from pardusflatpakgui.uninstallwindow import UninstallWindow
+
+    class BenchmarkApp(Gtk.Application):
+        def __init__(self, installation):
+            Gtk.Application.__init__(self, application_id="tr.org.pardus.pardus-flatpak-gui.benchmark",
+                                     flags=Gio.ApplicationFlags.NON_UNIQUE)
+            self.Installation = installation
+
+        def get_installation(self):
+            return self.Installation
+
+    results = []
+
+    def add_result(name, seconds, parameter=None):
+        results.append({"name": name, "refs": size, "parameter": parameter, "seconds": seconds})
+
+    context = GLib.MainContext.default()
+    installation = FakeInstallation(size, installed_count, remote_count)
+    application = BenchmarkApp(installation)
+    application.register(None)
+
+    # Worker threads share the in-memory installation.
+    ThreadInstallations.Factory = staticmethod(lambda flatpak_installation: flatpak_installation)
+
+    # The revalidation is started by the benchmark, not by its timer.
+    MainWindow.RevalidationMaxDelay = 24 * 3600
+
+    construction_start = time.perf_counter() - startup_timer.StartTime
+    main_window = MainWindow(application)
+    run_until(context, lambda: "time to full list" in startup_timer.Marks)
+    run_pending(context)
+    add_result("population", startup_timer.Marks["time to full list"] - construction_start)
+    if "time to first paint" in startup_timer.Marks:
+        add_result("first paint", startup_timer.Marks["time to first paint"] - construction_start)
+
+    # Reconciliation: every remote is listed and applied.
+    applied_remotes = []
+    apply_remote_changes = main_window.apply_remote_changes
+
+    def counted_apply_remote_changes(*args):
+        applied_remotes.append(None)
+        return apply_remote_changes(*args)
+
+    main_window.apply_remote_changes = counted_apply_remote_changes
+    installation.change_remote_refs(0.01)
+    start = time.perf_counter()
+    main_window.start_revalidation()
+    run_until(context, lambda: len(applied_remotes) == remote_count)
+    run_pending(context)
+    add_result("reconciliation", time.perf_counter() - start)
+
+    for column, column_name in enumerate(SortColumns):
+        start = time.perf_counter()
+        main_window.SortModel.set_sort_column_id(column, Gtk.SortType.ASCENDING)
+        run_pending(context)
+        add_result("sort", time.perf_counter() - start, column_name)
+    main_window.SortModel.set_sort_column_id(Gtk.TREE_SORTABLE_UNSORTED_SORT_COLUMN_ID,
+                                             Gtk.SortType.ASCENDING)
+    run_pending(context)
+
+    # A detached entry, so the debounce of the real one doesn't start passes.
+    main_window.SearchEntryMain = Gtk.Entry()
+    for length in list(range(1, len(SearchQuery) + 1)) + [0]:
+        query = SearchQuery[:length]
+        main_window.SearchEntryMain.set_text(query)
+        main_window.SearchKeystrokeTime = time.perf_counter()
+        main_window.start_filter_pass()
+        run_until(context, lambda: main_window.FilterSourceId == 0)
+        run_pending(context)
+        add_result("search", main_window.SearchLatency, query)
+
+    # Row updates, by the real install and uninstall windows running their
+    # jobs on fake transactions; the plans are confirmed without a dialog.
+    transactions.TransactionFactory = \
+        lambda flatpak_installation, cancellable: FakeTransaction(installation)
+    main_window.confirm_transaction = lambda title, operations: True
+
+    default_arch = Flatpak.get_default_arch()
+    refs = [ref for key, ref in sorted(main_window.RefCatalog.NonInstalledRefs.items())
+            if key[0] == Flatpak.RefKind.APP and key[2] == default_arch][:operation_count]
+
+    for name, open_window in (
+            ("row update (install)",
+             lambda: InstallWindow(application, installation,
+                                   [(ref.get_name(), ref.get_arch(), ref.get_branch(),
+                                     ref.get_remote_name()) for ref in refs],
+                                   main_window, main_window.TreeSelectionMain).InstallWindow),
+            ("row update (uninstall)",
+             lambda: UninstallWindow(application, installation,
+                                     [(ref.get_name(), ref.get_arch(), ref.get_branch())
+                                      for ref in refs],
+                                     main_window, main_window.TreeSelectionMain,
+                                     main_window.HeaderBarShowButton, True).UninstallWindow)):
+        start = time.perf_counter()
+        action_window = open_window()
+        run_until(context, lambda: not job_queue.queued_keys())
+        run_pending(context)
+        add_result(name, (time.perf_counter() - start) / max(len(refs), 1))
+        action_window.destroy()
+
+    return results
+
+
+def run_child(size, args):
+    with tempfile.NamedTemporaryFile(suffix=".json") as results_file:
+        subprocess.run([sys.executable, os.path.abspath(__file__), "--child", str(size),
+                        "--child-output", results_file.name,
+                        "--installed", str(args.installed), "--remotes", str(args.remotes),
+                        "--operations", str(args.operations)], check=True)
+        return json.load(results_file)
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=SourceDir,
+                              check=True, stdout=subprocess.PIPE,
+                              stderr=subprocess.DEVNULL).stdout.decode("ascii").strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results, old_results_file_name):
+    with open(old_results_file_name) as old_results_file:
+        old_results = json.load(old_results_file)
+    old_seconds = {(result["name"], result["refs"], result["parameter"]): result["seconds"]
+                   for result in old_results["results"]}
+
+    print("{:<24} {:>7} {:<16} {:>10} {:>10} {:>7}".format(
+        "benchmark", "refs", "parameter", "old (ms)", "new (ms)", "ratio"), file=sys.stderr)
+    for result in results:
+        key = (result["name"], result["refs"], result["parameter"])
+        if key not in old_seconds:
+            continue
+        print("{:<24} {:>7} {:<16} {:>10.3f} {:>10.3f} {:>7.2f}".format(
+            result["name"], result["refs"], result["parameter"] or "",
+            old_seconds[key] * 1000, result["seconds"] * 1000,
+            result["seconds"] / max(old_seconds[key], 1e-9)), file=sys.stderr)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Main window benchmark suite")
+    parser.add_argument("sizes", nargs="*", type=int, default=[1000, 10000, 100000],
+                        help="ref counts of the fake remotes")
+    parser.add_argument("--installed", type=int, default=300, help="installed ref count")
+    parser.add_argument("--remotes", type=int, default=2, help="remote count")
+    parser.add_argument("--operations", type=int, default=200,
+                        help="operations of the row update transactions")
+    parser.add_argument("--output", help="file to write the JSON results to")
+    parser.add_argument("--compare", help="earlier JSON results to compare with")
+    parser.add_argument("--child", type=int, help=argparse.SUPPRESS)
+    parser.add_argument("--child-output", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child is not None:
+        with tempfile.TemporaryDirectory() as directory:
+            results = run_benchmarks(args.child, args.installed, args.remotes,
+                                     args.operations, directory)
+        with open(args.child_output, "w") as results_file:
+            json.dump(results, results_file)
+        return None
+
+    results = []
+    for size in args.sizes:
+        results += run_child(size, args)
+
+    document = {"commit": git_commit(),
+                "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                "python": platform.python_version(),
+                "installed": args.installed,
+                "remotes": args.remotes,
+                "operations": args.operations,
+                "results": results}
+    if args.output:
+        with open(args.output, "w") as output_file:
+            json.dump(document, output_file, indent=2)
+    else:
+        print(json.dumps(document, indent=2))
+
+    if args.compare:
+        compare(results, args.compare)
+
+
+if __name__ == "__main__":
+    main()
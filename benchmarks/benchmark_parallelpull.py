@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+#
+# Pardus Flatpak GUI parallel pull benchmark script
+# Copyright (C) 2020 Erdem Ersoy
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+# Compares the wall-clock time of pulling and deploying apps from a local
+# file:// remote in one transaction with grouped parallel no_deploy pulls
+# followed by one no_pull deploy transaction. Every run uses a new temporary
+# installation, so nothing is pulled already. Needs PyGObject and libflatpak;
+# run from the source tree:
+#
+#     python3 benchmarks/benchmark_parallelpull.py --url file:///path/to/repo \
+#         [--parallelism N] [REF ...]
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import gi
+gi.require_version('Flatpak', '1.0')
+gi.require_version('Gio', '2.0')
+from gi.repository import Flatpak, Gio
+
+from pardusflatpakgui.parallelpull import ParallelPuller, group_refs
+
+RemoteName = "benchmark"
+
+
+def new_installation(directory, url):
+    installation = Flatpak.Installation.new_for_path(
+        Gio.File.new_for_path(directory), True, None)
+    remote = Flatpak.Remote.new(RemoteName)
+    remote.set_url(url)
+    remote.set_gpg_verify(False)
+    installation.add_remote(remote, False, None)
+    return installation
+
+
+def add_install(transaction, ref):
+    transaction.add_install(RemoteName, ref, None)
+
+
+def single_transaction(installation, refs):
+    transaction = Flatpak.Transaction.new_for_installation(installation, None)
+    for ref in refs:
+        add_install(transaction, ref)
+    transaction.run(None)
+
+
+def parallel_pull(installation, refs, parallelism):
+    remote_refs = {ref.format_ref(): ref
+                   for ref in installation.list_remote_refs_sync(RemoteName, None)}
+    groups = group_refs([(ref, remote_refs[ref].get_metadata()) for ref in refs])
+
+    pull_start = time.perf_counter()
+    for group, error in ParallelPuller(installation, parallelism).iterate_pulls(
+            groups, add_install, None):
+        if error is not None:
+            raise error
+    pull_time = time.perf_counter() - pull_start
+
+    transaction = Flatpak.Transaction.new_for_installation(installation, None)
+    transaction.set_no_pull(True)
+    for ref in refs:
+        add_install(transaction, ref)
+    transaction.run(None)
+    return len(groups), pull_time
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Parallel pull benchmark")
+    parser.add_argument("refs", nargs="*",
+                        help="app refs to install, all apps of the remote by default")
+    parser.add_argument("--url", required=True, help="file:// URL of an unsigned repository")
+    parser.add_argument("--parallelism", type=int, default=4, help="concurrent pulls")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        installation = new_installation(directory, args.url)
+        refs = args.refs
+        if not refs:
+            refs = [ref.format_ref()
+                    for ref in installation.list_remote_refs_sync(RemoteName, None)
+                    if ref.get_kind() == Flatpak.RefKind.APP and
+                    ref.get_arch() == Flatpak.get_default_arch()]
+
+        start = time.perf_counter()
+        single_transaction(installation, refs)
+        single_time = time.perf_counter() - start
+
+    with tempfile.TemporaryDirectory() as directory:
+        installation = new_installation(directory, args.url)
+        start = time.perf_counter()
+        group_count, pull_time = parallel_pull(installation, refs, args.parallelism)
+        parallel_time = time.perf_counter() - start
+
+    print("{} refs, {} groups, parallelism {}".format(len(refs), group_count, args.parallelism))
+    print("single transaction:     {:.3f} s".format(single_time))
+    print("parallel pull + deploy: {:.3f} s (pull {:.3f} s)".format(parallel_time, pull_time))
+    print("speedup:                {:.2f}x".format(single_time / max(parallel_time, 1e-9)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+#
+# Pardus Flatpak GUI update prefetch benchmark script
+# Copyright (C) 2020 Erdem Ersoy
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+# Compares the time users wait for Update All with and without prefetching.
+# Update All writes a summary of every update to the transaction summaries:
+# "update" when it downloads and deploys, "update (deploy only)" when
+# UpdatePrefetch pulled the updates in the background beforehand. The median
+# and 90th percentile of their durations (from the start of the job to its
+# end) are printed per kind, with the bytes transferred while waiting. Only
+# needs Python; point it at summaries collected from one or more machines:
+#
+#     python3 benchmarks/benchmark_prefetch.py [SUMMARY_FILE ...]
+
+import argparse
+import json
+import os
+import sys
+
+DefaultSummaryFile = os.path.join(
+    os.environ.get("XDG_DATA_HOME", os.path.expanduser("~/.local/share")),
+    "pardus-flatpak-gui", "transactions.jsonl")
+Kinds = ["update", "update (deploy only)"]
+
+
+def read_summaries(file_names):
+    summaries = []
+    for file_name in file_names:
+        with open(file_name) as summary_file:
+            for line in summary_file:
+                try:
+                    summaries.append(json.loads(line))
+                except ValueError:
+                    print("Skipping invalid line in " + file_name, file=sys.stderr)
+    return summaries
+
+
+def percentile(values, fraction):
+    values = sorted(values)
+    return values[min(int(len(values) * fraction), len(values) - 1)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Update prefetch benchmark")
+    parser.add_argument("files", nargs="*", default=[DefaultSummaryFile],
+                        help="transaction summary files")
+    args = parser.parse_args()
+
+    summaries = [summary for summary in read_summaries(args.files)
+                 if summary.get("result") == "finished" and summary.get("operations")]
+    medians = {}
+    print("{:<22} {:>6} {:>12} {:>12} {:>14}".format(
+        "kind", "count", "median (s)", "p90 (s)", "median bytes"))
+    for kind in Kinds:
+        kind_summaries = [summary for summary in summaries if summary["transaction"] == kind]
+        if not kind_summaries:
+            print("{:<22} {:>6}".format(kind, 0))
+            continue
+        seconds = [summary["seconds"] for summary in kind_summaries]
+        medians[kind] = percentile(seconds, 0.5)
+        print("{:<22} {:>6} {:>12.2f} {:>12.2f} {:>14}".format(
+            kind, len(kind_summaries), medians[kind], percentile(seconds, 0.9),
+            percentile([summary["bytes_transferred"] for summary in kind_summaries], 0.5)))
+
+    if len(medians) == len(Kinds):
+        print("speedup: {:.1f}x".format(medians["update"] / max(medians["update (deploy only)"],
+                                                              1e-9)))
+
+
+if __name__ == "__main__":
+    main()
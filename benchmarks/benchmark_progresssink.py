@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+#
+# Pardus Flatpak GUI progress sink benchmark script
+# Copyright (C) 2020 Erdem Ersoy
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+# Compares posting every progress change to the main loop, as the action
+# windows did, with ProgressSink, which keeps one update pending. A worker
+# thread changes the progress at the given rate; the progress bar updates and
+# the main loop iterations that dispatched something are counted. Needs
+# PyGObject; run from the source tree:
+#
+#     python3 benchmarks/benchmark_progresssink.py [--changes N] [--rate HZ]
+
+import argparse
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import gi
+gi.require_version('GLib', '2.0')
+from gi.repository import GLib
+
+from pardusflatpakgui.dispatcher import main_loop_dispatcher
+from pardusflatpakgui.progresssink import ProgressSink
+
+
+class CountingProgressBar(object):
+    def __init__(self):
+        self.Fraction = 0.0
+        self.Updates = 0
+
+    def get_fraction(self):
+        return self.Fraction
+
+    def set_fraction(self, fraction):
+        self.Fraction = fraction
+        self.Updates += 1
+
+    def set_show_text(self, show_text):
+        pass
+
+    def set_text(self, text):
+        pass
+
+
+def run(set_fraction, progress_bar, changes, rate):
+    finished = threading.Event()
+
+    def change_progress():
+        for number in range(1, changes + 1):
+            set_fraction(number / changes)
+            time.sleep(1.0 / rate)
+        finished.set()
+
+    context = GLib.MainContext.default()
+    wakeups = 0
+    start = time.perf_counter()
+    threading.Thread(target=change_progress, daemon=True).start()
+    while not finished.is_set() or context.pending() or progress_bar.Fraction < 1.0:
+        if context.iteration(False):
+            wakeups += 1
+        else:
+            time.sleep(0.001)
+    return wakeups, progress_bar.Updates, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Progress sink benchmark")
+    parser.add_argument("--changes", type=int, default=2000, help="progress changes")
+    parser.add_argument("--rate", type=float, default=1000, help="progress changes per second")
+    args = parser.parse_args()
+
+    posted_bar = CountingProgressBar()
+    posted = run(lambda fraction: main_loop_dispatcher.post(posted_bar.set_fraction, fraction),
+                 posted_bar, args.changes, args.rate)
+    sink_bar = CountingProgressBar()
+    sink = ProgressSink(sink_bar)
+    coalesced = run(sink.set_fraction, sink_bar, args.changes, args.rate)
+
+    print("{} progress changes at {:.0f}/s".format(args.changes, args.rate))
+    for name, (wakeups, updates, seconds) in (("posted per change:", posted),
+                                              ("progress sink:", coalesced)):
+        print("{:<19} {:6} dispatches, {:6} bar updates, {:.1f} updates/s".format(
+            name, wakeups, updates, updates / max(seconds, 1e-9)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+#
+# Pardus Flatpak GUI reference catalog benchmark script
+# Copyright (C) 2020 Erdem Ersoy
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+# Compares the old nested-loop reconciliation of installed and remote refs
+# with RefCatalog on synthetic refs. Run from the source tree:
+#
+#     python3 benchmarks/benchmark_refcatalog.py [--installed N] [SIZE ...]
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from pardusflatpakgui.refcatalog import RefCatalog
+
+
+class SyntheticRef(object):
+    def __init__(self, kind, name, arch, branch):
+        self.Kind = kind
+        self.Name = name
+        self.Arch = arch
+        self.Branch = branch
+
+    def get_remote_name(self):
+        return "example"
+
+    def get_kind(self):
+        return self.Kind
+
+    def get_name(self):
+        return self.Name
+
+    def get_arch(self):
+        return self.Arch
+
+    def get_branch(self):
+        return self.Branch
+
+
+def synthetic_refs(remote_count, installed_count):
+    remote_refs = [SyntheticRef(0, "org.example.App" + str(number), "x86_64", "stable")
+                   for number in range(remote_count)]
+    step = max(remote_count // max(installed_count, 1), 1)
+    installed_refs = [SyntheticRef(0, ref.get_name(), ref.get_arch(), ref.get_branch())
+                      for ref in remote_refs[::step][:installed_count]]
+    return installed_refs, remote_refs
+
+
+def legacy_reconcile(installed_refs, remote_refs):
+    non_installed_refs = []
+    for item in remote_refs:
+        non_installed_refs.append(item)
+        for item_2 in installed_refs:
+            if item.get_name() == item_2.get_name() and \
+                    item.get_arch() == item_2.get_arch() and \
+                    item.get_branch() == item_2.get_branch():
+                if len(non_installed_refs) != 0:
+                    non_installed_refs.pop(len(non_installed_refs) - 1)
+                else:
+                    non_installed_refs = []
+    return installed_refs + non_installed_refs
+
+
+def catalog_reconcile(installed_refs, remote_refs):
+    return RefCatalog(installed_refs, remote_refs).all_refs()
+
+
+def measure(function, *args):
+    start = time.perf_counter()
+    result = function(*args)
+    return time.perf_counter() - start, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Reference catalog benchmark")
+    parser.add_argument("sizes", nargs="*", type=int, default=[1000, 10000, 50000],
+                        help="synthetic remote ref counts")
+    parser.add_argument("--installed", type=int, default=300,
+                        help="installed ref count for every size")
+    args = parser.parse_args()
+
+    print("{:>8} {:>10} {:>12} {:>12} {:>10}".format(
+        "refs", "installed", "legacy (s)", "catalog (s)", "speedup"))
+    for size in args.sizes:
+        installed_refs, remote_refs = synthetic_refs(size, args.installed)
+        legacy_time, legacy_result = measure(legacy_reconcile, installed_refs, remote_refs)
+        catalog_time, catalog_result = measure(catalog_reconcile, installed_refs, remote_refs)
+        assert len(legacy_result) == len(catalog_result)
+        print("{:>8} {:>10} {:>12.4f} {:>12.4f} {:>9.1f}x".format(
+            size, len(installed_refs), legacy_time, catalog_time,
+            legacy_time / max(catalog_time, 1e-9)))
+
+
+if __name__ == "__main__":
+    main()
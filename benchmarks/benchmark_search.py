@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+#
+# Pardus Flatpak GUI search benchmark script
+# Copyright (C) 2020 Erdem Ersoy
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+# Types a query one character at a time over synthetic rows and reports the
+# keystroke-to-result latency of the old per-row filter function, of the
+# pre-normalized, time-sliced filter pass and of the search index lookup.
+# Run from the source tree:
+#
+#     python3 benchmarks/benchmark_search.py [--rows N] [--query TEXT]
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from pardusflatpakgui.search import SearchIndex, normalize_text, search_text, text_matches
+
+
+def synthetic_rows(count):
+    return [("org.example.Application" + str(number), "Example Application " + str(number),
+             "Does example things number " + str(number))
+            for number in range(count)]
+
+
+def legacy_pass(rows, search_entry_text):
+    visible_count = 0
+    for real_name, name, summary in rows:
+        if len(search_entry_text) == 0 or \
+                real_name.lower().count(search_entry_text.lower()) > 0 or \
+                name.lower().count(search_entry_text.lower()) > 0:
+            visible_count += 1
+    return visible_count
+
+
+def sliced_pass(texts, search_entry_text, chunk_size, slice_time):
+    query = normalize_text(search_entry_text)
+    visible_count = 0
+    longest_slice = 0
+    slice_start = time.perf_counter()
+    for chunk_start in range(0, len(texts), chunk_size):
+        for text in texts[chunk_start:chunk_start + chunk_size]:
+            if text_matches(query, text):
+                visible_count += 1
+        now = time.perf_counter()
+        if now - slice_start >= slice_time:
+            longest_slice = max(longest_slice, now - slice_start)
+            slice_start = now
+    longest_slice = max(longest_slice, time.perf_counter() - slice_start)
+    return visible_count, longest_slice
+
+
+def index_search(search_index, search_entry_text):
+    return search_index.search(normalize_text(search_entry_text))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Search filter benchmark")
+    parser.add_argument("--rows", type=int, default=50000, help="synthetic row count")
+    parser.add_argument("--query", default="application 4999", help="typed query")
+    parser.add_argument("--chunk-size", type=int, default=256, help="rows per chunk")
+    parser.add_argument("--slice-time", type=float, default=0.008,
+                        help="main loop time slice in seconds")
+    args = parser.parse_args()
+
+    rows = synthetic_rows(args.rows)
+    texts = [search_text(real_name, name) for real_name, name, summary in rows]
+
+    start = time.perf_counter()
+    search_index = SearchIndex()
+    for real_name, name, summary in rows:
+        search_index.add(real_name, real_name, name, summary)
+    print("search index built in {:.3f} s".format(time.perf_counter() - start))
+
+    print("{:>24} {:>12} {:>12} {:>20} {:>12}".format(
+        "query", "legacy (ms)", "sliced (ms)", "longest slice (ms)", "index (ms)"))
+    for length in range(1, len(args.query) + 1):
+        query = args.query[:length]
+
+        start = time.perf_counter()
+        legacy_count = legacy_pass(rows, query)
+        legacy_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        sliced_count, longest_slice = sliced_pass(texts, query, args.chunk_size, args.slice_time)
+        sliced_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        index_count = index_search(search_index, query)
+        index_time = time.perf_counter() - start
+
+        assert legacy_count == sliced_count == index_count
+        print("{:>24} {:>12.2f} {:>12.2f} {:>20.2f} {:>12.3f}".format(
+            repr(query), legacy_time * 1000, sliced_time * 1000, longest_slice * 1000,
+            index_time * 1000))
+
+
+if __name__ == "__main__":
+    main()
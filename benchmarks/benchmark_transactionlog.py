@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+#
+# Pardus Flatpak GUI transaction log benchmark script
+# Copyright (C) 2020 Erdem Ersoy
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+# Compares rewriting the whole accumulated log on every event with the
+# append-only TransactionLog. Needs PyGObject and GTK 3; run from the source
+# tree, under xvfb-run when there is no display:
+#
+#     python3 benchmarks/benchmark_transactionlog.py [--events N]
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import gi
+gi.require_version('Gtk', '3.0')
+from gi.repository import Gtk
+
+from pardusflatpakgui.transactionlog import TransactionLog
+
+
+def legacy_log(events):
+    text_buffer = Gtk.TextBuffer()
+    status_text = "Updating..."
+    text_buffer.set_text(status_text)
+    for number in range(events):
+        status_text = status_text + "\n" + "Updating: org.example.App" + str(number)
+        text_buffer.set_text(status_text)
+    return text_buffer
+
+
+def append_only_log(events, events_per_frame, max_lines):
+    text_buffer = Gtk.TextBuffer()
+    transaction_log = TransactionLog(text_buffer, max_lines)
+    transaction_log.append("Updating...")
+    for number in range(events):
+        transaction_log.append("Updating: org.example.App" + str(number))
+        if number % events_per_frame == 0:
+            transaction_log.flush()
+    transaction_log.flush()
+    return text_buffer
+
+
+def measure(function, *args):
+    start = time.perf_counter()
+    function(*args)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Transaction log benchmark")
+    parser.add_argument("--events", type=int, default=10000,
+                        help="log event count")
+    parser.add_argument("--events-per-frame", type=int, default=10,
+                        help="log events arriving between two flushes")
+    parser.add_argument("--max-lines", type=int, default=1000,
+                        help="ring buffer size of the append-only log")
+    args = parser.parse_args()
+
+    legacy_time = measure(legacy_log, args.events)
+    append_only_time = measure(append_only_log, args.events,
+                               args.events_per_frame, args.max_lines)
+
+    print("{} log events".format(args.events))
+    print("set_text per event: {:.4f} s".format(legacy_time))
+    print("append-only log:    {:.4f} s".format(append_only_time))
+    print("speedup:            {:.1f}x".format(legacy_time / max(append_only_time, 1e-9)))
+
+
+if __name__ == "__main__":
+    main()
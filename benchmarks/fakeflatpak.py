@@ -0,0 +1,320 @@
+#!/usr/bin/env python3
+#
+# Pardus Flatpak GUI in-memory Flatpak backend for benchmarks
+# Copyright (C) 2020 Erdem Ersoy
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+# An in-memory stand-in for Flatpak.Installation and Flatpak.Transaction at
+# any scale, for benchmarking the GUI without a system installation or
+# network. Refs are real Flatpak.RemoteRef and Flatpak.InstalledRef objects
+# built from their properties, so the code under test reads them as usual;
+# only the installation and the transaction are fake. Listing calls sleep for
+# the given latency, like reading a summary would.
+
+import random
+import threading
+import time
+import gi
+gi.require_version('Flatpak', '1.0')
+gi.require_version('GLib', '2.0')
+gi.require_version('GObject', '2.0')
+gi.require_version('Gio', '2.0')
+from gi.repository import Flatpak, GLib, GObject, Gio
+
+Words = ["editor", "player", "viewer", "browser", "studio", "manager", "tool",
+         "game", "chat", "notes", "mail", "music", "photo", "video", "office"]
+
+
+def app_name(number):
+    return "org.example." + Words[number % len(Words)].capitalize() + str(number)
+
+
+def remote_ref(remote_name, name, arch, branch, commit, rng):
+    return Flatpak.RemoteRef(kind=Flatpak.RefKind.APP, name=name, arch=arch,
+                             branch=branch, commit=commit, remote_name=remote_name,
+                             installed_size=rng.randint(1, 2000) * 1048576,
+                             download_size=rng.randint(1, 500) * 1048576)
+
+
+def installed_ref(ref, commit=None):
+    name = ref.get_name()
+    return Flatpak.InstalledRef(kind=ref.get_kind(), name=name, arch=ref.get_arch(),
+                                branch=ref.get_branch(), commit=commit or ref.get_commit(),
+                                latest_commit=ref.get_commit(),
+                                origin=ref.get_remote_name(),
+                                installed_size=ref.get_installed_size(),
+                                deploy_dir="/var/lib/flatpak/app/" + name,
+                                is_current=True,
+                                appdata_name=name.rsplit(".", 1)[-1],
+                                appdata_summary="Example " + name.rsplit(".", 1)[-1] + " app")
+
+
+class FakeRemote(object):
+    def __init__(self, name, priority=1):
+        self.Name = name
+        self.Priority = priority
+
+    def get_name(self):
+        return self.Name
+
+    def get_title(self):
+        return self.Name.capitalize()
+
+    def get_prio(self):
+        return self.Priority
+
+    def get_disabled(self):
+        return False
+
+    def get_noenumerate(self):
+        return False
+
+    # No AppStream data: names of remote refs are left empty.
+    def get_appstream_dir(self, arch):
+        return Gio.File.new_for_path("/nonexistent/appstream/" + self.Name + "/" + arch)
+
+
+class FakeInstallation(object):
+    def __init__(self, ref_count, installed_count, remote_count=1, update_count=0,
+                 latency=0.0, seed=0):
+        self.Lock = threading.Lock()
+        self.Latency = latency
+        self.Random = random.Random(seed)
+        self.Arch = Flatpak.get_default_arch()
+        self.Remotes = [FakeRemote("remote" + str(number)) for number in range(remote_count)]
+        self.RemoteRefs = {remote.get_name(): {} for remote in self.Remotes}
+        self.InstalledRefs = {}
+        self.NextNumber = 0
+
+        for number in range(ref_count):
+            self.add_remote_ref()
+
+        all_refs = [ref for refs in self.RemoteRefs.values() for ref in refs.values()]
+        for ref in self.Random.sample(all_refs, min(installed_count, len(all_refs))):
+            self.InstalledRefs[self.key(ref)] = installed_ref(ref)
+
+        # Updates: installed refs whose remote commit is newer.
+        for key in list(self.InstalledRefs)[:update_count]:
+            origin = self.InstalledRefs[key].get_origin()
+            self.InstalledRefs[key] = installed_ref(self.remote_ref(key, origin), "0" * 64)
+
+    def key(self, ref):
+        return (ref.get_kind(), ref.get_name(), ref.get_arch(), ref.get_branch())
+
+    def add_remote_ref(self):
+        remote = self.Remotes[self.NextNumber % len(self.Remotes)]
+        ref = remote_ref(remote.get_name(), app_name(self.NextNumber), self.Arch, "stable",
+                         "%064x" % self.Random.getrandbits(256), self.Random)
+        self.RemoteRefs[remote.get_name()][self.key(ref)] = ref
+        self.NextNumber += 1
+
+    # Like a new summary: removes and adds a fraction of the refs and changes
+    # the sizes of as many others.
+    def change_remote_refs(self, fraction):
+        with self.Lock:
+            removed_count = 0
+            for remote_name, refs in self.RemoteRefs.items():
+                count = max(int(len(refs) * fraction), 1)
+                keys = [key for key in refs if key not in self.InstalledRefs]
+                keys = self.Random.sample(keys, min(count * 2, len(keys)))
+                for key in keys[:count]:
+                    del refs[key]
+                for key in keys[count:]:
+                    ref = refs[key]
+                    refs[key] = remote_ref(remote_name, ref.get_name(), ref.get_arch(),
+                                           ref.get_branch(), ref.get_commit(), self.Random)
+                removed_count += len(keys[:count])
+            for number in range(removed_count):
+                self.add_remote_ref()
+
+    def sleep(self):
+        if self.Latency:
+            time.sleep(self.Latency)
+
+    def get_path(self):
+        return Gio.File.new_for_path("/nonexistent/flatpak")
+
+    def get_is_user(self):
+        return False
+
+    def list_remotes(self, cancellable=None):
+        return list(self.Remotes)
+
+    def list_installed_refs(self, cancellable=None):
+        self.sleep()
+        with self.Lock:
+            return list(self.InstalledRefs.values())
+
+    def list_remote_refs_sync(self, remote_name, cancellable=None):
+        self.sleep()
+        with self.Lock:
+            if remote_name not in self.RemoteRefs:
+                raise GLib.Error("Remote not found: " + remote_name)
+            return list(self.RemoteRefs[remote_name].values())
+
+    def list_remote_refs_sync_full(self, remote_name, flags, cancellable=None):
+        return self.list_remote_refs_sync(remote_name, cancellable)
+
+    def list_installed_refs_for_update(self, cancellable=None):
+        self.sleep()
+        with self.Lock:
+            return [ref for key, ref in self.InstalledRefs.items()
+                    if key in self.RemoteRefs[ref.get_origin()] and
+                    ref.get_commit() != self.remote_ref(key, ref.get_origin()).get_commit()]
+
+    def update_appstream_sync(self, remote_name, arch, cancellable=None):
+        return True, False
+
+    def remote_ref(self, key, remote_name):
+        return self.RemoteRefs[remote_name][key]
+
+    def get_installed_ref(self, kind, name, arch, branch, cancellable=None):
+        with self.Lock:
+            ref = self.InstalledRefs.get((kind, name, arch, branch))
+        if ref is None:
+            raise GLib.Error("Not installed: " + name)
+        return ref
+
+    def apply_operation(self, operation):
+        ref = Flatpak.Ref.parse(operation.get_ref())
+        key = self.key(ref)
+        with self.Lock:
+            if operation.get_operation_type() == Flatpak.TransactionOperationType.UNINSTALL:
+                del self.InstalledRefs[key]
+            else:
+                self.InstalledRefs[key] = installed_ref(
+                    self.remote_ref(key, operation.get_remote()))
+        return self.remote_ref(key, operation.get_remote()).get_commit()
+
+
+class FakeOperation(object):
+    def __init__(self, operation_type, ref, remote, download_size=0):
+        self.OperationType = operation_type
+        self.Ref = ref
+        self.Remote = remote
+        self.DownloadSize = download_size
+
+    def get_operation_type(self):
+        return self.OperationType
+
+    def get_ref(self):
+        return self.Ref
+
+    def get_remote(self):
+        return self.Remote
+
+    def get_download_size(self):
+        return self.DownloadSize
+
+
+# Bytes are transferred in proportion to the progress of the operation.
+class FakeProgress(GObject.Object):
+    __gsignals__ = {"changed": (GObject.SignalFlags.RUN_LAST, None, ())}
+
+    def __init__(self, download_size=0):
+        GObject.Object.__init__(self)
+        self.DownloadSize = download_size
+        self.Progress = 0
+
+    def set_update_frequency(self, update_frequency):
+        pass
+
+    def get_progress(self):
+        return self.Progress
+
+    def get_bytes_transferred(self):
+        return self.DownloadSize * self.Progress // 100
+
+    def get_status(self):
+        return "Downloading" if self.Progress < 100 else "Installing"
+
+
+# Emits the signals of Flatpak.Transaction for its operations, with the given
+# number of progress changes per operation, and applies them to the
+# installation.
+class FakeTransaction(GObject.Object):
+    __gsignals__ = {
+        "ready": (GObject.SignalFlags.RUN_LAST, bool, ()),
+        "new-operation": (GObject.SignalFlags.RUN_LAST, None, (object, object)),
+        "operation-done": (GObject.SignalFlags.RUN_LAST, None, (object, str, int)),
+        "operation-error": (GObject.SignalFlags.RUN_LAST, bool, (object, object, int)),
+    }
+
+    def __init__(self, installation, progress_steps=10):
+        GObject.Object.__init__(self)
+        self.Installation = installation
+        self.ProgressSteps = progress_steps
+        self.Operations = []
+
+    # Options of the transaction don't change what the fake does.
+    def set_default_arch(self, arch):
+        pass
+
+    def set_disable_dependencies(self, disable_dependencies):
+        pass
+
+    def set_disable_prune(self, disable_prune):
+        pass
+
+    def set_disable_related(self, disable_related):
+        pass
+
+    def set_disable_static_deltas(self, disable_static_deltas):
+        pass
+
+    def set_no_deploy(self, no_deploy):
+        pass
+
+    def set_no_pull(self, no_pull):
+        pass
+
+    def add_install(self, remote, ref, subpaths):
+        key = self.Installation.key(Flatpak.Ref.parse(ref))
+        download_size = self.Installation.remote_ref(key, remote).get_download_size()
+        self.Operations.append(
+            FakeOperation(Flatpak.TransactionOperationType.INSTALL, ref, remote, download_size))
+
+    def add_update(self, ref, subpaths, commit):
+        key = self.Installation.key(Flatpak.Ref.parse(ref))
+        origin = self.Installation.InstalledRefs[key].get_origin()
+        download_size = self.Installation.remote_ref(key, origin).get_download_size()
+        self.Operations.append(
+            FakeOperation(Flatpak.TransactionOperationType.UPDATE, ref, origin, download_size))
+
+    def add_uninstall(self, ref):
+        key = self.Installation.key(Flatpak.Ref.parse(ref))
+        origin = self.Installation.InstalledRefs[key].get_origin()
+        self.Operations.append(
+            FakeOperation(Flatpak.TransactionOperationType.UNINSTALL, ref, origin))
+
+    def get_operations(self):
+        return list(self.Operations)
+
+    def run(self, cancellable=None):
+        # Like libflatpak, the transaction goes on if nothing handles ready.
+        ready_signal = GObject.signal_lookup("ready", FakeTransaction)
+        if GObject.signal_has_handler_pending(self, ready_signal, 0, True) and \
+                not self.emit("ready"):
+            raise GLib.Error("Aborted by user")
+
+        for operation in self.Operations:
+            progress = FakeProgress(operation.get_download_size())
+            self.emit("new-operation", operation, progress)
+            for step in range(1, self.ProgressSteps + 1):
+                progress.Progress = step * 100 // self.ProgressSteps
+                progress.emit("changed")
+            commit = self.Installation.apply_operation(operation)
+            self.emit("operation-done", operation, commit, 0)
+        return True
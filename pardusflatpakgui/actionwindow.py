@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+#
+# Pardus Flatpak GUI action window module
+# Copyright (C) 2020 Erdem Ersoy
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+from pardusflatpakgui.resources import ui_resource
+from pardusflatpakgui.tracing import traced
+
+import gi
+gi.require_version('Gtk', '3.0')
+from gi.repository import Gtk
+
+
+# The window of install, uninstall, update and install from file operations.
+# Its template comes from the registered resources, so a new window doesn't
+# read any file. Signals are passed to the handler object, the window class
+# of the operation, like Gtk.Builder.connect_signals() does.
+@Gtk.Template(resource_path=ui_resource("actionwindow.glade"))
+class ActionWindow(Gtk.ApplicationWindow):
+    __gtype_name__ = "ActionWindow"
+
+    ActionButtonCancel = Gtk.Template.Child()
+    ActionProgressBar = Gtk.Template.Child()
+    ActionLabel = Gtk.Template.Child()
+    ActionTextView = Gtk.Template.Child()
+
+    @traced
+    def __init__(self, application, handler):
+        Gtk.ApplicationWindow.__init__(self, application=application)
+        self.Handler = handler
+        self.ActionTextBuffer = self.ActionTextView.get_buffer()
+
+    @Gtk.Template.Callback()
+    def on_delete_action_window(self, widget, event):
+        return self.Handler.on_delete_action_window(widget, event)
+
+    @Gtk.Template.Callback()
+    def on_press_cancel(self, button):
+        if hasattr(self.Handler, "on_press_cancel"):
+            self.Handler.on_press_cancel(button)
@@ -0,0 +1,226 @@
+#!/usr/bin/env python3
+#
+# Pardus Flatpak GUI AppStream index module
+# Copyright (C) 2020 Erdem Ersoy
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import array
+import gzip
+import mmap
+import os
+import struct
+import xml.etree.ElementTree as ElementTree
+
+IndexMagic = b"PFGASI01"
+IndexHeader = struct.Struct("<8sI64s")  # Magic, record count, checksum
+LangAttribute = "{http://www.w3.org/XML/1998/namespace}lang"
+
+
+class AppStreamData(object):
+    def __init__(self, app_id, name, summary, app_license, categories, icon):
+        self.AppId = app_id
+        self.Name = name
+        self.Summary = summary
+        self.License = app_license
+        self.Categories = categories
+        self.Icon = icon
+
+    def fields(self):
+        return [self.AppId, self.Name, self.Summary, self.License,
+                ";".join(self.Categories), self.Icon]
+
+
+def untranslated_text(component, tag):
+    for element in component.iterfind(tag):
+        if LangAttribute not in element.attrib:
+            return (element.text or "").strip()
+    return ""
+
+
+# The bundle ref names the app exactly; older files only have a desktop
+# file name as the id.
+def component_app_id(component):
+    bundle = component.find("bundle")
+    if bundle is not None and bundle.text and bundle.text.count("/") == 3:
+        return bundle.text.split("/")[1]
+
+    app_id = (component.findtext("id") or "").strip()
+    if app_id.endswith(".desktop"):
+        app_id = app_id[:-len(".desktop")]
+    return app_id
+
+
+def component_icon(component, icon_dir):
+    icon = ""
+    icon_height = 0
+    for element in component.iterfind("icon"):
+        if element.get("type") != "cached" or not element.text:
+            continue
+        height = int(element.get("height", "64"))
+        if height > icon_height:
+            icon_height = height
+            icon = os.path.join(icon_dir,
+                                element.get("width", "64") + "x" + str(height),
+                                element.text.strip())
+    return icon
+
+
+# Yields an AppStreamData for every component of an AppStream XML file
+# (gzipped or not). Components are dropped from the tree once they are read,
+# so memory use doesn't grow with the file.
+def iterate_components(xml_file_name, icon_dir):
+    if xml_file_name.endswith(".gz"):
+        xml_file = gzip.open(xml_file_name, "rb")
+    else:
+        xml_file = open(xml_file_name, "rb")
+
+    with xml_file:
+        root = None
+        for event, element in ElementTree.iterparse(xml_file, events=("start", "end")):
+            if root is None:
+                root = element
+            elif event == "end" and element.tag == "component":
+                app_id = component_app_id(element)
+                if app_id:
+                    yield AppStreamData(
+                        app_id,
+                        untranslated_text(element, "name"),
+                        untranslated_text(element, "summary"),
+                        (element.findtext("project_license") or "").strip(),
+                        [(category.text or "").strip()
+                         for category in element.iterfind("categories/category")],
+                        component_icon(element, icon_dir))
+                root.clear()
+
+
+# Index file layout: the header, record count + 1 offsets (unsigned 32-bit,
+# relative to the first record) and the records sorted by app id. A record is
+# its fields, UTF-8 encoded and joined with NUL, which XML text can't contain.
+# Of several components with the same app id, the first one is kept.
+def write_index(app_data_items, index_file_name, checksum):
+    records = {}
+    for app_data in app_data_items:
+        app_id = app_data.AppId.encode("utf-8")
+        if app_id not in records:
+            records[app_id] = "\0".join(app_data.fields()).encode("utf-8")
+
+    offsets = array.array("I", [0])
+    for app_id in sorted(records):
+        offsets.append(offsets[-1] + len(records[app_id]))
+
+    os.makedirs(os.path.dirname(index_file_name), exist_ok=True)
+    temporary_file_name = index_file_name + ".tmp"
+    with open(temporary_file_name, "wb") as index_file:
+        index_file.write(IndexHeader.pack(IndexMagic, len(records), checksum.encode("ascii")))
+        index_file.write(offsets.tobytes())
+        for app_id in sorted(records):
+            index_file.write(records[app_id])
+    os.replace(temporary_file_name, index_file_name)
+
+
+# Read-only, memory-mapped index; get() is a binary search over the sorted
+# records, so opening it costs nothing and the pages are shared with the
+# page cache.
+class AppStreamIndex(object):
+    def __init__(self, index_file_name):
+        with open(index_file_name, "rb") as index_file:
+            self.Map = mmap.mmap(index_file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        try:
+            magic, self.Count, checksum = IndexHeader.unpack_from(self.Map, 0)
+        except struct.error:
+            magic = None
+        if magic != IndexMagic:
+            self.Map.close()
+            raise ValueError("Invalid AppStream index file: " + index_file_name)
+
+        self.Checksum = checksum.rstrip(b"\0").decode("ascii")
+        self.OffsetsStart = IndexHeader.size
+        self.RecordsStart = self.OffsetsStart + (self.Count + 1) * 4
+
+    def record_range(self, number):
+        start, end = struct.unpack_from("<II", self.Map, self.OffsetsStart + number * 4)
+        return self.RecordsStart + start, self.RecordsStart + end
+
+    def record_app_id(self, number):
+        start, end = self.record_range(number)
+        return self.Map[start:self.Map.find(b"\0", start, end)]
+
+    def get(self, app_id):
+        encoded_app_id = app_id.encode("utf-8")
+        low = 0
+        high = self.Count
+        while low < high:
+            middle = (low + high) // 2
+            if self.record_app_id(middle) < encoded_app_id:
+                low = middle + 1
+            else:
+                high = middle
+
+        if low == self.Count or self.record_app_id(low) != encoded_app_id:
+            return None
+        start, end = self.record_range(low)
+        app_id, name, summary, app_license, categories, icon = \
+            self.Map[start:end].decode("utf-8").split("\0")
+        return AppStreamData(app_id, name, summary, app_license,
+                             categories.split(";") if categories else [], icon)
+
+    def close(self):
+        self.Map.close()
+
+    def __len__(self):
+        return self.Count
+
+
+def index_dir():
+    cache_dir = os.environ.get("XDG_CACHE_HOME", os.path.expanduser("~/.cache"))
+    return os.path.join(cache_dir, "pardus-flatpak-gui", "appstream")
+
+
+# Returns the index of the AppStream data of a Flatpak remote of an
+# installation for an arch, or None if the remote has no AppStream data yet.
+# The index is rebuilt only when the active AppStream commit, the checksum the
+# active directory links to, has changed; an already open, current index is
+# returned as is. A replaced current index is left open for the caller to
+# close, since other threads may still be reading it.
+def appstream_index_for_remote(installation, remote, arch, current_index=None):
+    appstream_dir = remote.get_appstream_dir(arch).get_path()
+    xml_file_name = os.path.join(appstream_dir, "appstream.xml.gz")
+    if not os.path.exists(xml_file_name):
+        return None
+
+    checksum = os.path.basename(os.path.realpath(appstream_dir))
+    if current_index is not None and current_index.Checksum == checksum:
+        return current_index
+
+    # System and user installations can have remotes of the same name.
+    index_file_name = os.path.join(index_dir(), installation.get_id() + "-" +
+                                   remote.get_name() + "-" + arch + ".index")
+    try:
+        index = AppStreamIndex(index_file_name)
+    except (OSError, ValueError):
+        index = None
+    if index is not None:
+        if index.Checksum == checksum:
+            return index
+        index.close()
+
+    try:
+        write_index(iterate_components(xml_file_name, os.path.join(appstream_dir, "icons")),
+                    index_file_name, checksum)
+        return AppStreamIndex(index_file_name)
+    except (OSError, ValueError, ElementTree.ParseError) as error:
+        print("Error indexing AppStream data of " + remote.get_name() + ": " + str(error))
+        return None
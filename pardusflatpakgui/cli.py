@@ -0,0 +1,290 @@
+#!/usr/bin/env python3
+#
+# Pardus Flatpak GUI headless mode module
+# Copyright (C) 2020 Erdem Ersoy
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+# Headless mode: the catalog, search and transactions of the GUI without Gtk
+# and Glade files, for scripts. Results are printed as JSON to standard
+# output: list and search print one array, transactions print one object per
+# line for every event, a "summary" object with the transfer statistics of
+# the transaction and a last "finished" or "failed" object.
+#
+#     pardus-flatpak-gui --headless [--refresh] list [--installed]
+#     pardus-flatpak-gui --headless [--refresh] search QUERY
+#     pardus-flatpak-gui --headless install APP [APP ...]
+#     pardus-flatpak-gui --headless uninstall APP [APP ...]
+#     pardus-flatpak-gui --headless update
+#     pardus-flatpak-gui --headless install-file FILE.flatpakref
+#
+# APP is an app id, using the default arch and the stable branch when there
+# are several, or a full ref such as app/org.example.App/x86_64/stable.
+
+from pardusflatpakgui.appstreamindex import appstream_index_for_remote
+from pardusflatpakgui.parallelpull import ParallelPuller, group_refs
+from pardusflatpakgui.refcatalog import ref_key
+from pardusflatpakgui.remotelister import RemoteLister
+from pardusflatpakgui.search import SearchIndex, normalize_text
+from pardusflatpakgui.settings import settings
+from pardusflatpakgui.tracing import trace_transaction
+from pardusflatpakgui.transactions import add_update, install_from_file_transaction, \
+    install_transaction, uninstall_transaction, update_metadata, update_transaction
+from pardusflatpakgui.transactionstats import TransactionStats
+
+import argparse
+import json
+import sys
+import gi
+gi.require_version('Flatpak', '1.0')
+gi.require_version('GLib', '2.0')
+from gi.repository import Flatpak, GLib
+
+
+def print_json(value):
+    print(json.dumps(value), flush=True)
+
+
+class HeadlessEngine(object):
+    def __init__(self):
+        self.FlatpakInstallation = Flatpak.Installation.new_system(None)
+        self.RemoteLister = RemoteLister(self.FlatpakInstallation,
+                                         settings.get_int("RemoteListingThreads"))
+        self.Remotes = self.RemoteLister.list_remotes()
+        self.AppStreamIndexes = {}
+        self.OperationErrors = 0
+        self.TransactionStats = None
+
+    # Remotes are listed from their cached summaries unless refresh is set;
+    # a remote without a cached summary is listed from the network.
+    def load_catalog(self, refresh=False):
+        catalog, failed_remotes = self.RemoteLister.build_catalog(
+            self.FlatpakInstallation.list_installed_refs(), self.Remotes,
+            cached_only=not refresh)
+        if failed_remotes and not refresh:
+            for listing in self.RemoteLister.iterate_listings(failed_remotes):
+                if listing.Error is None:
+                    catalog.set_remote_refs(listing.RemoteName, listing.Refs,
+                                            listing.Priority)
+
+        for remote in self.Remotes:
+            self.AppStreamIndexes[remote.get_name()] = appstream_index_for_remote(
+                self.FlatpakInstallation, remote, Flatpak.get_default_arch())
+        return catalog
+
+    def ref_record(self, catalog, ref):
+        is_installed = catalog.is_installed(ref_key(ref))
+        if is_installed:
+            remote_name = ref.get_origin()
+            name = ref.get_appdata_name() or ""
+            summary = ref.get_appdata_summary() or ""
+            download_size = 0
+        else:
+            remote_name = ref.get_remote_name()
+            index = self.AppStreamIndexes.get(remote_name)
+            app_data = index.get(ref.get_name()) if index is not None else None
+            name = app_data.Name if app_data is not None else ""
+            summary = app_data.Summary if app_data is not None else ""
+            download_size = ref.get_download_size()
+
+        return {"ref": ref.format_ref(),
+                "id": ref.get_name(),
+                "arch": ref.get_arch(),
+                "branch": ref.get_branch(),
+                "remote": remote_name,
+                "installed": is_installed,
+                "name": name,
+                "summary": summary,
+                "installed_size": ref.get_installed_size(),
+                "download_size": download_size}
+
+    # Apps of the default arch, like the main window lists.
+    def app_records(self, catalog, installed_only=False):
+        default_arch = Flatpak.get_default_arch()
+        refs = catalog.installed_refs() if installed_only else catalog.all_refs()
+        return [self.ref_record(catalog, ref) for ref in refs
+                if ref.get_kind() == Flatpak.RefKind.APP and ref.get_arch() == default_arch]
+
+    # Returns the ref an app id or a full app ref names in the given refs
+    # (a dict keyed by ref_key()), or None; refs of other kinds are only
+    # handled with their apps.
+    def resolve_ref(self, refs, text):
+        if text.count("/") == 3:
+            kind, name, arch, branch = text.split("/")
+            if kind != "app":
+                return None
+            return refs.get((Flatpak.RefKind.APP, name, arch, branch))
+
+        candidates = [ref for key, ref in refs.items()
+                      if key[0] == Flatpak.RefKind.APP and key[1] == text and
+                      key[2] == Flatpak.get_default_arch()]
+        for ref in candidates:
+            if ref.get_branch() == "stable":
+                return ref
+        return candidates[0] if candidates else None
+
+    def resolve_refs(self, refs, texts):
+        resolved_refs = []
+        for text in texts:
+            ref = self.resolve_ref(refs, text)
+            if ref is None:
+                print_json({"event": "failed", "message": "Unknown app: " + text})
+                return None
+            resolved_refs.append(ref)
+        return resolved_refs
+
+    def run_transaction(self, transaction, name):
+        self.OperationErrors = 0
+        trace_transaction(transaction, name)
+        self.TransactionStats = TransactionStats(transaction, name)
+        transaction.connect("new-operation", self.on_new_operation)
+        transaction.connect("operation-done", self.on_operation_done)
+        transaction.connect("operation-error", self.on_operation_error)
+        try:
+            transaction.run(None)
+        except GLib.Error as error:
+            self.print_summary("failed")
+            print_json({"event": "failed", "message": error.message})
+            return 1
+
+        self.print_summary("finished")
+        print_json({"event": "finished", "errors": self.OperationErrors})
+        return 1 if self.OperationErrors else 0
+
+    def print_summary(self, result):
+        summary = self.TransactionStats.finish(result)
+        summary["event"] = "summary"
+        print_json(summary)
+
+    def on_new_operation(self, transaction, operation, progress):
+        print_json({"event": "operation", "ref": operation.get_ref(),
+                    "type": operation.get_operation_type().value_nick})
+
+    def on_operation_done(self, transaction, operation, commit, result):
+        print_json({"event": "done", "ref": operation.get_ref(), "commit": commit})
+
+    def on_operation_error(self, transaction, operation, error, details):
+        self.OperationErrors += 1
+        self.TransactionStats.operation_failed(operation, error)
+        print_json({"event": "error", "ref": operation.get_ref(), "message": error.message})
+        return True
+
+    def list(self, args):
+        print_json(self.app_records(self.load_catalog(args.refresh), args.installed))
+        return 0
+
+    def search(self, args):
+        records = self.app_records(self.load_catalog(args.refresh))
+        search_index = SearchIndex()
+        for record in records:
+            search_index.add(record["ref"], record["id"], record["name"], record["summary"])
+
+        query = normalize_text(args.query)
+        search_index.search(query)
+        found_records = [record for record in records if search_index.matches(record["ref"])]
+        found_records.sort(key=lambda record: search_index.rank(record["ref"], query))
+        print_json(found_records)
+        return 0
+
+    def install(self, args):
+        catalog = self.load_catalog(args.refresh)
+        refs = self.resolve_refs(catalog.NonInstalledRefs, args.apps)
+        if refs is None:
+            return 1
+        return self.run_transaction(install_transaction(
+            self.FlatpakInstallation,
+            [(ref.get_name(), ref.get_arch(), ref.get_branch(), ref.get_remote_name())
+             for ref in refs]), "install")
+
+    def uninstall(self, args):
+        catalog = self.load_catalog()
+        refs = self.resolve_refs(catalog.InstalledRefs, args.apps)
+        if refs is None:
+            return 1
+        return self.run_transaction(uninstall_transaction(
+            self.FlatpakInstallation,
+            [(ref.get_name(), ref.get_arch(), ref.get_branch()) for ref in refs]), "uninstall")
+
+    # The same pull engine as Update All: with UpdateParallelism above 1,
+    # groups without shared runtimes are pulled concurrently first.
+    def update(self, args):
+        refs_to_update = self.FlatpakInstallation.list_installed_refs_for_update(None)
+        transaction = update_transaction(self.FlatpakInstallation, refs_to_update)
+
+        parallelism = settings.get_int("UpdateParallelism")
+        if parallelism > 1:
+            catalog = self.load_catalog(args.refresh)
+            groups = group_refs([(ref.format_ref(), update_metadata(ref, catalog))
+                                 for ref in refs_to_update])
+            if len(groups) > 1:
+                puller = ParallelPuller(self.FlatpakInstallation, parallelism)
+                for group, error in puller.iterate_pulls(groups, add_update, None):
+                    print_json({"event": "pulled", "refs": group,
+                                "message": error.message if error is not None else None})
+                transaction.set_no_pull(True)
+        return self.run_transaction(transaction, "update")
+
+    def install_file(self, args):
+        try:
+            with open(args.file, "rb") as flatpakref_file:
+                file_contents = flatpakref_file.read()
+        except OSError as error:
+            print_json({"event": "failed", "message": str(error)})
+            return 1
+        return self.run_transaction(install_from_file_transaction(
+            self.FlatpakInstallation, GLib.Bytes.new(file_contents)), "install from file")
+
+
+def argument_parser():
+    parser = argparse.ArgumentParser(prog="pardus-flatpak-gui --headless",
+                                     description="Pardus Flatpak GUI headless mode")
+    parser.add_argument("--refresh", action="store_true",
+                        help="list remotes from the network instead of the cache")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    list_parser = subparsers.add_parser("list", help="list apps")
+    list_parser.add_argument("--installed", action="store_true", help="only installed apps")
+
+    search_parser = subparsers.add_parser("search", help="search apps")
+    search_parser.add_argument("query")
+
+    install_parser = subparsers.add_parser("install", help="install apps")
+    install_parser.add_argument("apps", nargs="+")
+
+    uninstall_parser = subparsers.add_parser("uninstall", help="uninstall apps")
+    uninstall_parser.add_argument("apps", nargs="+")
+
+    subparsers.add_parser("update", help="update all installed refs")
+
+    install_file_parser = subparsers.add_parser("install-file",
+                                                help="install from a .flatpakref file")
+    install_file_parser.add_argument("file")
+    return parser
+
+
+# Listing the installation and its remotes can fail too, before any
+# transaction runs; that is reported like a failed transaction.
+def main(arguments=None):
+    args = argument_parser().parse_args(arguments)
+    try:
+        engine = HeadlessEngine()
+        command_function = getattr(engine, args.command.replace("-", "_"))
+        return command_function(args)
+    except GLib.Error as error:
+        print_json({"event": "failed", "message": error.message})
+        return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+#
+# Pardus Flatpak GUI main loop dispatcher module
+# Copyright (C) 2020 Erdem Ersoy
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import collections
+import threading
+import traceback
+import gi
+gi.require_version('GLib', '2.0')
+from gi.repository import GLib
+
+
+class DispatcherCall(object):
+    def __init__(self):
+        self.Event = threading.Event()
+        self.Result = None
+        self.Error = None
+
+
+# Worker threads post UI mutations here instead of calling GLib.idle_add
+# directly. Posted calls run on the main loop strictly in posting order, from
+# a single idle source, and call() lets a worker wait for its mutation.
+class MainLoopDispatcher(object):
+    def __init__(self):
+        self.Lock = threading.Lock()
+        self.Queue = collections.deque()
+        self.SourcePending = False
+
+    def post(self, function, *args):
+        self.enqueue(function, args, None)
+
+    def call(self, function, *args):
+        if threading.current_thread() is threading.main_thread():
+            return function(*args)
+
+        dispatcher_call = DispatcherCall()
+        self.enqueue(function, args, dispatcher_call)
+        dispatcher_call.Event.wait()
+        if dispatcher_call.Error is not None:
+            raise dispatcher_call.Error
+        return dispatcher_call.Result
+
+    def wait(self):
+        self.call(lambda: None)
+
+    def enqueue(self, function, args, dispatcher_call):
+        with self.Lock:
+            self.Queue.append((function, args, dispatcher_call))
+            if not self.SourcePending:
+                self.SourcePending = True
+                GLib.idle_add(self.dispatch, priority=GLib.PRIORITY_DEFAULT)
+
+    def dispatch(self):
+        while True:
+            with self.Lock:
+                if not self.Queue:
+                    self.SourcePending = False
+                    return False
+                function, args, dispatcher_call = self.Queue.popleft()
+
+            # An error of a posted call is printed, like PyGObject does for
+            # callbacks, and the queue goes on draining.
+            if dispatcher_call is None:
+                try:
+                    function(*args)
+                except Exception:
+                    traceback.print_exc()
+                continue
+
+            try:
+                dispatcher_call.Result = function(*args)
+            except Exception as error:
+                dispatcher_call.Error = error
+            finally:
+                dispatcher_call.Event.set()
+
+
+main_loop_dispatcher = MainLoopDispatcher()
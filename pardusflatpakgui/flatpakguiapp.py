@@ -16,71 +16,100 @@
 # You should have received a copy of the GNU General Public License
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
-from pardusflatpakgui.mainwindow import MainWindow
-from pardusflatpakgui.installfromfilewindow import InstallFromFileWindow
+from pardusflatpakgui.i18n import _
+from pardusflatpakgui.jobqueue import job_queue
+from pardusflatpakgui.profiling import startup_timer
+from pardusflatpakgui.resources import ui_resource
 
-import gettext
-import locale
-import sys
 import gi
 gi.require_version('Gtk', '3.0')
 gi.require_version('GLib', '2.0')
 gi.require_version('Flatpak', '1.0')
-gi.require_version('Gio', '2.0')
-from gi.repository import Gtk, GLib, Flatpak, Gio
-
-locale.setlocale(locale.LC_ALL, "")
-gettext.bindtextdomain("pardus-flatpak-gui", "/usr/share/locale/")
-gettext.textdomain("pardus-flatpak-gui")
-_ = gettext.gettext
-gettext.install("pardus-flatpak-gui", "/usr/share/locale/")
+from gi.repository import Gtk, GLib, Flatpak
 
 
 class FlatpakGUIApp(Gtk.Application):
+    # Runs with Gio.ApplicationFlags.HANDLES_OPEN: the first process is the
+    # primary instance, and later ones only pass their files to it over
+    # D-Bus and exit. Files opened there reuse its Flatpak installation and,
+    # if the main window is open, its catalog.
     def __init__(self, application_id, flags):
         Gtk.Application.__init__(self, application_id=application_id, flags=flags)
 
-        try:
-            messages_gui_file = "/usr/share/pardus/pardus-flatpak-gui/ui/messagedialogs.glade"
-            messages_builder = Gtk.Builder.new_from_file(messages_gui_file)
-            messages_builder.connect_signals(self)
-        except GLib.GError:
-            print(_("Error reading message dialogs GUI file: ")
-                  + messages_gui_file)
-            raise
-
-        self.MessageDialogError = messages_builder.get_object(
-            "MessageDialogError")
-
-        self.connect("activate", self.new_window)
-
-    def new_window(self, application):
-        if len(sys.argv) == 1:
-            MainWindow(self)
-        elif len(sys.argv) == 2:
-            file_name = sys.argv[1]
+        self.MessageDialogError = None
+        self.FlatpakInstallation = None
+        self.MainWindow = None
+
+        self.connect("activate", self.on_activate)
+        self.connect("open", self.on_open)
+        self.connect("shutdown", self.on_shutdown)
+
+    def get_installation(self):
+        if self.FlatpakInstallation is None:
+            self.FlatpakInstallation = Flatpak.Installation.new_system(None)
+        return self.FlatpakInstallation
+
+    # The message dialogs are only read from their GUI file when an error is
+    # shown.
+    def show_error(self, markup, text):
+        if self.MessageDialogError is None:
             try:
-                file = open(file_name, "r")
-            except FileNotFoundError:
-                self.MessageDialogError.set_markup(
-                    _("<big><b>File Not Found Error</b></big>"))
-                self.MessageDialogError.format_secondary_text(
-                    _("File not found: ") + file_name)
-                self.MessageDialogError.run()
-                self.MessageDialogError.hide()
-                return None
-            else:
-                file_contents = file.read(-1)
-                file_contents_bytes = bytes(file_contents, "utf-8")
-                file_contents_glib_bytes = GLib.Bytes.new(file_contents_bytes)
-
-                InstallFromFileWindow(application, file_contents_glib_bytes)
-        else:
-            self.MessageDialogError.set_markup(
-                _("<big><b>Argument Error</b></big>"))
-            self.MessageDialogError.format_secondary_text(
-                _("There are too many arguments. Argument count: ") +
-                str(len(sys.argv)))
-            self.MessageDialogError.run()
-            self.MessageDialogError.hide()
+                messages_gui_file = ui_resource("messagedialogs.glade")
+                messages_builder = Gtk.Builder.new_from_resource(messages_gui_file)
+                messages_builder.connect_signals(self)
+            except GLib.GError:
+                print(_("Error reading message dialogs GUI file: ")
+                      + messages_gui_file)
+                raise
+
+            self.MessageDialogError = messages_builder.get_object(
+                "MessageDialogError")
+
+        self.MessageDialogError.set_markup(markup)
+        self.MessageDialogError.format_secondary_text(text)
+        self.MessageDialogError.run()
+        self.MessageDialogError.hide()
+
+    # Window modules are imported when their window is first created, so
+    # installing from a file doesn't load the main window and the other way
+    # round.
+    def on_activate(self, application):
+        if self.MainWindow is not None:
+            self.MainWindow.MainWindow.present()
             return None
+
+        with startup_timer.measure("importing the main window"):
+            from pardusflatpakgui.mainwindow import MainWindow
+        with startup_timer.measure("constructing the main window"):
+            self.MainWindow = MainWindow(self)
+        self.MainWindow.MainWindow.connect("destroy", self.on_main_window_destroy)
+
+    def on_main_window_destroy(self, widget):
+        self.MainWindow = None
+
+    def on_shutdown(self, application):
+        job_queue.shut_down()
+
+    def on_open(self, application, files, n_files, hint):
+        from pardusflatpakgui.installfromfilewindow import InstallFromFileWindow
+
+        for file in files:
+            try:
+                success, file_contents, etag = file.load_contents(None)
+            except GLib.Error:
+                self.show_error(_("<big><b>File Not Found Error</b></big>"),
+                                _("File not found: ") + file.get_parse_name())
+                continue
+
+            # .flatpakref files are UTF-8 key files.
+            try:
+                file_text = file_contents.decode("utf-8")
+            except UnicodeDecodeError:
+                self.show_error(_("<big><b>Invalid File Error</b></big>"),
+                                _("Not a valid .flatpakref file: ") + file.get_parse_name())
+                continue
+
+            if not job_queue.coalesce("install_from_file", [[file_text]]):
+                continue
+            InstallFromFileWindow(self, self.get_installation(),
+                                  GLib.Bytes.new(file_contents), self.MainWindow)
@@ -0,0 +1,29 @@
+#!/usr/bin/env python3
+#
+# Pardus Flatpak GUI translation module
+# Copyright (C) 2020 Erdem Ersoy
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+# The locale and the text domain are set up once, by the first module
+# importing this one; the others only import _ from here.
+
+import gettext
+import locale
+
+locale.setlocale(locale.LC_ALL, "")
+gettext.bindtextdomain("pardus-flatpak-gui", "/usr/share/locale/")
+gettext.textdomain("pardus-flatpak-gui")
+_ = gettext.gettext
+gettext.install("pardus-flatpak-gui", "/usr/share/locale/")
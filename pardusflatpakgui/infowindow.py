@@ -16,8 +16,9 @@
 # You should have received a copy of the GNU General Public License
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
-import gettext
-import locale
+from pardusflatpakgui.i18n import _
+from pardusflatpakgui.resources import ui_resource
+
 import webbrowser
 import gi
 gi.require_version('Gtk', '3.0')
@@ -25,12 +26,6 @@ gi.require_version('Gdk', '3.0')
 gi.require_version('GLib', '2.0')
 from gi.repository import Gtk, Gdk, GLib
 
-locale.setlocale(locale.LC_ALL, "")
-gettext.bindtextdomain("pardus-flatpak-gui", "/usr/share/locale/")
-gettext.textdomain("pardus-flatpak-gui")
-_ = gettext.gettext
-gettext.install("pardus-flatpak-gui", "/usr/share/locale/")
-
 
 class InfoWindow(object):
     def __init__(self, application, info_string, app, real_name):
@@ -40,8 +35,8 @@ class InfoWindow(object):
         self.real_name = real_name
 
         try:
-            info_gui_file = "/usr/share/pardus/pardus-flatpak-gui/ui/infowindow.glade"
-            info_builder = Gtk.Builder.new_from_file(info_gui_file)
+            info_gui_file = ui_resource("infowindow.glade")
+            info_builder = Gtk.Builder.new_from_resource(info_gui_file)
             info_builder.connect_signals(self)
         except GLib.GError:
             print(_("Error reading GUI file: ") + info_gui_file)
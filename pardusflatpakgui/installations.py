@@ -0,0 +1,48 @@
+#!/usr/bin/env python3
+#
+# Pardus Flatpak GUI installations module
+# Copyright (C) 2020 Erdem Ersoy
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import threading
+import gi
+gi.require_version('Flatpak', '1.0')
+gi.require_version('Gio', '2.0')
+from gi.repository import Flatpak, Gio
+
+
+def new_installation_for_path(flatpak_installation):
+    return Flatpak.Installation.new_for_path(flatpak_installation.get_path(),
+                                             flatpak_installation.get_is_user(),
+                                             Gio.Cancellable.new())
+
+
+# Gives every thread of a pool its own Flatpak.Installation for the path of
+# the given installation, instead of sharing one object between threads.
+# Installations are made by Factory, which the benchmarks replace to share
+# their in-memory installation.
+class ThreadInstallations(object):
+    Factory = staticmethod(new_installation_for_path)
+
+    def __init__(self, flatpak_installation):
+        self.FlatpakInstallation = flatpak_installation
+        self.ThreadData = threading.local()
+
+    def get(self):
+        installation = getattr(self.ThreadData, "FlatpakInstallation", None)
+        if installation is None:
+            installation = self.Factory(self.FlatpakInstallation)
+            self.ThreadData.FlatpakInstallation = installation
+        return installation
@@ -16,43 +16,37 @@
 # You should have received a copy of the GNU General Public License
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
-import gettext
-import locale
-import sys
-import threading
-import time
+from pardusflatpakgui.actionwindow import ActionWindow
+from pardusflatpakgui.dispatcher import main_loop_dispatcher
+from pardusflatpakgui.i18n import _
+from pardusflatpakgui.jobqueue import job_queue
+from pardusflatpakgui.progresssink import ProgressSink
+from pardusflatpakgui.settings import settings
+from pardusflatpakgui.tracing import trace_transaction, traced
+from pardusflatpakgui.transactionlog import TransactionLog
+from pardusflatpakgui.transactions import install_from_file_transaction, operation_installed_ref
+from pardusflatpakgui.transactionstats import TransactionStats
+
 import gi
-gi.require_version('Gtk', '3.0')
 gi.require_version('Flatpak', '1.0')
 gi.require_version('GLib', '2.0')
 gi.require_version('Gio', '2.0')
-from gi.repository import Gtk, Flatpak, GLib, Gio
-
-locale.setlocale(locale.LC_ALL, "")
-gettext.bindtextdomain("pardus-flatpak-gui", "/usr/share/locale/")
-gettext.textdomain("pardus-flatpak-gui")
-_ = gettext.gettext
-gettext.install("pardus-flatpak-gui", "/usr/share/locale/")
+from gi.repository import Flatpak, GLib, Gio
 
 
 class InstallFromFileWindow(object):
-    def __init__(self, application, file_contents_glib_bytes):
+    # main_window is None when only a file is opened; otherwise installed
+    # refs are shown there. The file contents must be valid UTF-8, which the
+    # callers check before opening the window.
+    def __init__(self, application, flatpak_installation, file_contents_glib_bytes,
+                 main_window=None):
         self.Application = application
         self.FileFlatpakRefContentsGLibBytes = file_contents_glib_bytes
+        self.MainWindow = main_window
 
-        self.FlatpakInstallation = Flatpak.Installation.new_system(Gio.Cancellable.new())
-        self.FlatpakTransaction = \
-            Flatpak.Transaction.new_for_installation(
-                self.FlatpakInstallation,
-                Gio.Cancellable.new())
-        self.FlatpakTransaction.set_disable_dependencies(False)
-        self.FlatpakTransaction.set_disable_prune(False)
-        self.FlatpakTransaction.set_disable_related(False)
-        self.FlatpakTransaction.set_disable_static_deltas(False)
-        self.FlatpakTransaction.set_no_deploy(False)
-        self.FlatpakTransaction.set_no_pull(False)
-        self.FlatpakTransaction.add_install_flatpakref(
-            file_contents_glib_bytes)
+        self.FlatpakInstallation = flatpak_installation
+        self.FlatpakTransaction = install_from_file_transaction(
+            self.FlatpakInstallation, file_contents_glib_bytes, Gio.Cancellable.new())
 
         self.handler_id = self.FlatpakTransaction.connect(
             "new-operation",
@@ -64,109 +58,78 @@ class InstallFromFileWindow(object):
             "operation-error",
             self.install_progress_callback_error)
 
-        try:
-            install_from_file_gui_file = "/usr/share/pardus/pardus-flatpak-gui/ui/actionwindow.glade"
-            install_from_file_builder = Gtk.Builder.new_from_file(
-                                         install_from_file_gui_file)
-            install_from_file_builder.connect_signals(self)
-        except GLib.GError:
-            print(_("Error reading GUI file: ") + install_from_file_gui_file)
-            raise
-
-        self.InstallFromFileWindow = install_from_file_builder.get_object(
-                                         "ActionWindow")
-        self.InstallFromFileWindow.set_application(application)
+        self.InstallFromFileWindow = ActionWindow(application, self)
         self.InstallFromFileWindow.set_title(_("Installing from file..."))
         self.InstallFromFileWindow.show()
 
-        self.InstallFromFileProgressBar = install_from_file_builder.get_object(
-                                              "ActionProgressBar")
+        self.InstallFromFileProgressBar = self.InstallFromFileWindow.ActionProgressBar
+        self.ProgressSink = ProgressSink(self.InstallFromFileProgressBar)
         self.ProgressBarValue = int(
             self.InstallFromFileProgressBar.get_fraction() * 100)
 
-        self.InstallFromFileLabel = install_from_file_builder.get_object(
-                                        "ActionLabel")
-        self.InstallFromFileTextBuffer = install_from_file_builder.get_object(
-                                             "ActionTextBuffer")
+        self.InstallFromFileLabel = self.InstallFromFileWindow.ActionLabel
+        self.InstallFromFileTextBuffer = self.InstallFromFileWindow.ActionTextBuffer
 
-        self.InstallFromFileTextBuffer.set_text("\0", -1)
-        self.StatusText = _("Installing from file...")
-        self.InstallFromFileLabel.set_text(self.StatusText)
-        self.InstallFromFileTextBuffer.set_text(self.StatusText)
+        self.InstallFromFileLog = TransactionLog(self.InstallFromFileTextBuffer,
+                                                 settings.get_int("LogMaxLines"))
+        status_text = _("Installing from file...")
+        self.InstallFromFileLabel.set_text(status_text)
+        self.InstallFromFileLog.append(status_text)
 
-        self.InstallFromFileThread = threading.Thread(
-                                         target=self.install_from_file,
-                                         args=())
-        self.InstallFromFileThread.start()
-        GLib.threads_init()
+        self.InstallFromFileJob = job_queue.submit(
+            "install_from_file",
+            [[file_contents_glib_bytes.get_data().decode("utf-8")]],
+            self.install_from_file)
+        if not self.InstallFromFileJob.Running:
+            self.InstallFromFileLabel.set_text(_("Waiting for other operations..."))
 
+    @traced
     def install_from_file(self):
+        trace_transaction(self.FlatpakTransaction, "install from file")
+        self.TransactionStats = TransactionStats(self.FlatpakTransaction, "install from file",
+                                                 self.ProgressSink)
         try:
             self.FlatpakTransaction.run(Gio.Cancellable.new())
         except GLib.Error:
             status_text = _("Error at installation!")
-            self.StatusText = self.StatusText + "\n" + status_text
-            GLib.idle_add(self.InstallFromFileLabel.set_text,
-                          status_text,
-                          priority=GLib.PRIORITY_DEFAULT)
-            GLib.idle_add(self.InstallFromFileTextBuffer.set_text,
-                          self.StatusText,
-                          priority=GLib.PRIORITY_DEFAULT)
+            main_loop_dispatcher.post(self.InstallFromFileLabel.set_text, status_text)
+            self.InstallFromFileLog.append(status_text)
+            self.TransactionStats.finish("failed")
         else:
             status_text = _("Installing completed!")
-            self.StatusText = self.StatusText + "\n" + status_text
-            GLib.idle_add(self.InstallFromFileLabel.set_text,
-                          status_text,
-                          priority=GLib.PRIORITY_DEFAULT)
-            GLib.idle_add(self.InstallFromFileTextBuffer.set_text,
-                          self.StatusText,
-                          priority=GLib.PRIORITY_DEFAULT)
+            main_loop_dispatcher.post(self.InstallFromFileLabel.set_text, status_text)
+            self.InstallFromFileLog.append(status_text)
+            self.TransactionStats.finish("finished")
         self.FlatpakTransaction.disconnect(self.handler_id)
         self.FlatpakTransaction.disconnect(self.handler_id_2)
         self.FlatpakTransaction.disconnect(self.handler_id_error)
-        time.sleep(0.5)
 
     def install_progress_callback(self, transaction, operation, progress):
         ref_to_install = Flatpak.Ref.parse(operation.get_ref())
         ref_to_install_real_name = ref_to_install.get_name()
 
         status_text = _("Installing: ") + ref_to_install_real_name
-        self.StatusText = self.StatusText + "\n" + status_text
-        GLib.idle_add(self.InstallFromFileLabel.set_text,
-                      status_text,
-                      priority=GLib.PRIORITY_DEFAULT)
-        GLib.idle_add(self.InstallFromFileTextBuffer.set_text,
-                      self.StatusText,
-                      priority=GLib.PRIORITY_DEFAULT)
-
-        self.TransactionProgress = progress  # FIXME: Fix PyCharm warning
-        self.TransactionProgress.set_update_frequency(200)
-        self.handler_id_progress = self.TransactionProgress.connect(
-            "changed",
-            self.progress_bar_update)  # FIXME: Fix PyCharm warning
+        main_loop_dispatcher.post(self.InstallFromFileLabel.set_text, status_text)
+        self.InstallFromFileLog.append(status_text)
 
     def install_progress_callback_disconnect(self, transaction, operation, commit, result):
-        self.TransactionProgress.disconnect(self.handler_id_progress)
+        if self.MainWindow is None:
+            return None
+        installed_ref = operation_installed_ref(self.FlatpakInstallation, operation)
+        if installed_ref is not None:
+            main_loop_dispatcher.post(self.MainWindow.set_ref_installed, installed_ref)
 
     def install_progress_callback_error(self, transaction, operation, error, details):
+        self.TransactionStats.operation_failed(operation, error)
         ref_to_install = Flatpak.Ref.parse(operation.get_ref())
         ref_to_install_real_name = ref_to_install.get_name()
 
         status_text = _("Not installed: ") + ref_to_install_real_name
-        self.StatusText = self.StatusText + "\n" + status_text
-        GLib.idle_add(self.InstallFromFileLabel.set_text,
-                      status_text,
-                      priority=GLib.PRIORITY_DEFAULT)
-        GLib.idle_add(self.InstallFromFileTextBuffer.set_text,
-                      self.StatusText,
-                      priority=GLib.PRIORITY_DEFAULT)
+        main_loop_dispatcher.post(self.InstallFromFileLabel.set_text, status_text)
+        self.InstallFromFileLog.append(status_text)
 
         return False
 
-    def progress_bar_update(self, transaction_progress):
-        GLib.idle_add(self.InstallFromFileProgressBar.set_fraction,
-                      float(transaction_progress.get_progress()) / 100.0,
-                      priority=GLib.PRIORITY_DEFAULT)
-
     def on_delete_action_window(self, widget, event):
+        job_queue.cancel(self.InstallFromFileJob)
         widget.hide_on_delete()
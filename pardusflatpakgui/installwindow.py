@@ -16,59 +16,45 @@
 # You should have received a copy of the GNU General Public License
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
-import gettext
-import locale
-import threading
-import time
+from pardusflatpakgui.actionwindow import ActionWindow
+from pardusflatpakgui.dispatcher import main_loop_dispatcher
+from pardusflatpakgui.i18n import _
+from pardusflatpakgui.jobqueue import job_queue
+from pardusflatpakgui.progresssink import ProgressSink
+from pardusflatpakgui.settings import settings
+from pardusflatpakgui.tracing import trace_transaction, traced
+from pardusflatpakgui.transactionlog import TransactionLog
+from pardusflatpakgui.transactions import install_transaction, operation_installed_ref
+from pardusflatpakgui.transactionstats import TransactionStats
+
 import gi
-gi.require_version('Gtk', '3.0')
 gi.require_version('Flatpak', '1.0')
 gi.require_version('GLib', '2.0')
 gi.require_version('Gio', '2.0')
-from gi.repository import Gtk, Flatpak, GLib, Gio
-
-locale.setlocale(locale.LC_ALL, "")
-gettext.bindtextdomain("flatpak-gui", "/usr/share/locale/")
-gettext.textdomain("flatpak-gui")
-_ = gettext.gettext
-gettext.install("flatpak-gui", "/usr/share/locale/")
+from gi.repository import Flatpak, GLib, Gio
 
 
 class InstallWindow(object):
-    def __init__(self, application, flatpak_installation, real_name, arch,
-                 branch, remote, tree_model, tree_iter, selection, search_filter):
+    # All refs, given as (real name, arch, branch, remote) tuples, are
+    # installed by one transaction, so their shared runtimes and related refs
+    # are resolved and pulled once.
+    def __init__(self, application, flatpak_installation, refs, main_window, selection):
         self.Application = application
 
-        self.RealName = real_name
-        self.Arch = arch
-        self.Branch = branch
-        self.Remote = remote
-
-        self.RefFormat = "app/" + self.RealName + "/" + self.Arch + "/" + self.Branch
-        self.Ref = Flatpak.Ref.parse(self.RefFormat)
+        self.Refs = refs
+        self.RealNames = {real_name for real_name, arch, branch, remote in refs}
+        self.PlanDeclined = False
 
         self.FlatpakInstallation = flatpak_installation
-        self.FlatpakTransaction = \
-            Flatpak.Transaction.new_for_installation(
-                self.FlatpakInstallation,
-                Gio.Cancellable.new())
-        self.FlatpakTransaction.set_default_arch(self.Arch)
-        self.FlatpakTransaction.set_disable_dependencies(False)
-        self.FlatpakTransaction.set_disable_prune(False)
-        self.FlatpakTransaction.set_disable_related(False)
-        self.FlatpakTransaction.set_disable_static_deltas(False)
-        self.FlatpakTransaction.set_no_deploy(False)
-        self.FlatpakTransaction.set_no_pull(False)
-        self.FlatpakTransaction.add_install(
-            self.Remote,
-            self.RefFormat,
-            None)
+        self.FlatpakTransaction = install_transaction(
+            self.FlatpakInstallation, self.Refs, Gio.Cancellable.new())
 
-        self.TreeModel = tree_model
-        self.TreeIter = tree_iter
+        self.MainWindow = main_window
         self.Selection = selection
-        self.SearchFilter = search_filter
 
+        self.handler_id_ready = self.FlatpakTransaction.connect(
+            "ready",
+            self.install_ready_callback)
         self.handler_id = self.FlatpakTransaction.connect(
             "new-operation",
             self.install_progress_callback)
@@ -79,189 +65,122 @@ class InstallWindow(object):
             "operation-error",
             self.install_progress_callback_error)
 
-        try:
-            install_gui_file = "/usr/share/pardus/pardus-flatpak-gui/ui/actionwindow.glade"
-            install_builder = Gtk.Builder.new_from_file(install_gui_file)
-            install_builder.connect_signals(self)
-        except GLib.GError:
-            print(_("Error reading GUI file: ") + install_gui_file)
-            raise
-
         self.InstallCancellation = Gio.Cancellable.new()
 
-        self.InstallWindow = install_builder.get_object("ActionWindow")
-        self.InstallWindow.set_application(application)
+        self.InstallWindow = ActionWindow(application, self)
         self.InstallWindow.set_title(_("Installing..."))
         self.InstallWindow.show()
 
-        self.InstallButtonCancel = install_builder.get_object("ActionButtonCancel")
+        self.InstallButtonCancel = self.InstallWindow.ActionButtonCancel
         self.InstallButtonCancel.set_sensitive(True)
 
-        self.InstallProgressBar = install_builder.get_object(
-                                        "ActionProgressBar")
+        self.InstallProgressBar = self.InstallWindow.ActionProgressBar
+        self.ProgressSink = ProgressSink(self.InstallProgressBar)
         self.ProgressBarValue = int(self.InstallProgressBar.get_fraction() * 100)
 
-        self.InstallLabel = install_builder.get_object("ActionLabel")
-        self.InstallTextBuffer = install_builder.get_object(
-                                       "ActionTextBuffer")
+        self.InstallLabel = self.InstallWindow.ActionLabel
+        self.InstallTextBuffer = self.InstallWindow.ActionTextBuffer
 
-        self.InstallTextBuffer.set_text("\0", -1)
-        self.StatusText = _("Installing...")
-        self.InstallLabel.set_text(self.StatusText)
-        self.InstallTextBuffer.set_text(self.StatusText)
+        self.InstallLog = TransactionLog(self.InstallTextBuffer,
+                                         settings.get_int("LogMaxLines"))
+        status_text = _("Installing...")
+        self.InstallLabel.set_text(status_text)
+        self.InstallLog.append(status_text)
 
-        self.InstallThread = threading.Thread(
-                           target=self.install,
-                           args=())
-        self.InstallThread.start()
-        GLib.threads_init()
+        self.InstallJob = job_queue.submit("install", self.Refs, self.install)
+        if not self.InstallJob.Running:
+            self.InstallLabel.set_text(_("Waiting for other operations..."))
 
+    @traced
     def install(self):
-        GLib.idle_add(self.Selection.unselect_all,
-                      data=None,
-                      priority=GLib.PRIORITY_DEFAULT)
-        time.sleep(0.2)
+        trace_transaction(self.FlatpakTransaction, "install")
+        self.TransactionStats = TransactionStats(self.FlatpakTransaction, "install",
+                                                 self.ProgressSink)
+        main_loop_dispatcher.call(self.Selection.unselect_all)
 
         handler_id_cancel = self.InstallCancellation.connect(self.cancellation_callback, None)
         try:
             self.FlatpakTransaction.run(self.InstallCancellation)
         except GLib.Error:
-            status_text = _("Error at installation!")
-            self.StatusText = self.StatusText + "\n" + status_text
-            GLib.idle_add(self.InstallLabel.set_text,
-                          status_text,
-                          priority=GLib.PRIORITY_DEFAULT)
-            GLib.idle_add(self.InstallTextBuffer.set_text,
-                          self.StatusText,
-                          priority=GLib.PRIORITY_DEFAULT)
+            if self.PlanDeclined:
+                status_text = _("Installing canceled!")
+                main_loop_dispatcher.post(self.InstallWindow.hide)
+            else:
+                status_text = _("Error at installation!")
+            self.TransactionStats.finish(
+                "canceled" if self.PlanDeclined or self.InstallCancellation.is_cancelled()
+                else "failed")
+            main_loop_dispatcher.post(self.InstallLabel.set_text, status_text)
+            self.InstallLog.append(status_text)
             self.disconnect_handlers(handler_id_cancel)
             return None
         else:
             status_text = _("Installing completed!")
-            self.StatusText = self.StatusText + "\n" + status_text
-            GLib.idle_add(self.InstallLabel.set_text,
-                          status_text,
-                          priority=GLib.PRIORITY_DEFAULT)
-            GLib.idle_add(self.InstallTextBuffer.set_text,
-                          self.StatusText,
-                          priority=GLib.PRIORITY_DEFAULT)
-            time.sleep(0.2)
+            main_loop_dispatcher.post(self.InstallLabel.set_text, status_text)
+            self.InstallLog.append(status_text)
+            self.TransactionStats.finish("finished")
         self.disconnect_handlers(handler_id_cancel)
-        GLib.idle_add(self.InstallButtonCancel.set_sensitive,
-                      False,
-                      priority=GLib.PRIORITY_DEFAULT)
+        main_loop_dispatcher.post(self.InstallButtonCancel.set_sensitive, False)
+
+    def install_ready_callback(self, transaction):
+        if len(self.Refs) == 1:
+            title = _("Installing ") + self.Refs[0][0]
+        else:
+            title = _("Installing ") + str(len(self.Refs)) + _(" applications")
+
+        if self.MainWindow.confirm_transaction(title, transaction.get_operations()):
+            return True
+        self.PlanDeclined = True
+        return False
 
     def install_progress_callback(self, transaction, operation, progress):
         ref_to_install = Flatpak.Ref.parse(operation.get_ref())
         ref_to_install_real_name = ref_to_install.get_name()
 
         status_text = _("Installing: ") + ref_to_install_real_name
-        self.StatusText = self.StatusText + "\n" + status_text
-        GLib.idle_add(self.InstallLabel.set_text,
-                      status_text,
-                      priority=GLib.PRIORITY_DEFAULT)
-        GLib.idle_add(self.InstallTextBuffer.set_text,
-                      self.StatusText,
-                      priority=GLib.PRIORITY_DEFAULT)
-
-        self.TransactionProgress = progress  # FIXME: Fix PyCharm warning
-        self.TransactionProgress.set_update_frequency(200)
-        self.handler_id_progress = self.TransactionProgress.connect(
-                                      "changed",
-                                      self.progress_bar_update)  # FIXME: Fix PyCharm warning
+        main_loop_dispatcher.post(self.InstallLabel.set_text, status_text)
+        self.InstallLog.append(status_text)
 
     def install_progress_callback_done(self, transaction, operation, commit, result):
-        self.TransactionProgress.disconnect(self.handler_id_progress)
-
-        operation_ref = Flatpak.Ref.parse(operation.get_ref())
-        operation_ref_real_name = operation_ref.get_name()
-        operation_ref_arch = operation_ref.get_arch()
-        operation_ref_branch = operation_ref.get_branch()
-        for installed_ref in self.FlatpakInstallation.list_installed_refs():
-            if installed_ref.get_name() == operation_ref_real_name and \
-               installed_ref.get_arch() == operation_ref_arch and \
-               installed_ref.get_branch() == operation_ref_branch and \
-               installed_ref.get_kind() == Flatpak.RefKind.APP:
-                installed_ref_real_name = installed_ref.get_name()
-                installed_ref_arch = installed_ref.get_arch()
-                installed_ref_branch = installed_ref.get_branch()
-                installed_ref_remote = "FlatHub"
-
-                installed_size = installed_ref.get_installed_size()
-                installed_size_mib = installed_size / 1048576
-                installed_size_mib_str = \
-                    f"{installed_size_mib:.2f}" + " MiB"
-
-                download_size_mib_str = ""
-                name = installed_ref.get_appdata_name()
-
-                tree_model = self.TreeModel.get_model()
-                tree_iter = tree_model.get_iter_first()
-                while tree_iter:
-                    real_name = tree_model.get_value(tree_iter, 0)
-                    arch = tree_model.get_value(tree_iter, 1)
-                    branch = tree_model.get_value(tree_iter, 2)
-                    if real_name == installed_ref_real_name and \
-                       arch == installed_ref_arch and \
-                       branch == installed_ref_branch:
-                        GLib.idle_add(tree_model.set_row,
-                                      tree_iter, [installed_ref_real_name,
-                                                  installed_ref_arch,
-                                                  installed_ref_branch,
-                                                  installed_ref_remote,
-                                                  installed_size_mib_str,
-                                                  download_size_mib_str,
-                                                  name],
-                                      priority=GLib.PRIORITY_DEFAULT)
-                        time.sleep(0.2)
+        installed_ref = operation_installed_ref(self.FlatpakInstallation, operation)
+        if installed_ref is None:
+            return None
 
-                        tree_model.refilter()
-                        time.sleep(0.3)
-                    tree_iter = tree_model.iter_next(tree_iter)
+        main_loop_dispatcher.post(self.MainWindow.set_ref_installed, installed_ref)
 
     def install_progress_callback_error(self, transaction, operation, error, details):
+        self.TransactionStats.operation_failed(operation, error)
         ref_to_install = Flatpak.Ref.parse(operation.get_ref())
         ref_to_install_real_name = ref_to_install.get_name()
 
         status_text = _("Not installed: ") + ref_to_install_real_name
-        self.StatusText = self.StatusText + "\n" + status_text
-        GLib.idle_add(self.InstallLabel.set_text,
-                      status_text,
-                      priority=GLib.PRIORITY_DEFAULT)
-        GLib.idle_add(self.InstallTextBuffer.set_text,
-                      self.StatusText,
-                      priority=GLib.PRIORITY_DEFAULT)
+        main_loop_dispatcher.post(self.InstallLabel.set_text, status_text)
+        self.InstallLog.append(status_text)
 
-        if ref_to_install_real_name != self.RealName:
+        # Other apps of the batch are still installed when one of them fails.
+        if ref_to_install_real_name not in self.RealNames or len(self.RealNames) > 1:
             return True
         else:
             return False
 
-    def progress_bar_update(self, transaction_progress):
-        GLib.idle_add(self.InstallProgressBar.set_fraction,
-                      float(transaction_progress.get_progress()) / 100.0,
-                      priority=GLib.PRIORITY_DEFAULT)
-
     def cancellation_callback(self, *data):
         status_text = _("Installing canceled!")
-        self.StatusText = self.StatusText + "\n" + status_text
-        GLib.idle_add(self.InstallLabel.set_text,
-                      status_text,
-                      priority=GLib.PRIORITY_DEFAULT)
-        GLib.idle_add(self.InstallTextBuffer.set_text,
-                      self.StatusText,
-                      priority=GLib.PRIORITY_DEFAULT)
+        main_loop_dispatcher.post(self.InstallLabel.set_text, status_text)
+        self.InstallLog.append(status_text)
 
     def disconnect_handlers(self, handler_id_cancel):
         self.InstallCancellation.disconnect(handler_id_cancel)
+        self.FlatpakTransaction.disconnect(self.handler_id_ready)
         self.FlatpakTransaction.disconnect(self.handler_id)
         self.FlatpakTransaction.disconnect(self.handler_id_2)
         self.FlatpakTransaction.disconnect(self.handler_id_error)
 
     def on_press_cancel(self, button):
         self.InstallCancellation.cancel()
+        job_queue.cancel(self.InstallJob)
         self.InstallWindow.hide_on_delete()
 
     def on_delete_action_window(self, widget, event):
         self.InstallCancellation.cancel()
+        job_queue.cancel(self.InstallJob)
         widget.hide_on_delete()
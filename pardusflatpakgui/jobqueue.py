@@ -0,0 +1,220 @@
+#!/usr/bin/env python3
+#
+# Pardus Flatpak GUI job queue module
+# Copyright (C) 2020 Erdem Ersoy
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+from pardusflatpakgui.settings import settings
+
+import json
+import os
+import threading
+
+
+# Job kinds and their refs:
+#   "install": [real name, arch, branch, remote] lists
+#   "uninstall": [real name, arch, branch] lists
+#   "update": no refs, every installed ref with an update
+#   "install_from_file": one [flatpakref file contents] list
+#   "prefetch": no refs, a background pull of the updates
+class Job(object):
+    def __init__(self, kind, refs):
+        self.Kind = kind
+        self.Refs = [list(ref) for ref in refs]
+        self.Function = None
+        self.Running = False
+        self.Background = False
+        self.CancelFunction = None
+
+    # A ref is queued at most once for the same kind of job.
+    def keys(self):
+        if not self.Refs:
+            return {(self.Kind,)}
+        return {job_key(self.Kind, ref) for ref in self.Refs}
+
+    def to_dict(self):
+        return {"kind": self.Kind, "refs": self.Refs}
+
+
+def job_key(kind, ref):
+    return (kind,) + tuple(ref[:3])
+
+
+# Every transaction of the action windows runs through this queue, so clicks
+# don't race for the installation lock. At most MaxRunningJobs jobs run at
+# the same time, the others wait in submission order. Unfinished jobs are
+# kept in $XDG_DATA_HOME/pardus-flatpak-gui/jobs.json and submitted again on
+# the next launch; objects they already pulled are in the local repository
+# and aren't downloaded again.
+class JobQueue(object):
+    def __init__(self, file_name=None, max_running_jobs=None):
+        if file_name is None:
+            data_dir = os.environ.get("XDG_DATA_HOME",
+                                      os.path.expanduser("~/.local/share"))
+            file_name = os.path.join(data_dir, "pardus-flatpak-gui", "jobs.json")
+        self.FileName = file_name
+
+        if max_running_jobs is None:
+            max_running_jobs = settings.get_int("MaxRunningJobs")
+        self.MaxRunningJobs = max(max_running_jobs, 1)
+
+        self.Lock = threading.Lock()
+        self.Jobs = []
+        self.RunningJobCount = 0
+        self.ShuttingDown = False
+        self.UnfinishedJobs = self.load_unfinished_jobs()
+
+    # Jobs left unfinished by the previous run are kept in the file until
+    # they are taken for submitting again.
+    def load_unfinished_jobs(self):
+        try:
+            with open(self.FileName, "r") as jobs_file:
+                job_dicts = json.load(jobs_file)
+        except (OSError, ValueError):
+            return []
+
+        jobs = []
+        for job_dict in job_dicts:
+            try:
+                jobs.append(Job(job_dict["kind"], job_dict["refs"]))
+            except (KeyError, TypeError):
+                continue
+        return jobs
+
+    def take_unfinished_jobs(self):
+        with self.Lock:
+            jobs = self.UnfinishedJobs
+            self.UnfinishedJobs = []
+            self.save()
+        return jobs
+
+    # Puts jobs back among the unfinished ones, e.g. when their refs can't
+    # be resolved yet.
+    def keep_unfinished_jobs(self, jobs):
+        with self.Lock:
+            self.UnfinishedJobs.extend(jobs)
+            self.save()
+
+    def queued_keys(self):
+        with self.Lock:
+            keys = set()
+            for job in self.Jobs:
+                keys.update(job.keys())
+        return keys
+
+    # Returns the refs that aren't already queued or running for a job of
+    # the same kind.
+    def coalesce(self, kind, refs):
+        keys = self.queued_keys()
+        return [ref for ref in refs if job_key(kind, ref) not in keys]
+
+    # For the kinds of jobs without refs
+    def is_queued(self, kind):
+        return (kind,) in self.queued_keys()
+
+    # Queues the job and runs function in a worker thread when its turn
+    # comes.
+    def submit(self, kind, refs, function):
+        job = Job(kind, refs)
+        job.Function = function
+        with self.Lock:
+            background_jobs = [queued_job for queued_job in self.Jobs if queued_job.Background]
+            self.Jobs.append(job)
+            self.save()
+        self.cancel_background_jobs(background_jobs)
+        self.start_jobs()
+        return job
+
+    # Background jobs yield to every other job: one is only queued when no
+    # other job is, and submitting another job calls its cancel_function,
+    # after which its function must return soon. They aren't kept in the
+    # file. Returns the job, or None when it wasn't queued.
+    def submit_background(self, kind, function, cancel_function):
+        job = Job(kind, [])
+        job.Function = function
+        job.Background = True
+        job.CancelFunction = cancel_function
+        with self.Lock:
+            if self.Jobs or self.ShuttingDown:
+                return None
+            self.Jobs.append(job)
+        self.start_jobs()
+        return job
+
+    # Called without Lock held, as cancelling may run handlers that use the
+    # queue.
+    def cancel_background_jobs(self, jobs):
+        for job in jobs:
+            job.CancelFunction()
+
+    # Removes a job that hasn't started, e.g. when its window is closed.
+    # Returns whether it was removed; a running job is cancelled by its
+    # window instead.
+    def cancel(self, job):
+        with self.Lock:
+            if job.Running or job not in self.Jobs:
+                return False
+            self.Jobs.remove(job)
+            self.save()
+        return True
+
+    # Once the application is shutting down, no more jobs are started:
+    # without a main loop, their calls to it would never return. Jobs still
+    # queued are kept in the file for the next launch; background jobs are
+    # cancelled.
+    def shut_down(self):
+        with self.Lock:
+            self.ShuttingDown = True
+            background_jobs = [job for job in self.Jobs if job.Background]
+        self.cancel_background_jobs(background_jobs)
+
+    def start_jobs(self):
+        with self.Lock:
+            if self.ShuttingDown:
+                return None
+            for job in self.Jobs:
+                if self.RunningJobCount >= self.MaxRunningJobs:
+                    break
+                if job.Running:
+                    continue
+                job.Running = True
+                self.RunningJobCount += 1
+                threading.Thread(target=self.run_job, args=(job,)).start()
+
+    def run_job(self, job):
+        try:
+            job.Function()
+        finally:
+            with self.Lock:
+                self.Jobs.remove(job)
+                self.RunningJobCount -= 1
+                self.save()
+            self.start_jobs()
+
+    # Called with Lock held. The file is replaced atomically, so an
+    # interrupted write leaves the previous state.
+    def save(self):
+        temporary_file_name = self.FileName + ".tmp"
+        try:
+            os.makedirs(os.path.dirname(self.FileName), exist_ok=True)
+            with open(temporary_file_name, "w") as jobs_file:
+                json.dump([job.to_dict() for job in self.UnfinishedJobs + self.Jobs
+                           if not job.Background], jobs_file)
+            os.replace(temporary_file_name, self.FileName)
+        except OSError:
+            print("Error writing job queue file: " + self.FileName)
+
+
+job_queue = JobQueue()
@@ -16,14 +16,25 @@
 # You should have received a copy of the GNU General Public License
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
-from pardusflatpakgui.infowindow import InfoWindow
-from pardusflatpakgui.installwindow import InstallWindow
-from pardusflatpakgui.uninstallwindow import UninstallWindow
-from pardusflatpakgui.updateallwindow import UpdateAllWindow
-from pardusflatpakgui.version import Version
-
-import gettext
-import locale
+from pardusflatpakgui.appstreamindex import appstream_index_for_remote
+from pardusflatpakgui.dispatcher import DispatcherCall, main_loop_dispatcher
+from pardusflatpakgui.i18n import _
+from pardusflatpakgui.jobqueue import Job, job_queue
+from pardusflatpakgui.profiling import startup_timer
+from pardusflatpakgui.refcatalog import RefCatalog, ref_key
+from pardusflatpakgui.refinfo import format_size, ref_info_text
+from pardusflatpakgui.remotelister import RemoteLister
+from pardusflatpakgui.resources import ui_resource
+from pardusflatpakgui.search import SearchIndex, normalize_text
+from pardusflatpakgui.settings import settings
+from pardusflatpakgui.tracing import traced, tracer
+from pardusflatpakgui.updatechecker import UpdateChecker
+
+import concurrent.futures
+import random
+import sys
+import threading
+import time
 import gi
 
 gi.require_version('Gtk', '3.0')
@@ -32,129 +43,68 @@ gi.require_version('Flatpak', '1.0')
 gi.require_version('Gio', '2.0')
 from gi.repository import Gtk, GLib, Flatpak, Gio
 
-locale.setlocale(locale.LC_ALL, "")
-gettext.bindtextdomain("pardus-flatpak-gui", "/usr/share/locale/")
-gettext.textdomain("pardus-flatpak-gui")
-_ = gettext.gettext
-gettext.install("pardus-flatpak-gui", "/usr/share/locale/")
+
+# Whether a new listing of a remote changes what the row of a ref shows.
+def remote_ref_changed(old_ref, new_ref):
+    return old_ref.get_commit() != new_ref.get_commit() or \
+        old_ref.get_installed_size() != new_ref.get_installed_size() or \
+        old_ref.get_download_size() != new_ref.get_download_size()
 
 
 class MainWindow(object):
+    PopulateBatchSize = 500
+    RevalidationMaxDelay = 30
+    SearchDebounceInterval = 150  # Milliseconds
+    FilterChunkSize = 256
+    FilterSliceTime = 0.008  # Seconds
+
+    @traced
     def __init__(self, application):
         self.Application = application
 
         try:
-            main_gui_file = "/usr/share/pardus/pardus-flatpak-gui/ui/mainwindow.glade"
-            main_builder = Gtk.Builder.new_from_file(main_gui_file)
+            main_gui_file = ui_resource("mainwindow.glade")
+            with startup_timer.measure("reading the main window GUI file"), \
+                    tracer.span("reading the main window GUI file"):
+                main_builder = Gtk.Builder.new_from_resource(main_gui_file)
             main_builder.connect_signals(self)
         except GLib.GError:
             print(_("Error reading GUI file: ") + main_gui_file)
             raise
 
-        try:
-            about_gui_file = "/usr/share/pardus/pardus-flatpak-gui/ui/aboutdialog.glade"
-            about_builder = Gtk.Builder.new_from_file(about_gui_file)
-            about_builder.connect_signals(self)
-        except GLib.GError:
-            print(_("Error reading About dialog GUI file: ") + about_gui_file)
-            raise
-
-        try:
-            messages_gui_file = "/usr/share/pardus/pardus-flatpak-gui/ui/messagedialogs.glade"
-            messages_builder = Gtk.Builder.new_from_file(messages_gui_file)
-            messages_builder.connect_signals(self)
-        except GLib.GError:
-            print(_("Error reading message dialogs GUI file: ") +
-                  messages_gui_file)
-            raise
-
-        self.FlatpakInstallation = Flatpak.Installation.new_system()
-        self.InstalledRefsList = self.FlatpakInstallation.list_installed_refs()
-        self.FlatHubRefsList = self.FlatpakInstallation.list_remote_refs_sync(
-            "flathub", Gio.Cancellable.new())
-        self.NonInstalledRefsList = []
-
-        for item in self.FlatHubRefsList:
-            self.NonInstalledRefsList.append(item)
-            for item_2 in self.InstalledRefsList:
-                if item.get_name() == item_2.get_name() and \
-                        item.get_arch() == item_2.get_arch() and \
-                        item.get_branch() == item_2.get_branch():
-                    if len(self.NonInstalledRefsList) != 0:
-                        self.NonInstalledRefsList.pop(len(self.NonInstalledRefsList) - 1)
-                    else:
-                        self.NonInstalledRefsList = []
-
-        self.AllRefsList = self.InstalledRefsList + self.NonInstalledRefsList
+        self.FlatpakInstallation = application.get_installation()
+        self.RemoteLister = RemoteLister(self.FlatpakInstallation,
+                                         settings.get_int("RemoteListingThreads"))
+        self.Remotes = []
+        self.RemoteTitles = {}
+        self.AppStreamIndexes = {}
+        self.RefCatalog = RefCatalog()
+        self.AllRefsList = []
+        self.ListedRefs = {}
+        self.NeedsRevalidation = False
+        self.RevalidationDelay = 0
+        self.RowIters = {}
+        self.SearchIndex = SearchIndex()
+
+        self.SearchDebounceSourceId = 0
+        self.SearchKeystrokeTime = 0
+        self.SearchLatency = 0
+        self.FilterSourceId = 0
+        self.FilterPass = None
+        self.FilterQuery = ""
+        self.FilterInstalledOnly = False
+
+        self.InfoExecutor = concurrent.futures.ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix="info-prefetch")
+        self.InfoPrefetchKey = None
+        self.InfoPrefetchFuture = None
 
         self.ListStoreMain = main_builder.get_object("ListStoreMain")
 
-        self.MessageDialogError = messages_builder.get_object("MessageDialogError")
-        self.MessageDialogError.set_title(_("Pardus Flatpak GUI Error Dialog"))
-
-        self.MessageDialogQuestion = messages_builder.get_object("MessageDialogQuestion")
-        self.MessageDialogQuestion.set_title(_("Pardus Flatpak GUI Question Dialog"))
-
-        # Debug print()'s:
-        # print("self.FlatHubRefsList:", len(self.FlatHubRefsList))
-        # print("self.InstalledRefsList:", len(self.InstalledRefsList))
-        # print("self.NonInstalledRefsList:", len(self.NonInstalledRefsList))
-        # print("self.AllRefsList:", len(self.AllRefsList))
-
-        for item in self.AllRefsList:
-            if item.get_kind() == Flatpak.RefKind.APP and \
-                    item.get_arch() == Flatpak.get_default_arch():
-                if isinstance(item, Flatpak.RemoteRef):
-                    item_is_installed = False
-                elif isinstance(item, Flatpak.InstalledRef):
-                    item_is_installed = True
-                else:
-                    item_is_installed = None
-
-                real_name = item.get_name()
-                arch = item.get_arch()
-                branch = item.get_branch()
-                installed_size = item.get_installed_size()
-                installed_size_mib = installed_size / 1048576
-                installed_size_mib_str = f"{installed_size_mib:.2f}" + " MiB"
-
-                if not item_is_installed:
-                    if item in self.FlatHubRefsList:
-                        remote_name = "FlatHub"
-                    else:
-                        remote_name = ""
-                    download_size = item.get_download_size()
-                    download_size_mib = download_size / 1048576
-                    download_size_mib_str = f"{download_size_mib:.2f}" + " MiB"
-                    name = ""
-                elif item_is_installed:
-                    remote_name = item.get_origin()
-                    if remote_name == "flathub":
-                        remote_name = "FlatHub"
-                    download_size_mib_str = ""
-                    name = item.get_appdata_name()
-                else:
-                    remote_name = ""
-                    download_size_mib_str = ""
-                    name = ""
-
-                    self.MessageDialogError.set_markup(
-                        _("<big><b>Invalid Flatpak Reference Error</b></big>"))
-                    self.MessageDialogError.format_secondary_text(
-                        _("Invalid Flatpak reference is: ") + "app/" + real_name + "/" + arch + "/" + branch)
-                    self.MessageDialogError.run()
-                    self.MessageDialogError.hide()
-
-                if item_is_installed is not None:
-                    self.ListStoreMain.append([real_name,
-                                               arch,
-                                               branch,
-                                               remote_name,
-                                               installed_size_mib_str,
-                                               download_size_mib_str,
-                                               name])
-            else:
-                continue
+        # Dialogs are read from their GUI files when first shown.
+        self.MessageDialogError = None
+        self.AboutDialog = None
+        self.UpdatingAll = False
 
         self.HeaderBarMain = main_builder.get_object("HeaderBarMain")
         self.HeaderBarMain.set_title(_("Pardus Flatpak GUI"))
@@ -213,148 +163,609 @@ class MainWindow(object):
         self.SearchEntryMain.set_placeholder_text(_("Click here for search"))
 
         self.SearchFilter = main_builder.get_object("SearchFilter")
-        self.SearchFilter.set_visible_func(self.search_filter_function)
+        self.SearchFilter.set_visible_column(9)
 
         self.SortModel = main_builder.get_object("SortModel")
-        self.SortModel.set_sort_func(0, self.sorting_compare_function, (self.TreeViewColumnRealName, 0))
-        self.SortModel.set_sort_func(1, self.sorting_compare_function, (self.TreeViewColumnArch, 1))
-        self.SortModel.set_sort_func(2, self.sorting_compare_function, (self.TreeViewColumnBranch, 2))
-        self.SortModel.set_sort_func(3, self.sorting_compare_function, (self.TreeViewColumnRemoteName, 3))
-        self.SortModel.set_sort_func(4, self.sorting_float_compare_function, (self.TreeViewColumnInstalledSize, 4))
-        self.SortModel.set_sort_func(5, self.sorting_float_compare_function, (self.TreeViewColumnDownloadSize, 5))
-        self.SortModel.set_sort_func(6, self.sorting_compare_function, (self.TreeViewColumnName, 6))
+        self.TreeViewColumnRemoteName.set_cell_data_func(
+            main_builder.get_object("CellRendererTextRemoteName"),
+            self.remote_cell_data_function)
+        self.TreeViewColumnInstalledSize.set_cell_data_func(
+            main_builder.get_object("CellRendererTextInstalledSize"),
+            self.size_cell_data_function, 4)
+        self.TreeViewColumnDownloadSize.set_cell_data_func(
+            main_builder.get_object("CellRendererTextDownloadSize"),
+            self.size_cell_data_function, 5)
 
         self.HeaderBarShowButton = main_builder.get_object("HeaderBarShowButton")
         self.HeaderBarShowButton.set_label(_("Show Installed Apps"))
 
-        self.AboutDialog = about_builder.get_object("AboutDialog")
-        self.AboutDialog.set_comments(_("Flatpak GUI for Pardus"))
-        self.AboutDialog.set_copyright(_("Copyright (C) 2020 Erdem Ersoy"))
-        self.AboutDialog.set_program_name(_("Pardus Flatpak GUI"))
-        self.AboutDialog.set_version(Version.getVersion())
-        self.AboutDialog.set_website_label(_("Pardus Flatpak GUI Web Site"))
+        self.HeaderBarUpdatesButton = main_builder.get_object("HeaderBarUpdatesButton")
+        self.HeaderBarUpdatesButton.set_tooltip_text(_("Update All"))
+        self.UpdateChecker = UpdateChecker(self.FlatpakInstallation, self.on_updates_checked)
 
         self.MainWindow = main_builder.get_object("MainWindow")
         self.MainWindow.set_application(application)
+        self.handler_id_draw = self.MainWindow.connect("draw", self.on_first_draw)
+
+        self.HeaderBarMain.set_subtitle(_("Loading Flatpak references..."))
+        self.UpdateAllMenuItem.set_sensitive(False)
         self.MainWindow.show()
 
-    def search_filter_function(self, model, iteration, data):
-        search_entry_text = self.SearchEntryMain.get_text()
-        real_name = model[iteration][0]
-        name = model[iteration][6]
+        self.LoadThread = threading.Thread(target=self.load_refs, args=(), daemon=True)
+        self.LoadThread.start()
+
+    def on_first_draw(self, widget, cairo_context):
+        widget.disconnect(self.handler_id_draw)
+        startup_timer.mark("time to first paint")
 
-        # If a reference is installed
-        if model[iteration][5] == "":
-            is_installed = True
+    @traced
+    def load_refs(self):
+        # List every remote from its locally cached summary first, so the list
+        # appears at local disk speed (and offline). Fresh summaries are
+        # fetched later by revalidate_refs().
+        try:
+            with tracer.span("listing installed refs"):
+                installed_refs = self.FlatpakInstallation.list_installed_refs()
+            with tracer.span("listing remotes"):
+                self.Remotes = self.RemoteLister.list_remotes()
+        except GLib.Error as error:
+            GLib.idle_add(self.load_refs_error,
+                          error.message,
+                          priority=GLib.PRIORITY_DEFAULT)
+            return None
+
+        self.RemoteTitles = {remote.get_name(): remote.get_title() or remote.get_name()
+                             for remote in self.Remotes}
+        for remote in self.Remotes:
+            self.update_appstream_index(remote)
+        with tracer.span("building the catalog"):
+            self.RefCatalog, uncached_remotes = self.RemoteLister.build_catalog(
+                installed_refs, self.Remotes, cached_only=True)
+        self.AllRefsList = self.RefCatalog.all_refs()
+        self.ListedRefs = dict(self.RefCatalog.RemoteRefsByRemote)
+
+        # A remote without a cached summary yet is listed from the network by
+        # the revalidation, which then starts right away.
+        self.NeedsRevalidation = len(self.Remotes) > 0
+        if uncached_remotes:
+            self.RevalidationDelay = 0
         else:
-            is_installed = False
+            # A random delay spreads the summary fetches of many machines
+            # starting at the same time.
+            self.RevalidationDelay = random.randint(0, MainWindow.RevalidationMaxDelay)
+
+        default_arch = Flatpak.get_default_arch()
+        rows = []
+        search_index = SearchIndex()
+        rows_span = tracer.span("building rows")
+        for item in self.AllRefsList:
+            if item.get_kind() == Flatpak.RefKind.APP and \
+                    item.get_arch() == default_arch:
+                is_installed = self.RefCatalog.is_installed(ref_key(item))
+                row = self.ref_row(item, is_installed)
+                rows.append(row)
+                search_index.add(tuple(row[:3]), row[0], row[6],
+                                 self.ref_summary(item, is_installed))
+        rows_span.end(rows=len(rows))
+
+        startup_timer.mark("references listed")
+        GLib.idle_add(self.populate_start, rows, search_index,
+                      priority=GLib.PRIORITY_DEFAULT)
+
+    def load_refs_error(self, error_message):
+        self.HeaderBarMain.set_subtitle(_("Manage Flatpak softwares via GUI on Pardus"))
+        self.show_error(_("<big><b>Listing Error</b></big>"),
+                        _("Flatpak references couldn't be listed: ") + error_message)
+        return False
+
+    # Names and summaries of non-installed apps come from the AppStream data
+    # of their remote, through an on-disk index that is only rebuilt when the
+    # data changes. Returns whether the index changed. A replaced index is
+    # also read on the main loop and by Info prefetches, so it is closed from
+    # the main loop through InfoExecutor, after the prefetches that may still
+    # use it.
+    @traced
+    def update_appstream_index(self, remote):
+        current_index = self.AppStreamIndexes.get(remote.get_name())
+        index = appstream_index_for_remote(self.FlatpakInstallation, remote,
+                                           Flatpak.get_default_arch(), current_index)
+        self.AppStreamIndexes[remote.get_name()] = index
+        if current_index is not None and index is not current_index:
+            main_loop_dispatcher.post(self.InfoExecutor.submit, current_index.close)
+        return index is not current_index
+
+    def appstream_data(self, ref):
+        index = self.AppStreamIndexes.get(ref.get_remote_name())
+        if index is None:
+            return None
+        return index.get(ref.get_name())
 
-        if len(search_entry_text) == 0 and not self.HeaderBarShowButton.get_active():
-            return True
-        if len(search_entry_text) == 0 and self.HeaderBarShowButton.get_active():
-            if UpdateAllWindow.at_updating:
-                return True
-            else:
-                return is_installed
-        elif (real_name.lower().count(search_entry_text.lower()) > 0 or name.lower().count(
-                search_entry_text.lower()) > 0) and not self.HeaderBarShowButton.get_active():
-            return True
-        elif (real_name.lower().count(search_entry_text.lower()) > 0 or name.lower().count(
-                search_entry_text.lower()) > 0) and self.HeaderBarShowButton.get_active():
-            if UpdateAllWindow.at_updating:
-                return True
-            else:
-                return is_installed
+    def remote_title(self, remote_name):
+        return self.RemoteTitles.get(remote_name, remote_name)
+
+    # The RemoteName column holds the remote name, which installations and
+    # transactions need; the remote title is shown instead.
+    def ref_row(self, ref, is_installed):
+        if is_installed:
+            remote_name = ref.get_origin()
+            download_size = 0
+            name = ref.get_appdata_name()
         else:
-            return False
+            remote_name = ref.get_remote_name()
+            download_size = ref.get_download_size()
+            app_data = self.appstream_data(ref)
+            name = app_data.Name if app_data is not None else ""
+
+        return [ref.get_name(),
+                ref.get_arch(),
+                ref.get_branch(),
+                remote_name,
+                ref.get_installed_size(),
+                download_size,
+                name,
+                is_installed,
+                int(ref.get_kind())]
+
+    def ref_summary(self, ref, is_installed):
+        if is_installed:
+            return ref.get_appdata_summary()
+        app_data = self.appstream_data(ref)
+        return app_data.Summary if app_data is not None else ""
+
+    def populate_start(self, rows, search_index):
+        # The view is detached while rows are appended, so it is only
+        # updated once at the end instead of on every append.
+        self.TreeViewMain.set_model(None)
+        # A query typed while loading filters and ranks the rows as they are
+        # appended.
+        self.SearchIndex = search_index
+        self.SearchIndex.search(self.FilterQuery)
+        self.PopulateRows = rows
+        self.PopulateIndex = 0
+        GLib.idle_add(self.populate_batch, priority=GLib.PRIORITY_DEFAULT_IDLE)
+        return False
+
+    @traced
+    def populate_batch(self):
+        batch_end = self.PopulateIndex + MainWindow.PopulateBatchSize
+        for row in self.PopulateRows[self.PopulateIndex:batch_end]:
+            self.insert_row(row)
+        self.PopulateIndex = min(batch_end, len(self.PopulateRows))
+
+        if self.PopulateIndex < len(self.PopulateRows):
+            self.HeaderBarMain.set_subtitle(
+                _("Loading Flatpak references...") + " " +
+                str(self.PopulateIndex) + "/" + str(len(self.PopulateRows)))
+            return True
+
+        self.PopulateRows = []
+        self.TreeViewMain.set_model(self.SortModel)
+        self.HeaderBarMain.set_subtitle(_("Manage Flatpak softwares via GUI on Pardus"))
+        self.UpdateAllMenuItem.set_sensitive(True)
+        startup_timer.mark("time to full list")
+        startup_timer.report()
+        self.resume_jobs(not self.NeedsRevalidation)
+        self.on_updates_checked(self.UpdateChecker.Refs)
+        self.UpdateChecker.start()
+
+        if self.NeedsRevalidation:
+            GLib.timeout_add_seconds(self.RevalidationDelay, self.start_revalidation,
+                                     priority=GLib.PRIORITY_LOW)
+        return False
+
+    # Jobs left unfinished by the previous run are submitted again with their
+    # windows once the list is complete. Refs to install that no remote lists
+    # may be in a remote without a cached summary: their jobs are kept until
+    # the revalidation has listed every remote, then the user is told about
+    # the refs still missing.
+    def resume_jobs(self, report_unresolved):
+        unresolved_jobs = []
+        for job in job_queue.take_unfinished_jobs():
+            if job.Kind == "update":
+                if not job_queue.is_queued("update"):
+                    self.on_update_all(None)
+                continue
+
+            pending_refs, unresolved_refs = self.pending_job_refs(job)
+            if unresolved_refs:
+                unresolved_jobs.append(Job(job.Kind, unresolved_refs))
+            refs = job_queue.coalesce(job.Kind, pending_refs)
+            if not refs:
+                continue
+            if job.Kind == "install":
+                from pardusflatpakgui.installwindow import InstallWindow
+                InstallWindow(self.Application, self.FlatpakInstallation, refs,
+                              self, self.TreeSelectionMain)
+            elif job.Kind == "uninstall":
+                from pardusflatpakgui.uninstallwindow import UninstallWindow
+                UninstallWindow(self.Application, self.FlatpakInstallation, refs,
+                                self, self.TreeSelectionMain, self.HeaderBarShowButton,
+                                True)
+            elif job.Kind == "install_from_file":
+                from pardusflatpakgui.installfromfilewindow import InstallFromFileWindow
+                InstallFromFileWindow(self.Application, self.FlatpakInstallation,
+                                      GLib.Bytes.new(refs[0][0].encode("utf-8")), self)
+
+        if not unresolved_jobs:
+            return None
+        if not report_unresolved:
+            job_queue.keep_unfinished_jobs(unresolved_jobs)
+            return None
+        real_names = [ref[0] for job in unresolved_jobs for ref in job.Refs]
+        self.show_error(_("<big><b>Resuming Error</b></big>"),
+                        _("These applications couldn't be found in any remote, so "
+                          "their installation wasn't resumed: ") + ", ".join(real_names))
+
+    # The refs of a job from the previous run that still need it, and the
+    # refs it can't be resumed for yet: a ref may have been installed or
+    # uninstalled since, outside the app or by the interrupted job itself, and
+    # a ref to install may be in a remote that isn't listed yet.
+    def pending_job_refs(self, job):
+        if job.Kind == "install":
+            pending_refs = []
+            unresolved_refs = []
+            for ref in job.Refs:
+                key = (Flatpak.RefKind.APP,) + tuple(ref[:3])
+                if key in self.RefCatalog.NonInstalledRefs:
+                    pending_refs.append(ref)
+                elif not self.RefCatalog.is_installed(key):
+                    unresolved_refs.append(ref)
+            return pending_refs, unresolved_refs
+        if job.Kind == "uninstall":
+            return [ref for ref in job.Refs
+                    if self.RefCatalog.is_installed((Flatpak.RefKind.APP,) + tuple(ref[:3]))], []
+        return job.Refs, []
+
+    def start_revalidation(self):
+        self.RevalidationThread = threading.Thread(target=self.revalidate_refs,
+                                                   args=(), daemon=True)
+        self.RevalidationThread.start()
+        return False
+
+    # Remotes are listed concurrently and each listing is applied as soon as
+    # it is ready, so a slow remote doesn't hold back the others. The listing
+    # and the rows it changes are built in this thread; only the catalog and
+    # the model are changed on the main loop, like installs and uninstalls
+    # change them, so neither is lost.
+    @traced
+    def revalidate_refs(self):
+        for listing in self.RemoteLister.iterate_listings(
+                self.Remotes, appstream_arch=Flatpak.get_default_arch()):
+            if listing.Error is not None:
+                # Offline or the remote is unreachable: keep its cached refs.
+                continue
 
-    def sorting_compare_function(self, tree_model_filter, row1, row2, data):
-        sorting_column, id_number = data
-        value1 = tree_model_filter.get_value(row1, id_number)
-        value2 = tree_model_filter.get_value(row2, id_number)
-
-        if value1 == "" and value2 == "":
-            return 0
-        elif value1 == "" and value2 != "":
-            return -1
-        elif value1 != "" and value2 == "":
-            return 1
-
-        if value1 < value2:
-            return -1
-        elif value1 == value2:
-            return 0
+            appstream_changed = self.update_appstream_index(listing.Remote)
+            main_loop_dispatcher.call(self.apply_remote_listing, listing,
+                                      *self.diff_listing(listing, appstream_changed))
+        main_loop_dispatcher.post(self.resume_jobs, True)
+
+    # Returns the rows to add, the row keys to remove and the rows changed
+    # since the previous listing of the remote, with the summaries of added
+    # and changed rows. All rows of a remote whose AppStream data changed are
+    # taken as changed. ListedRefs is only used by the revalidation thread.
+    @traced
+    def diff_listing(self, listing, appstream_changed):
+        old_refs = self.ListedRefs.get(listing.RemoteName, {})
+        new_refs = {ref_key(ref): ref for ref in listing.Refs}
+        self.ListedRefs[listing.RemoteName] = new_refs
+
+        default_arch = Flatpak.get_default_arch()
+        added_rows = []
+        changed_rows = {}
+        for key, ref in new_refs.items():
+            if key[0] != Flatpak.RefKind.APP or key[2] != default_arch:
+                continue
+            old_ref = old_refs.get(key)
+            if old_ref is None:
+                added_rows.append((self.ref_row(ref, False), self.ref_summary(ref, False)))
+            elif appstream_changed or remote_ref_changed(old_ref, ref):
+                changed_rows[key[1:]] = (self.ref_row(ref, False), self.ref_summary(ref, False))
+        removed_row_keys = {key[1:] for key in old_refs.keys() - new_refs.keys()
+                            if key[0] == Flatpak.RefKind.APP and key[2] == default_arch}
+        return added_rows, removed_row_keys, changed_rows
+
+    # Rows are only changed for the refs the catalog takes from this remote;
+    # a removed ref that another remote still offers is shown from that one.
+    def apply_remote_listing(self, listing, added_rows, removed_row_keys, changed_rows):
+        self.RefCatalog.set_remote_refs(listing.RemoteName, listing.Refs, listing.Priority)
+
+        non_installed_refs = self.RefCatalog.NonInstalledRefs
+        changed_rows = {row_key: changed_row for row_key, changed_row in changed_rows.items()
+                        if self.is_offered_by(row_key, listing.RemoteName)}
+        for row_key in list(removed_row_keys):
+            ref = non_installed_refs.get((Flatpak.RefKind.APP,) + row_key)
+            if ref is not None:
+                removed_row_keys.discard(row_key)
+                changed_rows[row_key] = (self.ref_row(ref, False), self.ref_summary(ref, False))
+        self.apply_remote_changes(added_rows, removed_row_keys, changed_rows)
+        return False
+
+    def is_offered_by(self, row_key, remote_name):
+        ref = self.RefCatalog.NonInstalledRefs.get((Flatpak.RefKind.APP,) + row_key)
+        return ref is None or ref.get_remote_name() == remote_name
+
+    @traced
+    def apply_remote_changes(self, added_rows, removed_row_keys, changed_rows):
+        self.AllRefsList = self.RefCatalog.all_refs()
+        self.InfoPrefetchKey = None
+
+        for row_key in removed_row_keys:
+            if not self.is_row_installed(row_key):
+                self.remove_row(row_key)
+        for row_key, (row, summary) in changed_rows.items():
+            if not self.is_row_installed(row_key):
+                self.update_row(row_key, row, summary)
+        for row, summary in added_rows:
+            if self.get_row_iter(tuple(row[:3])) is None:
+                self.append_row(row, summary)
+        return False
+
+    # ListStoreMain rows are indexed by (real name, arch, branch). ListStore
+    # iters persist until their row is removed, so they are stored directly;
+    # a Gtk.TreeRowReference per row would be walked on every insert.
+    def append_row(self, row, summary=""):
+        row_key = tuple(row[:3])
+        self.SearchIndex.add(row_key, row[0], row[6], summary)
+        self.insert_row(row)
+
+    def insert_row(self, row):
+        row_key = tuple(row[:3])
+        self.RowIters[row_key] = self.ListStoreMain.append(
+            row + [self.is_row_visible(row_key, row[7]),
+                   self.SearchIndex.rank(row_key, self.FilterQuery)])
+
+    def get_row_iter(self, row_key):
+        return self.RowIters.get(row_key)
+
+    def update_row(self, row_key, row, summary=""):
+        tree_iter = self.RowIters.get(row_key)
+        if tree_iter is not None:
+            self.SearchIndex.add(row_key, row[0], row[6], summary)
+            self.ListStoreMain.set_row(
+                tree_iter, row + [self.is_row_visible(row_key, row[7]),
+                                  self.SearchIndex.rank(row_key, self.FilterQuery)])
+        return False
+
+    def remove_row(self, row_key):
+        tree_iter = self.RowIters.pop(row_key, None)
+        self.SearchIndex.remove(row_key)
+        if tree_iter is not None:
+            self.ListStoreMain.remove(tree_iter)
+        return False
+
+    def is_row_installed(self, row_key):
+        tree_iter = self.RowIters.get(row_key)
+        return tree_iter is not None and self.ListStoreMain.get_value(tree_iter, 7)
+
+    def set_ref_installed(self, installed_ref):
+        self.RefCatalog.add_installed_ref(installed_ref)
+        self.InfoPrefetchKey = None
+        row = self.ref_row(installed_ref, True)
+        self.update_row(tuple(row[:3]), row, self.ref_summary(installed_ref, True))
+        return False
+
+    # Shows the count of installed refs with updates in the header bar.
+    def on_updates_checked(self, ref_strs):
+        update_count = sum(1 for ref_str in ref_strs
+                           if self.RefCatalog.is_installed(ref_key(Flatpak.Ref.parse(ref_str))))
+        self.HeaderBarUpdatesButton.set_label(_("Updates: ") + str(update_count))
+        self.HeaderBarUpdatesButton.set_visible(update_count > 0 and not self.UpdatingAll)
+        return False
+
+    def set_ref_uninstalled(self, key):
+        self.RefCatalog.remove_installed_ref(key)
+        self.InfoPrefetchKey = None
+        remote_ref = self.RefCatalog.get_remote_ref(key)
+        if remote_ref is None:
+            self.remove_row(key[1:])
         else:
-            return 1
-
-    def sorting_float_compare_function(self, tree_model_filter, row1, row2, data):
-        sorting_column, id_number = data
-        value1 = tree_model_filter.get_value(row1, id_number)[:-4]
-        value2 = tree_model_filter.get_value(row2, id_number)[:-4]
-
-        if value1 == "" and value2 == "":
-            return 0
-        elif value1 == "" and value2 != "":
-            return -1
-        elif value1 != "" and value2 == "":
-            return 1
-
-        value1_float = float(value1)
-        value2_float = float(value2)
-
-        if value1_float < value2_float:
-            return -1
-        elif value1_float == value2_float:
-            return 0
+            self.update_row(key[1:], self.ref_row(remote_ref, False),
+                            self.ref_summary(remote_ref, False))
+        return False
+
+    # Sizes are stored as bytes and only formatted for the cells drawn.
+    # Download size isn't shown for installed refs.
+    def size_cell_data_function(self, tree_view_column, cell_renderer, tree_model, tree_iter, column):
+        if column == 5 and tree_model.get_value(tree_iter, 7):
+            cell_renderer.set_property("text", "")
         else:
-            return 1
+            cell_renderer.set_property("text",
+                                       format_size(tree_model.get_value(tree_iter, column)))
+
+    def remote_cell_data_function(self, tree_view_column, cell_renderer, tree_model, tree_iter, data):
+        cell_renderer.set_property("text", self.remote_title(tree_model.get_value(tree_iter, 3)))
 
     def on_delete_main_window(self, widget, event):
         widget.hide_on_delete()
 
     def on_columns_changed(self, tree_view):  # FIXME: Remove
-        selection = tree_view.get_selection()
-        tree_model, tree_iter = selection.get_selected()
-        if tree_iter is None:
-            return None
-
-        # If the selected app is installed
-        if tree_model.get_value(tree_iter, 5) == "":
-            self.RunMenuItem.set_sensitive(True)
-            self.UninstallMenuItem.set_sensitive(True)
-            self.InstallMenuItem.set_sensitive(False)
-
-        # If the selected app is not installed
-        else:
-            self.RunMenuItem.set_sensitive(False)
-            self.UninstallMenuItem.set_sensitive(False)
-            self.InstallMenuItem.set_sensitive(True)
+        self.on_selection_changed(tree_view.get_selection())
 
+    # Run and Info work on a single app; Install and Uninstall work on all
+    # selected apps that aren't installed or are installed respectively.
     def on_selection_changed(self, tree_selection):
-        tree_model, tree_iter = tree_selection.get_selected()
-        if tree_iter is None:
+        tree_model, tree_paths = tree_selection.get_selected_rows()
+        if not tree_paths:
             return None
 
-        # If the selected app is installed
-        if tree_model.get_value(tree_iter, 5) == "":
-            self.RunMenuItem.set_sensitive(True)
-            self.UninstallMenuItem.set_sensitive(True)
-            self.InstallMenuItem.set_sensitive(False)
-
-        # If the selected app is not installed
-        else:
-            self.RunMenuItem.set_sensitive(False)
-            self.UninstallMenuItem.set_sensitive(False)
-            self.InstallMenuItem.set_sensitive(True)
+        installed_values = {tree_model[tree_path][7] for tree_path in tree_paths}
+        single = len(tree_paths) == 1
+        if single:
+            row = tree_model[tree_paths[0]]
+            self.prefetch_info((Flatpak.RefKind.APP, row[0], row[1], row[2]))
+        self.RunMenuItem.set_sensitive(single and True in installed_values)
+        self.InfoMenuItem.set_sensitive(single)
+        self.UninstallMenuItem.set_sensitive(True in installed_values)
+        self.InstallMenuItem.set_sensitive(False in installed_values)
+
+    # The Info text of the selected row is built in the background, so the
+    # Info window opens at once. Moving the selection cancels a prefetch
+    # that hasn't started yet, and the result of a running one is dropped.
+    def prefetch_info(self, key):
+        if key == self.InfoPrefetchKey:
+            return None
+        if self.InfoPrefetchFuture is not None:
+            self.InfoPrefetchFuture.cancel()
+        self.InfoPrefetchKey = key
+        self.InfoPrefetchFuture = self.InfoExecutor.submit(self.ref_info, key)
+
+    # Returns the ref of a key from the catalog and its Info text, or None.
+    def ref_info(self, key):
+        ref = self.RefCatalog.get_ref(key)
+        if ref is None:
+            return None
+        if isinstance(ref, Flatpak.InstalledRef):
+            return ref, ref_info_text(ref, self.remote_title)
+        return ref, ref_info_text(ref, self.remote_title, self.appstream_data(ref))
+
+    def get_selected_iters(self):
+        tree_model, tree_paths = self.TreeSelectionMain.get_selected_rows()
+        return tree_model, [tree_model.get_iter(tree_path) for tree_path in tree_paths]
+
+    def get_selected_iter(self):
+        tree_model, tree_iters = self.get_selected_iters()
+        if not tree_iters:
+            return tree_model, None
+        return tree_model, tree_iters[0]
+
+    def show_error(self, markup, text):
+        if self.MessageDialogError is None:
+            try:
+                messages_gui_file = ui_resource("messagedialogs.glade")
+                messages_builder = Gtk.Builder.new_from_resource(messages_gui_file)
+                messages_builder.connect_signals(self)
+            except GLib.GError:
+                print(_("Error reading message dialogs GUI file: ") +
+                      messages_gui_file)
+                raise
+
+            self.MessageDialogError = messages_builder.get_object("MessageDialogError")
+            self.MessageDialogError.set_title(_("Pardus Flatpak GUI Error Dialog"))
+
+        self.MessageDialogError.set_markup(markup)
+        self.MessageDialogError.format_secondary_text(text)
+        self.MessageDialogError.run()
+        self.MessageDialogError.hide()
+
+    def show_selection_error(self):
+        self.show_error(_("<big><b>Selection Error</b></big>"),
+                        _("None of the applications are selected."))
+
+    # Called from the worker thread of a transaction once it is resolved, so
+    # the plan shows every ref once, and the download total counts shared
+    # runtimes and related refs once.
+    @traced
+    def confirm_transaction(self, title, operations):
+        ref_names = [Flatpak.Ref.parse(operation.get_ref()).get_name()
+                     for operation in operations]
+        download_size = sum(operation.get_download_size() for operation in operations)
+
+        secondary_text = _("These references will be affected: ") + ", ".join(ref_names)
+        if download_size > 0:
+            secondary_text = secondary_text + "\n" + _("Download Size: ") + format_size(download_size)
+        return self.ask_question("<big><b>" + title + "</b></big>", secondary_text)
+
+    # Asks a yes/no question from a worker thread and waits for the answer.
+    # The dialog isn't run in a nested main loop, so updates posted by other
+    # workers keep running while it is open.
+    def ask_question(self, markup, secondary_text):
+        question = DispatcherCall()
+        main_loop_dispatcher.post(self.show_question, markup, secondary_text, question)
+        question.Event.wait()
+        return question.Result
+
+    def show_question(self, markup, secondary_text, question):
+        dialog = Gtk.MessageDialog(transient_for=self.MainWindow, modal=True,
+                                   message_type=Gtk.MessageType.QUESTION,
+                                   buttons=Gtk.ButtonsType.YES_NO)
+        dialog.set_title(_("Pardus Flatpak GUI Question Dialog"))
+        dialog.set_markup(markup)
+        dialog.format_secondary_text(secondary_text)
+        dialog.connect("response", self.on_question_response, question)
+        dialog.show()
+
+    def on_question_response(self, dialog, response_id, question):
+        question.Result = response_id == Gtk.ResponseType.YES
+        dialog.destroy()
+        question.Event.set()
 
     def on_search_changed(self, search_entry):
-        self.SearchFilter.refilter()
+        self.SearchKeystrokeTime = time.perf_counter()
+        if self.SearchDebounceSourceId:
+            GLib.source_remove(self.SearchDebounceSourceId)
+        self.SearchDebounceSourceId = GLib.timeout_add(
+            MainWindow.SearchDebounceInterval, self.on_search_debounced)
 
-    def on_resorted(self, tree_sortable):
-        self.SearchFilter.refilter()
+    def on_search_debounced(self):
+        self.SearchDebounceSourceId = 0
+        self.start_filter_pass()
+        return False
 
     def on_press_show_button(self, toggle_button):
-        self.SearchFilter.refilter()
+        self.start_filter_pass()
+
+    # Visibility lives in the Visible column of ListStoreMain. A filter pass
+    # looks the query up in the search index once, then walks the rows in
+    # time slices from an idle callback testing only set membership, and
+    # touches rows whose visibility or rank changes. Starting a new pass
+    # cancels the old one.
+    def start_filter_pass(self):
+        if self.FilterSourceId:
+            GLib.source_remove(self.FilterSourceId)
+
+        self.FilterQuery = normalize_text(self.SearchEntryMain.get_text())
+        self.SearchIndex.search(self.FilterQuery)
+        self.FilterInstalledOnly = self.HeaderBarShowButton.get_active() and \
+            not self.UpdatingAll
+        self.FilterPass = self.filter_pass(list(self.RowIters))
+
+        # While searching, rows are ranked by exact and prefix matches unless
+        # the user sorts by a column.
+        sort_column_id = self.SortModel.get_sort_column_id()[0]
+        if self.FilterQuery and sort_column_id is None:
+            self.SortModel.set_sort_column_id(10, Gtk.SortType.ASCENDING)
+        elif not self.FilterQuery and sort_column_id == 10:
+            self.SortModel.set_sort_column_id(Gtk.TREE_SORTABLE_UNSORTED_SORT_COLUMN_ID,
+                                              Gtk.SortType.ASCENDING)
+        self.FilterSourceId = GLib.idle_add(self.run_filter_pass)
+
+    def filter_pass(self, row_keys):
+        for chunk_start in range(0, len(row_keys), MainWindow.FilterChunkSize):
+            for row_key in row_keys[chunk_start:chunk_start + MainWindow.FilterChunkSize]:
+                tree_iter = self.RowIters.get(row_key)
+                if tree_iter is None:
+                    continue
+                visible = self.is_row_visible(
+                    row_key, self.ListStoreMain.get_value(tree_iter, 7))
+                if self.ListStoreMain.get_value(tree_iter, 9) != visible:
+                    self.ListStoreMain.set_value(tree_iter, 9, visible)
+                if visible and self.FilterQuery:
+                    rank = self.SearchIndex.rank(row_key, self.FilterQuery)
+                    if self.ListStoreMain.get_value(tree_iter, 10) != rank:
+                        self.ListStoreMain.set_value(tree_iter, 10, rank)
+            yield
+
+    @traced
+    def run_filter_pass(self):
+        deadline = time.perf_counter() + MainWindow.FilterSliceTime
+        for _chunk in self.FilterPass:
+            if time.perf_counter() >= deadline:
+                return True
+
+        self.FilterSourceId = 0
+        if self.SearchKeystrokeTime:
+            self.SearchLatency = time.perf_counter() - self.SearchKeystrokeTime
+            self.SearchKeystrokeTime = 0
+            if startup_timer.Enabled:
+                print("search: keystroke to result: {:.3f} s".format(self.SearchLatency),
+                      file=sys.stderr)
+        return False
+
+    def is_row_visible(self, row_key, is_installed):
+        if self.FilterInstalledOnly and not is_installed:
+            return False
+        return self.SearchIndex.matches(row_key)
 
     def on_show_actions_menu(self, widget, event):
         if event.button == 3:  # 3 == Right mouse button
@@ -363,21 +774,17 @@ class MainWindow(object):
             path_info = self.TreeViewMain.get_path_at_pos(x, y)
             if path_info != None:
                 path = path_info[0]
-                self.TreeSelectionMain.select_path(path)
+                if not self.TreeSelectionMain.path_is_selected(path):
+                    self.TreeSelectionMain.unselect_all()
+                    self.TreeSelectionMain.select_path(path)
                 self.ActionsMenu.popup_at_pointer(None)
             else:
                 pass
 
     def on_run(self, menu_item):
-        selection = self.TreeViewMain.get_selection()
-        tree_model, tree_iter = selection.get_selected()
+        tree_model, tree_iter = self.get_selected_iter()
         if tree_iter is None:
-            self.MessageDialogError.set_markup(
-                _("<big><b>Selection Error</b></big>"))
-            self.MessageDialogError.format_secondary_text(
-                _("None of the applications are selected."))
-            self.MessageDialogError.run()
-            self.MessageDialogError.hide()
+            self.show_selection_error()
             return None
 
         real_name = tree_model.get_value(tree_iter, 0)
@@ -397,203 +804,40 @@ class MainWindow(object):
                 commit,
                 Gio.Cancellable.new())
         except GLib.Error:
-            self.MessageDialogError.set_markup(
-                _("<big><b>Running Error</b></big>"))
-            self.MessageDialogError.format_secondary_text(
-                _("The selected application couldn't run."))
-            self.MessageDialogError.run()
-            self.MessageDialogError.hide()
+            self.show_error(_("<big><b>Running Error</b></big>"),
+                            _("The selected application couldn't run."))
         else:
             if success:
                 pass
             else:
-                self.MessageDialogError.set_markup(
-                    _("<big><b>Running Error</b></big>"))
-                self.MessageDialogError.format_secondary_text(
-                    _("The selected application couldn't run."))
-                self.MessageDialogError.run()
-                self.MessageDialogError.hide()
+                self.show_error(_("<big><b>Running Error</b></big>"),
+                                _("The selected application couldn't run."))
 
     def on_info(self, menu_item):
-        selection = self.TreeViewMain.get_selection()
-        tree_model, tree_iter = selection.get_selected()
+        tree_model, tree_iter = self.get_selected_iter()
         if tree_iter is None:
-            self.MessageDialogError.set_markup(
-                _("<big><b>Selection Error</b></big>"))
-            self.MessageDialogError.format_secondary_text(
-                _("None of the applications are selected."))
-            self.MessageDialogError.run()
-            self.MessageDialogError.hide()
+            self.show_selection_error()
             return None
 
-        self.InstalledRefsList = self.FlatpakInstallation.list_installed_refs()
-        self.FlatHubRefsList = self.FlatpakInstallation.list_remote_refs_sync(
-            "flathub", Gio.Cancellable.new())
-        self.NonInstalledRefsList = []
-
-        for item in self.FlatHubRefsList:
-            self.NonInstalledRefsList.append(item)
-            for item_2 in self.InstalledRefsList:
-                if item.get_name() == item_2.get_name() and \
-                        item.get_arch() == item_2.get_arch() and \
-                        item.get_branch() == item_2.get_branch():
-                    if len(self.NonInstalledRefsList) != 0:
-                        self.NonInstalledRefsList.pop(len(self.NonInstalledRefsList) - 1)
-                    else:
-                        self.NonInstalledRefsList = []
-
-        self.AllRefsList = self.InstalledRefsList + self.NonInstalledRefsList
-
         real_name = tree_model.get_value(tree_iter, 0)
         arch = tree_model.get_value(tree_iter, 1)
         branch = tree_model.get_value(tree_iter, 2)
+        key = (Flatpak.RefKind.APP, real_name, arch, branch)
 
-        for item in self.AllRefsList:
-            if item.get_name() == real_name:
-                ref = item
-                break
-
-        if ref not in self.AllRefsList:
-            self.MessageDialogError.set_markup(
-                _("<big><b>Invalid Flatpak Reference Error</b></big>"))
-            self.MessageDialogError.format_secondary_text(
-                _("Invalid Flatpak reference is: ") + "app/" + real_name + "/" + arch + "/" + branch)
-            self.MessageDialogError.run()
-            self.MessageDialogError.hide()
-            return None
-
-        collection_id = ref.get_collection_id()
-        if collection_id is None:
-            collection_id = _("None")
-        commit = ref.get_commit()
-
-        if isinstance(ref, Flatpak.RemoteRef):
-            is_installed = False
-        elif isinstance(ref, Flatpak.InstalledRef):
-            is_installed = True
+        # A prefetch is usually done already; otherwise it is nearly done. One
+        # that failed is done again here.
+        if key == self.InfoPrefetchKey and self.InfoPrefetchFuture.exception() is None:
+            info = self.InfoPrefetchFuture.result()
         else:
-            is_installed = None
-
-        if is_installed:
-            app_license = ref.get_appdata_license()
-            if app_license is None:
-                app_license = _("None")
-
-            name = ref.get_appdata_name()
-            if name is None:
-                name = _("None")
-
-            summary = ref.get_appdata_summary()
-            if summary is None:
-                summary = _("None")
+            info = self.ref_info(key)
 
-            version = ref.get_appdata_version()
-            if version is None:
-                version = _("None")
-
-            deploy_dir = ref.get_deploy_dir()
-            if deploy_dir is None:
-                deploy_dir = _("None")
-
-            eol_reason = ref.get_eol()
-            if eol_reason is None:
-                eol_reason = _("None")
-
-            eol_rebased = ref.get_eol_rebase()
-            if eol_rebased is None:
-                eol_rebased = _("None")
-
-            installed_size = ref.get_installed_size()
-            installed_size_mib = installed_size / 1048576
-            installed_size_mib_as_string = f"{installed_size_mib:.2f}" + " MiB"
-
-            is_current = ref.get_is_current()
-            if is_current:
-                is_current_str = _("Yes")
-            else:
-                is_current_str = _("No")
-
-            latest_commit = ref.get_latest_commit()
-            if latest_commit is None:
-                latest_commit = _("None")
-
-            origin = ref.get_origin()
-            if origin is None:
-                origin = _("None")
-            elif origin == "flathub":
-                origin = "FlatHub"
-
-            sub_paths = ref.get_subpaths()
-            if sub_paths is None or not sub_paths:
-                sub_paths_str = _("None")
-            else:
-                sub_paths_str = ""
-                for item in sub_paths:
-                    sub_paths_str = sub_paths_str + item + ", "
-                    sub_paths_str = sub_paths_str[:-2]
-
-            info_str = _("Real Name: ") + real_name + "\n" + \
-                       _("Arch: ") + arch + "\n" + \
-                       _("Branch: ") + branch + "\n" + \
-                       _("Collection ID: ") + collection_id + "\n" + \
-                       _("Commit: ") + commit + "\n" + \
-                       _("Is Installed: ") + _("Yes") + "\n" + \
-                       _("License: ") + app_license + "\n" + \
-                       _("Name: ") + name + "\n" + \
-                       _("Summary: ") + summary + "\n" + \
-                       _("Version: ") + version + "\n" + \
-                       _("Deploy Dir: ") + deploy_dir + "\n" + \
-                       _("EOL Reason: ") + eol_reason + "\n" + \
-                       _("EOL Rebased: ") + eol_rebased + "\n" + \
-                       _("Installed Size: ") + installed_size_mib_as_string + "\n" + \
-                       _("Is Current: ") + is_current_str + "\n" + \
-                       _("Latest Commit: ") + latest_commit + "\n" + \
-                       _("Origin: ") + origin + "\n" + \
-                       _("Subpaths: ") + sub_paths_str + "\n"
-
-        elif not is_installed:
-            download_size = ref.get_download_size()
-            download_size_mib = download_size / 1048576
-            download_size_mib_str = f"{download_size_mib:.2f}" + " MiB"
-
-            eol_reason = ref.get_eol()
-            if eol_reason is None:
-                eol_reason = _("None")
-
-            eol_rebased = ref.get_eol_rebase()
-            if eol_rebased is None:
-                eol_rebased = _("None")
-
-            installed_size = ref.get_installed_size()
-            installed_size_mib = installed_size / 1048576
-            installed_size_mib_as_string = f"{installed_size_mib:.2f}" + " MiB"
-
-            remote = ref.get_remote_name()
-            if remote is None:
-                remote = _("None")
-            elif remote == "flathub":
-                remote = "FlatHub"
-
-            info_str = _("Real Name: ") + real_name + "\n" + \
-                _("Arch: ") + arch + "\n" + \
-                _("Branch: ") + branch + "\n" + \
-                _("Collection ID: ") + collection_id + "\n" + \
-                _("Commit: ") + commit + "\n" + \
-                _("Is Installed: ") + _("Yes") + "\n" + \
-                _("Download Size: ") + download_size_mib_str + "\n" + \
-                _("EOL Reason: ") + eol_reason + "\n" + \
-                _("EOL Rebased: ") + eol_rebased + "\n" + \
-                _("Installed Size: ") + installed_size_mib_as_string + "\n" + \
-                _("Remote Name: ") + remote + "\n"
-        else:
-            self.MessageDialogError.set_markup(
-                _("<big><b>Invalid Flatpak Reference Error</b></big>"))
-            self.MessageDialogError.format_secondary_text(
-                _("Invalid Flatpak reference is: ") + "app/" + real_name + "/" + arch + "/" + branch)
-            self.MessageDialogError.run()
-            self.MessageDialogError.hide()
+        if info is None:
+            self.show_error(_("<big><b>Invalid Flatpak Reference Error</b></big>"),
+                            _("Invalid Flatpak reference is: ") + "app/" + real_name + "/" + arch + "/" + branch)
             return None
 
+        from pardusflatpakgui.infowindow import InfoWindow
+        ref, info_str = info
         InfoWindow(self.Application, info_str, ref, real_name)
 
     def on_uninstall(self, menu_item):
@@ -602,76 +846,76 @@ class MainWindow(object):
         elif self.HeaderBarShowButton.get_active():
             button_not_pressed_already = False
             self.HeaderBarShowButton.set_active(False)
-            self.SearchFilter.refilter()
 
-        selection = self.TreeViewMain.get_selection()
-        tree_model, tree_iter = selection.get_selected()
-        if tree_iter is None:
-            self.MessageDialogError.set_markup(
-                _("<big><b>Selection Error</b></big>"))
-            self.MessageDialogError.format_secondary_text(
-                _("None of the applications are selected."))
-            self.MessageDialogError.run()
-            self.MessageDialogError.hide()
+        tree_model, tree_iters = self.get_selected_iters()
+        refs = [(tree_model.get_value(tree_iter, 0),
+                 tree_model.get_value(tree_iter, 1),
+                 tree_model.get_value(tree_iter, 2))
+                for tree_iter in tree_iters if tree_model.get_value(tree_iter, 7)]
+        if not refs:
+            self.show_selection_error()
             return None
 
-        real_name = tree_model.get_value(tree_iter, 0)
-        arch = tree_model.get_value(tree_iter, 1)
-        branch = tree_model.get_value(tree_iter, 2)
-        name = tree_model.get_value(tree_iter, 6)
-
-        self.MessageDialogQuestion.set_markup(
-            _("<big><b>Uninstalling ") + name + "(" + real_name + ")" + "</b></big>")
-        self.MessageDialogQuestion.format_secondary_text(
-            _("Are you sure to uninstall ") + name + "?")
-        answer = self.MessageDialogQuestion.run()
-        self.MessageDialogQuestion.hide()
-
-        if answer == Gtk.ResponseType.YES:
-            UninstallWindow(self.Application, self.FlatpakInstallation, real_name,
-                            arch, branch, tree_model, tree_iter, selection, self.SearchFilter, self.HeaderBarShowButton,
-                            button_not_pressed_already)
-        elif answer == Gtk.ResponseType.NO:
+        # Apps already being uninstalled aren't added again.
+        refs = job_queue.coalesce("uninstall", refs)
+        if not refs:
             return None
 
+        # The transaction asks to go on with its resolved plan.
+        from pardusflatpakgui.uninstallwindow import UninstallWindow
+        UninstallWindow(self.Application, self.FlatpakInstallation, refs,
+                        self, self.TreeSelectionMain, self.HeaderBarShowButton,
+                        button_not_pressed_already)
+
     def on_install(self, menu_item):
-        selection = self.TreeViewMain.get_selection()
-        tree_model, tree_iter = selection.get_selected()
-        if tree_iter is None:
-            self.MessageDialogError.set_markup(
-                _("<big><b>Selection Error</b></big>"))
-            self.MessageDialogError.format_secondary_text(
-                _("None of the applications are selected."))
-            self.MessageDialogError.run()
-            self.MessageDialogError.hide()
+        tree_model, tree_iters = self.get_selected_iters()
+        refs = [(tree_model.get_value(tree_iter, 0),
+                 tree_model.get_value(tree_iter, 1),
+                 tree_model.get_value(tree_iter, 2),
+                 tree_model.get_value(tree_iter, 3))
+                for tree_iter in tree_iters if not tree_model.get_value(tree_iter, 7)]
+        if not refs:
+            self.show_selection_error()
             return None
 
-        real_name = tree_model.get_value(tree_iter, 0)
-        arch = tree_model.get_value(tree_iter, 1)
-        branch = tree_model.get_value(tree_iter, 2)
-        remote = tree_model.get_value(tree_iter, 3)
-        if remote == "FlatHub":
-            remote = "flathub"
-
-        self.MessageDialogQuestion.set_markup(
-            _("<big><b>Installing ") + real_name + "</b></big>")
-        self.MessageDialogQuestion.format_secondary_text(
-            _("Are you sure to install ") + real_name + "?")
-        answer = self.MessageDialogQuestion.run()
-        self.MessageDialogQuestion.hide()
-
-        if answer == Gtk.ResponseType.YES:
-            InstallWindow(self.Application, self.FlatpakInstallation, real_name, arch, branch,
-                          remote, tree_model, tree_iter, selection, self.SearchFilter)
-        elif answer == Gtk.ResponseType.NO:
+        # Apps already being installed aren't added again.
+        refs = job_queue.coalesce("install", refs)
+        if not refs:
             return None
 
+        # The transaction asks to go on with its resolved plan.
+        from pardusflatpakgui.installwindow import InstallWindow
+        InstallWindow(self.Application, self.FlatpakInstallation, refs,
+                      self, self.TreeSelectionMain)
+
     def on_update_all(self, menu_item):
-        UpdateAllWindow.at_updating = True
-        tree_model = self.TreeViewMain.get_model()
+        if job_queue.is_queued("update"):
+            return None
+
+        from pardusflatpakgui.updateallwindow import UpdateAllWindow
+        self.UpdatingAll = True
+        self.HeaderBarUpdatesButton.hide()
+        self.start_filter_pass()
         UpdateAllWindow(self.Application, self.FlatpakInstallation,
-                        tree_model, self.HeaderBarShowButton)
+                        self, self.HeaderBarShowButton)
 
     def on_about(self, menu_item):
+        if self.AboutDialog is None:
+            try:
+                about_gui_file = ui_resource("aboutdialog.glade")
+                about_builder = Gtk.Builder.new_from_resource(about_gui_file)
+                about_builder.connect_signals(self)
+            except GLib.GError:
+                print(_("Error reading About dialog GUI file: ") + about_gui_file)
+                raise
+
+            from pardusflatpakgui.version import Version
+            self.AboutDialog = about_builder.get_object("AboutDialog")
+            self.AboutDialog.set_comments(_("Flatpak GUI for Pardus"))
+            self.AboutDialog.set_copyright(_("Copyright (C) 2020 Erdem Ersoy"))
+            self.AboutDialog.set_program_name(_("Pardus Flatpak GUI"))
+            self.AboutDialog.set_version(Version.getVersion())
+            self.AboutDialog.set_website_label(_("Pardus Flatpak GUI Web Site"))
+
         self.AboutDialog.run()
         self.AboutDialog.hide()
@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+#
+# Pardus Flatpak GUI parallel pull module
+# Copyright (C) 2020 Erdem Ersoy
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+from pardusflatpakgui.installations import ThreadInstallations
+from pardusflatpakgui.tracing import tracer
+from pardusflatpakgui.transactions import new_transaction
+
+import concurrent.futures
+import gi
+gi.require_version('GLib', '2.0')
+from gi.repository import GLib
+
+
+# Returns the refs the metadata (a GLib.Bytes key file) of a ref depends on:
+# the runtime of an app and the ref an extension extends.
+def metadata_dependencies(metadata):
+    if metadata is None:
+        return []
+
+    key_file = GLib.KeyFile.new()
+    try:
+        key_file.load_from_bytes(metadata, GLib.KeyFileFlags.NONE)
+    except GLib.Error:
+        return []
+
+    dependencies = []
+    for group, key, prefix in (("Application", "runtime", "runtime/"),
+                               ("ExtensionOf", "ref", "")):
+        try:
+            dependencies.append(prefix + key_file.get_string(group, key))
+        except GLib.Error:
+            continue
+    return dependencies
+
+
+class RefGroups(object):
+    def __init__(self):
+        self.Parents = {}
+
+    def find(self, ref):
+        parent = self.Parents.setdefault(ref, ref)
+        while parent != ref:
+            grandparent = self.Parents[parent]
+            self.Parents[ref] = grandparent
+            ref, parent = parent, grandparent
+        return ref
+
+    def union(self, ref, other_ref):
+        root = self.find(ref)
+        other_root = self.find(other_ref)
+        if root != other_root:
+            self.Parents[other_root] = root
+
+
+# Splits refs, given as (ref string, metadata) tuples, into groups that don't
+# share a runtime or an extended ref, so pulling the groups concurrently
+# doesn't download the same dependency twice. Groups keep the given order.
+def group_refs(refs_with_metadata):
+    ref_groups = RefGroups()
+    for ref, metadata in refs_with_metadata:
+        ref_groups.find(ref)
+        for dependency in metadata_dependencies(metadata):
+            ref_groups.union(dependency, ref)
+
+    groups = {}
+    for ref, metadata in refs_with_metadata:
+        groups.setdefault(ref_groups.find(ref), []).append(ref)
+    return list(groups.values())
+
+
+# Pulls groups of refs concurrently on a bounded thread pool with no_deploy
+# transactions. Deploying is left to one transaction with no_pull afterwards,
+# so the installation is only changed serially.
+class ParallelPuller(object):
+    def __init__(self, flatpak_installation, max_workers):
+        self.MaxWorkers = max(max_workers, 1)
+        self.ThreadInstallations = ThreadInstallations(flatpak_installation)
+
+    # add_function(transaction, ref) adds the operation of a ref, e.g. an
+    # update or an install.
+    def pull_group(self, group, add_function, cancellable):
+        transaction = new_transaction(self.ThreadInstallations.get(), cancellable,
+                                      no_deploy=True)
+        try:
+            with tracer.span("pulling group", refs=len(group)):
+                for ref in group:
+                    add_function(transaction, ref)
+                transaction.run(cancellable)
+        except GLib.Error as error:
+            return group, error
+        return group, None
+
+    # Yields (group, error) tuples as soon as each group is pulled; error is
+    # None for a group pulled successfully.
+    def iterate_pulls(self, groups, add_function, cancellable):
+        if not groups:
+            return None
+
+        with concurrent.futures.ThreadPoolExecutor(
+                max_workers=min(self.MaxWorkers, len(groups)),
+                thread_name_prefix="parallel-pull") as executor:
+            futures = [executor.submit(self.pull_group, group, add_function, cancellable)
+                       for group in groups]
+            for future in concurrent.futures.as_completed(futures):
+                yield future.result()
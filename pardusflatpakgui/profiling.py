@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+#
+# Pardus Flatpak GUI startup profiling module
+# Copyright (C) 2020 Erdem Ersoy
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import contextlib
+import os
+import sys
+import time
+
+
+# Times the modules imported while it is in sys.meta_path. The spec of a
+# module is found by the other finders; only its loader is wrapped.
+class ImportProfiler(object):
+    def __init__(self):
+        self.Times = {}  # Module name: [self time, total time]
+        self.Stack = []  # [module name, start time, time of nested imports]
+
+    def find_spec(self, name, path, target=None):
+        for finder in sys.meta_path:
+            if finder is self or not hasattr(finder, "find_spec"):
+                continue
+            spec = finder.find_spec(name, path, target)
+            if spec is not None:
+                if spec.loader is not None and hasattr(spec.loader, "exec_module"):
+                    spec.loader = TimedLoader(spec.loader, self)
+                return spec
+        return None
+
+    def enter(self, name):
+        self.Stack.append([name, time.perf_counter(), 0.0])
+
+    def leave(self):
+        name, start, nested_time = self.Stack.pop()
+        elapsed = time.perf_counter() - start
+        if self.Stack:
+            self.Stack[-1][2] += elapsed
+        times = self.Times.setdefault(name, [0.0, 0.0])
+        times[0] += elapsed - nested_time
+        times[1] += elapsed
+
+
+class TimedLoader(object):
+    def __init__(self, loader, profiler):
+        self.Loader = loader
+        self.Profiler = profiler
+
+    def __getattr__(self, name):
+        return getattr(self.Loader, name)
+
+    def create_module(self, spec):
+        self.Profiler.enter(spec.name)
+        try:
+            return self.Loader.create_module(spec)
+        finally:
+            self.Profiler.leave()
+
+    def exec_module(self, module):
+        self.Profiler.enter(module.__name__)
+        try:
+            self.Loader.exec_module(module)
+        finally:
+            self.Profiler.leave()
+
+
+class StartupTimer(object):
+    # Set PARDUS_FLATPAK_GUI_PROFILE=1 to print startup marks to stderr, and
+    # an import and construction time breakdown once the list is full.
+    Enabled = bool(os.environ.get("PARDUS_FLATPAK_GUI_PROFILE"))
+    ReportedImports = 25
+
+    def __init__(self):
+        self.StartTime = time.perf_counter()
+        self.Marks = {}
+        self.Sections = []  # (name, elapsed)
+        self.ImportProfiler = None
+
+    def mark(self, name):
+        if name in self.Marks:
+            return self.Marks[name]
+
+        elapsed = time.perf_counter() - self.StartTime
+        self.Marks[name] = elapsed
+        if self.Enabled:
+            print("startup: {}: {:.3f} s".format(name, elapsed), file=sys.stderr)
+        return elapsed
+
+    # Called by the executable before anything else is imported.
+    def profile_imports(self):
+        if self.Enabled and self.ImportProfiler is None:
+            self.ImportProfiler = ImportProfiler()
+            sys.meta_path.insert(0, self.ImportProfiler)
+
+    @contextlib.contextmanager
+    def measure(self, name):
+        if not self.Enabled:
+            yield
+            return
+
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.Sections.append((name, time.perf_counter() - start))
+
+    def report(self):
+        if not self.Enabled:
+            return
+
+        if self.ImportProfiler is not None:
+            sys.meta_path.remove(self.ImportProfiler)
+            times = sorted(self.ImportProfiler.Times.items(),
+                           key=lambda item: item[1][0], reverse=True)
+            print("startup: imports: {:.3f} s in {} modules".format(
+                sum(self_time for name, (self_time, total_time) in times), len(times)),
+                file=sys.stderr)
+            for name, (self_time, total_time) in times[:self.ReportedImports]:
+                print("startup:   import {}: {:.3f} s (with imports {:.3f} s)".format(
+                    name, self_time, total_time), file=sys.stderr)
+            self.ImportProfiler = None
+
+        for name, elapsed in self.Sections:
+            print("startup:   {}: {:.3f} s".format(name, elapsed), file=sys.stderr)
+        self.Sections = []
+
+
+startup_timer = StartupTimer()
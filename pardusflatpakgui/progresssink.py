@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+#
+# Pardus Flatpak GUI progress sink module
+# Copyright (C) 2020 Erdem Ersoy
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import threading
+import gi
+gi.require_version('GLib', '2.0')
+from gi.repository import GLib
+
+
+# Progress of an action window's progress bar, with an optional text shown
+# on it. Values may be set from any thread at any rate; only the latest one is
+# kept, and at most one update is pending on the main loop, so the bar is
+# redrawn at most once per UpdateInterval however often the progress changes.
+class ProgressSink(object):
+    UpdateInterval = 50  # Milliseconds
+
+    def __init__(self, progress_bar):
+        self.ProgressBar = progress_bar
+        self.Lock = threading.Lock()
+        self.Fraction = progress_bar.get_fraction()
+        self.Text = None
+        self.UpdatePending = False
+
+    def set_fraction(self, fraction, text=None):
+        with self.Lock:
+            self.Fraction = fraction
+            self.Text = text
+            if not self.UpdatePending:
+                self.UpdatePending = True
+                GLib.timeout_add(ProgressSink.UpdateInterval, self.update,
+                                 priority=GLib.PRIORITY_DEFAULT_IDLE)
+
+    def update(self):
+        with self.Lock:
+            fraction = self.Fraction
+            text = self.Text
+            self.UpdatePending = False
+
+        self.ProgressBar.set_fraction(fraction)
+        self.ProgressBar.set_show_text(text is not None)
+        if text is not None:
+            self.ProgressBar.set_text(text)
+        return False
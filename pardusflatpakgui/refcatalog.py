@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+#
+# Pardus Flatpak GUI reference catalog module
+# Copyright (C) 2020 Erdem Ersoy
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+
+# Refs are keyed by (kind, name, arch, branch). Both installed and remote refs
+# are hashed once, so reconciling them is a single linear pass and every
+# lookup afterwards is O(1).
+def ref_key(ref):
+    return ref.get_kind(), ref.get_name(), ref.get_arch(), ref.get_branch()
+
+
+class RefCatalog(object):
+    def __init__(self, installed_refs=(), remote_refs=()):
+        self.InstalledRefs = {}
+        self.RemoteRefs = {}
+        self.NonInstalledRefs = {}
+        self.RemoteRefsByRemote = {}
+        self.RemotePriorities = {}
+
+        self.update(installed_refs, remote_refs)
+
+    def update(self, installed_refs, remote_refs):
+        self.InstalledRefs = {ref_key(ref): ref for ref in installed_refs}
+        self.RemoteRefsByRemote = {}
+        for ref in remote_refs:
+            self.RemoteRefsByRemote.setdefault(ref.get_remote_name(), {})[ref_key(ref)] = ref
+        self.merge_remote_refs()
+
+    # Replaces the refs of one remote and keeps the refs of the others.
+    def set_remote_refs(self, remote_name, remote_refs, priority=1):
+        self.RemoteRefsByRemote[remote_name] = {ref_key(ref): ref for ref in remote_refs}
+        self.RemotePriorities[remote_name] = priority
+        self.merge_remote_refs()
+
+    # A ref offered by several remotes is taken from the remote with the
+    # highest priority, like flatpak itself does.
+    def merge_remote_refs(self):
+        self.RemoteRefs = {}
+        for remote_name in sorted(self.RemoteRefsByRemote,
+                                  key=lambda name: (self.RemotePriorities.get(name, 1), name)):
+            self.RemoteRefs.update(self.RemoteRefsByRemote[remote_name])
+        self.NonInstalledRefs = {key: ref for key, ref in self.RemoteRefs.items()
+                                 if key not in self.InstalledRefs}
+
+    def add_installed_ref(self, ref):
+        key = ref_key(ref)
+        self.InstalledRefs[key] = ref
+        self.NonInstalledRefs.pop(key, None)
+
+    def remove_installed_ref(self, key):
+        self.InstalledRefs.pop(key, None)
+        remote_ref = self.RemoteRefs.get(key)
+        if remote_ref is not None:
+            self.NonInstalledRefs[key] = remote_ref
+
+    def get_installed_ref(self, key):
+        return self.InstalledRefs.get(key)
+
+    def get_remote_ref(self, key):
+        return self.RemoteRefs.get(key)
+
+    def get_ref(self, key):
+        ref = self.InstalledRefs.get(key)
+        if ref is None:
+            ref = self.RemoteRefs.get(key)
+        return ref
+
+    def is_installed(self, key):
+        return key in self.InstalledRefs
+
+    def installed_refs(self):
+        return list(self.InstalledRefs.values())
+
+    def remote_refs(self):
+        return list(self.RemoteRefs.values())
+
+    def non_installed_refs(self):
+        return list(self.NonInstalledRefs.values())
+
+    def all_refs(self):
+        return self.installed_refs() + self.non_installed_refs()
+
+    def __len__(self):
+        return len(self.InstalledRefs) + len(self.NonInstalledRefs)
+
+    def __contains__(self, key):
+        return key in self.InstalledRefs or key in self.RemoteRefs
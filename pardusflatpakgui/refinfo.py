@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+#
+# Pardus Flatpak GUI reference info module
+# Copyright (C) 2020 Erdem Ersoy
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+from pardusflatpakgui.i18n import _
+
+import gi
+gi.require_version('Flatpak', '1.0')
+from gi.repository import Flatpak
+
+
+def format_size(size):
+    return f"{size / 1048576:.2f}" + " MiB"
+
+
+def value_or_none(value):
+    if value is None or value == "":
+        return _("None")
+    return value
+
+
+def yes_or_no(value):
+    if value:
+        return _("Yes")
+    return _("No")
+
+
+# Returns the text of the Info window of an installed or remote ref. Only
+# the ref object and already loaded data are read, so it is cheap enough to
+# build in the background before the window is asked for. remote_title maps a
+# remote name to the title shown; app_data is the AppStream data of a remote
+# ref, if any.
+def ref_info_text(ref, remote_title, app_data=None):
+    lines = [(_("Real Name: "), ref.get_name()),
+             (_("Arch: "), ref.get_arch()),
+             (_("Branch: "), ref.get_branch()),
+             (_("Collection ID: "), value_or_none(ref.get_collection_id())),
+             (_("Commit: "), value_or_none(ref.get_commit()))]
+
+    if isinstance(ref, Flatpak.InstalledRef):
+        sub_paths = ref.get_subpaths()
+        origin = ref.get_origin()
+        lines += [(_("Is Installed: "), _("Yes")),
+                  (_("License: "), value_or_none(ref.get_appdata_license())),
+                  (_("Name: "), value_or_none(ref.get_appdata_name())),
+                  (_("Summary: "), value_or_none(ref.get_appdata_summary())),
+                  (_("Version: "), value_or_none(ref.get_appdata_version())),
+                  (_("Deploy Dir: "), value_or_none(ref.get_deploy_dir())),
+                  (_("EOL Reason: "), value_or_none(ref.get_eol())),
+                  (_("EOL Rebased: "), value_or_none(ref.get_eol_rebase())),
+                  (_("Installed Size: "), format_size(ref.get_installed_size())),
+                  (_("Is Current: "), yes_or_no(ref.get_is_current())),
+                  (_("Latest Commit: "), value_or_none(ref.get_latest_commit())),
+                  (_("Origin: "), value_or_none(origin and remote_title(origin))),
+                  (_("Subpaths: "), value_or_none(", ".join(sub_paths or [])))]
+    else:
+        remote = ref.get_remote_name()
+        lines.append((_("Is Installed: "), _("No")))
+        if app_data is not None:
+            lines += [(_("License: "), value_or_none(app_data.License)),
+                      (_("Name: "), value_or_none(app_data.Name)),
+                      (_("Summary: "), value_or_none(app_data.Summary))]
+        lines += [(_("Download Size: "), format_size(ref.get_download_size())),
+                  (_("EOL Reason: "), value_or_none(ref.get_eol())),
+                  (_("EOL Rebased: "), value_or_none(ref.get_eol_rebase())),
+                  (_("Installed Size: "), format_size(ref.get_installed_size())),
+                  (_("Remote Name: "), value_or_none(remote and remote_title(remote)))]
+
+    return "".join(label + value + "\n" for label, value in lines)
@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+#
+# Pardus Flatpak GUI remote lister module
+# Copyright (C) 2020 Erdem Ersoy
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+from pardusflatpakgui.installations import ThreadInstallations
+from pardusflatpakgui.refcatalog import RefCatalog
+from pardusflatpakgui.tracing import tracer
+
+import concurrent.futures
+import gi
+gi.require_version('Flatpak', '1.0')
+gi.require_version('GLib', '2.0')
+gi.require_version('Gio', '2.0')
+from gi.repository import Flatpak, GLib, Gio
+
+
+class RemoteListing(object):
+    def __init__(self, remote, refs, error):
+        self.Remote = remote
+        self.RemoteName = remote.get_name()
+        self.Priority = remote.get_prio()
+        self.Refs = refs
+        self.Error = error
+
+
+# Lists the refs of every enabled remote concurrently on a bounded thread
+# pool, so the total time is close to the slowest remote rather than the sum.
+class RemoteLister(object):
+    def __init__(self, flatpak_installation, max_workers):
+        self.FlatpakInstallation = flatpak_installation
+        self.MaxWorkers = max(max_workers, 1)
+        self.ThreadInstallations = ThreadInstallations(flatpak_installation)
+
+    def list_remotes(self):
+        return [remote for remote in self.FlatpakInstallation.list_remotes()
+                if not remote.get_disabled() and not remote.get_noenumerate()]
+
+    def list_remote(self, remote, cached_only, appstream_arch):
+        installation = self.ThreadInstallations.get()
+        span = tracer.span("listing remote", remote=remote.get_name(), cached=cached_only)
+        try:
+            if cached_only:
+                refs = installation.list_remote_refs_sync_full(
+                    remote.get_name(), Flatpak.QueryFlags.ONLY_CACHED, Gio.Cancellable.new())
+            else:
+                refs = installation.list_remote_refs_sync(
+                    remote.get_name(), Gio.Cancellable.new())
+        except GLib.Error as error:
+            span.end(error=error.message)
+            return RemoteListing(remote, None, error)
+        span.end(refs=len(refs))
+
+        if appstream_arch is not None:
+            try:
+                with tracer.span("updating AppStream data", remote=remote.get_name()):
+                    installation.update_appstream_sync(remote.get_name(), appstream_arch,
+                                                       Gio.Cancellable.new())
+            except GLib.Error:
+                # The refs are still fresh; old AppStream data is kept.
+                pass
+        return RemoteListing(remote, refs, None)
+
+    # Yields a RemoteListing for every remote as soon as it is listed; a slow
+    # or unreachable remote doesn't hold back the others. When appstream_arch
+    # is given, the AppStream data of the remote for that arch is updated too.
+    def iterate_listings(self, remotes, cached_only=False, appstream_arch=None):
+        if not remotes:
+            return None
+
+        with concurrent.futures.ThreadPoolExecutor(
+                max_workers=min(self.MaxWorkers, len(remotes)),
+                thread_name_prefix="remote-lister") as executor:
+            futures = [executor.submit(self.list_remote, remote, cached_only, appstream_arch)
+                       for remote in remotes]
+            for future in concurrent.futures.as_completed(futures):
+                yield future.result()
+
+    def list_all(self, remotes, cached_only=False):
+        return list(self.iterate_listings(remotes, cached_only))
+
+    # Returns the catalog of the installed refs and the refs of the given
+    # remotes, and the remotes that couldn't be listed.
+    def build_catalog(self, installed_refs, remotes, cached_only=False):
+        catalog = RefCatalog(installed_refs)
+        failed_remotes = []
+        for listing in self.iterate_listings(remotes, cached_only):
+            if listing.Error is None:
+                catalog.set_remote_refs(listing.RemoteName, listing.Refs, listing.Priority)
+            else:
+                failed_remotes.append(listing.Remote)
+        return catalog, failed_remotes
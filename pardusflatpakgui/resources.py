@@ -0,0 +1,46 @@
+#!/usr/bin/env python3
+#
+# Pardus Flatpak GUI resources module
+# Copyright (C) 2020 Erdem Ersoy
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+# GUI files are compiled into one GResource bundle at build time (see
+# ui/pardus-flatpak-gui.gresource.xml) and registered once, on the first
+# import of this module, so building a window reads nothing from disk.
+# PARDUS_FLATPAK_GUI_RESOURCES names another bundle, e.g. one compiled in the
+# source tree.
+
+from pardusflatpakgui.i18n import _
+
+import os
+import gi
+gi.require_version('GLib', '2.0')
+gi.require_version('Gio', '2.0')
+from gi.repository import GLib, Gio
+
+ResourceFile = os.environ.get("PARDUS_FLATPAK_GUI_RESOURCES",
+                              "/usr/share/pardus/pardus-flatpak-gui/pardus-flatpak-gui.gresource")
+ResourcePrefix = "/tr/org/pardus/pardus-flatpak-gui/ui/"
+
+
+def ui_resource(file_name):
+    return ResourcePrefix + file_name
+
+
+try:
+    Gio.resources_register(Gio.Resource.load(ResourceFile))
+except GLib.GError:
+    print(_("Error reading GUI resources file: ") + ResourceFile)
+    raise
@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+#
+# Pardus Flatpak GUI search module
+# Copyright (C) 2020 Erdem Ersoy
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import array
+
+
+def normalize_text(text):
+    if not text:
+        return ""
+    return text.casefold()
+
+
+# Searchable text of a row, normalized once when the row is added. The
+# fields are joined with a newline, which a query from the search entry
+# never contains, so a match can't span two fields.
+def search_text(*fields):
+    return "\n".join(normalize_text(field) for field in fields)
+
+
+def text_matches(query, text):
+    return not query or query in text
+
+
+def trigrams(text):
+    return {text[index:index + 3] for index in range(len(text) - 2)}
+
+
+# In-memory trigram index over the normalized searchable text of every row.
+# Posting lists are compact arrays of row ids; a query scans only the ids of
+# its rarest trigram and checks them with a substring test. When a query
+# contains the previous query (e.g. one more character was typed), only the
+# previous result set is narrowed. A row added again keeps its id and only
+# the postings of its changed trigrams are touched; ids of removed rows are
+# reused, so the index doesn't grow with updates.
+class SearchIndex(object):
+    def __init__(self):
+        self.Keys = []
+        self.Texts = []
+        self.Ids = {}
+        self.FreeIds = []
+        self.Postings = {}
+
+        self.LastQuery = ""
+        self.LastResultIds = None
+
+    def add(self, key, *fields):
+        text = search_text(*fields)
+        key_id = self.Ids.get(key)
+        if key_id is None:
+            if self.FreeIds:
+                key_id = self.FreeIds.pop()
+            else:
+                key_id = len(self.Keys)
+                self.Keys.append(None)
+                self.Texts.append("")
+            self.Keys[key_id] = key
+            self.Ids[key] = key_id
+        elif self.Texts[key_id] == text:
+            return None
+
+        old_trigrams = trigrams(self.Texts[key_id])
+        new_trigrams = trigrams(text)
+        self.remove_postings(key_id, old_trigrams - new_trigrams)
+        postings = self.Postings
+        for trigram in new_trigrams - old_trigrams:
+            posting = postings.get(trigram)
+            if posting is None:
+                posting = postings[trigram] = array.array("L")
+            posting.append(key_id)
+        self.Texts[key_id] = text
+
+        if self.LastResultIds is not None:
+            if self.LastQuery in text:
+                self.LastResultIds.add(key_id)
+            else:
+                self.LastResultIds.discard(key_id)
+
+    def remove(self, key):
+        key_id = self.Ids.pop(key, None)
+        if key_id is None:
+            return None
+
+        self.remove_postings(key_id, trigrams(self.Texts[key_id]))
+        self.Keys[key_id] = None
+        self.Texts[key_id] = ""
+        self.FreeIds.append(key_id)
+        if self.LastResultIds is not None:
+            self.LastResultIds.discard(key_id)
+
+    def remove_postings(self, key_id, removed_trigrams):
+        postings = self.Postings
+        for trigram in removed_trigrams:
+            posting = postings[trigram]
+            posting.remove(key_id)
+            if not posting:
+                del postings[trigram]
+
+    # Runs a query and returns the number of matching keys. matches() then
+    # tests keys against the result of the last query.
+    def search(self, query):
+        if not query:
+            self.LastQuery = ""
+            self.LastResultIds = None
+            return len(self.Ids)
+
+        if self.LastResultIds is not None and self.LastQuery in query:
+            candidate_ids = self.LastResultIds
+        elif len(query) >= 3:
+            postings = []
+            for trigram in trigrams(query):
+                posting = self.Postings.get(trigram)
+                if posting is None:
+                    postings = [()]
+                    break
+                postings.append(posting)
+            candidate_ids = min(postings, key=len)
+        else:
+            candidate_ids = range(len(self.Keys))
+
+        texts = self.Texts
+        self.LastQuery = query
+        self.LastResultIds = {key_id for key_id in candidate_ids if query in texts[key_id]}
+        return len(self.LastResultIds)
+
+    def matches(self, key):
+        return self.LastResultIds is None or self.Ids.get(key) in self.LastResultIds
+
+    # 0 for an exact match of a field, 1 for a prefix match and 2 otherwise.
+    def rank(self, key, query):
+        key_id = self.Ids.get(key)
+        if key_id is None or not query:
+            return 0
+
+        fields = self.Texts[key_id].split("\n")
+        if query in fields:
+            return 0
+        for field in fields:
+            if field.startswith(query):
+                return 1
+        return 2
+
+    def __len__(self):
+        return len(self.Ids)
@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+#
+# Pardus Flatpak GUI settings module
+# Copyright (C) 2020 Erdem Ersoy
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import configparser
+import os
+
+
+# Settings are read from $XDG_CONFIG_HOME/pardus-flatpak-gui/settings.conf,
+# section [General]. Missing or invalid values fall back to the defaults.
+class Settings(object):
+    Defaults = {
+        "LogMaxLines": "1000",
+        "MaxRunningJobs": "1",
+        "UpdateParallelism": "1",
+        "RemoteListingThreads": "4",
+        "UpdateCheckInterval": "3600",
+        "UpdatePrefetch": "0",
+    }
+
+    def __init__(self, file_name=None):
+        if file_name is None:
+            config_dir = os.environ.get("XDG_CONFIG_HOME",
+                                        os.path.expanduser("~/.config"))
+            file_name = os.path.join(config_dir, "pardus-flatpak-gui", "settings.conf")
+        self.FileName = file_name
+
+        self.Parser = configparser.ConfigParser()
+        self.Parser.optionxform = str
+        self.Parser.read_dict({"General": Settings.Defaults})
+        try:
+            self.Parser.read(self.FileName)
+        except configparser.Error:
+            print("Error reading settings file: " + self.FileName)
+
+    def get_int(self, key):
+        try:
+            return self.Parser.getint("General", key)
+        except ValueError:
+            return int(Settings.Defaults[key])
+
+    def get_bool(self, key):
+        try:
+            return self.Parser.getboolean("General", key)
+        except ValueError:
+            return Settings.Defaults[key] in ("1", "yes", "true", "on")
+
+    def get_string(self, key):
+        return self.Parser.get("General", key)
+
+
+settings = Settings()
@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+#
+# Pardus Flatpak GUI tracing module
+# Copyright (C) 2020 Erdem Ersoy
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+# Opt-in tracing: set PARDUS_FLATPAK_GUI_TRACE to a file name (or pass
+# --trace FILE) and spans of every thread are written there at exit as a
+# Chrome trace, which chrome://tracing and ui.perfetto.dev open. When it is
+# off, span() returns a shared no-op object and @traced leaves functions as
+# they are, so the instrumentation can stay in.
+
+import atexit
+import functools
+import json
+import os
+import threading
+import time
+
+
+class NullSpan(object):
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exception_type, exception, traceback):
+        return False
+
+    def end(self, **args):
+        pass
+
+
+class Span(object):
+    def __init__(self, tracer, name, args):
+        self.Tracer = tracer
+        self.Name = name
+        self.Args = args
+        self.StartTime = time.perf_counter()
+
+    def __enter__(self):
+        self.StartTime = time.perf_counter()
+        return self
+
+    def __exit__(self, exception_type, exception, traceback):
+        if exception_type is not None:
+            self.Args["error"] = exception_type.__name__
+        self.end()
+        return False
+
+    def end(self, **args):
+        self.Args.update(args)
+        self.Tracer.complete(self.Name, self.StartTime, self.Args)
+
+
+class Tracer(object):
+    def __init__(self, file_name):
+        self.FileName = file_name
+        self.Enabled = bool(file_name)
+        self.StartTime = time.perf_counter()
+        self.Events = []
+        self.ThreadIds = set()
+        if self.Enabled:
+            atexit.register(self.write)
+
+    # Use as a context manager, or call end() on it later from the same
+    # thread.
+    def span(self, name, **args):
+        if not self.Enabled:
+            return NULL_SPAN
+        return Span(self, name, args)
+
+    def instant(self, name, **args):
+        if self.Enabled:
+            self.add_event({"name": name, "ph": "i", "s": "t",
+                            "ts": self.timestamp(time.perf_counter()), "args": args})
+
+    def complete(self, name, start_time, args=None):
+        end_time = time.perf_counter()
+        self.add_event({"name": name, "ph": "X", "ts": self.timestamp(start_time),
+                        "dur": (end_time - start_time) * 1000000, "args": args or {}})
+
+    def timestamp(self, perf_counter_time):
+        return (perf_counter_time - self.StartTime) * 1000000
+
+    # list.append() is atomic, so threads add events without a lock.
+    def add_event(self, event):
+        thread = threading.current_thread()
+        event["pid"] = os.getpid()
+        event["tid"] = thread.ident
+        if thread.ident not in self.ThreadIds:
+            self.ThreadIds.add(thread.ident)
+            self.Events.append({"name": "thread_name", "ph": "M", "pid": event["pid"],
+                                "tid": thread.ident, "args": {"name": thread.name}})
+        self.Events.append(event)
+
+    def write(self):
+        try:
+            with open(self.FileName, "w") as trace_file:
+                json.dump({"traceEvents": list(self.Events), "displayTimeUnit": "ms"},
+                          trace_file)
+        except OSError as error:
+            print("Error writing trace file " + self.FileName + ": " + str(error))
+
+
+NULL_SPAN = NullSpan()
+tracer = Tracer(os.environ.get("PARDUS_FLATPAK_GUI_TRACE"))
+
+
+# Traces every call of a function as a span named after it.
+def traced(function):
+    if not tracer.Enabled:
+        return function
+
+    @functools.wraps(function)
+    def traced_function(*args, **kwargs):
+        with tracer.span(function.__qualname__):
+            return function(*args, **kwargs)
+    return traced_function
+
+
+# Traces the phases of a Flatpak transaction about to run: resolving, up to
+# its first operation (including the confirmation of its plan), every
+# operation, and the status changes of their progress (e.g. downloading,
+# installing).
+class TransactionTrace(object):
+    def __init__(self, transaction, name):
+        self.Name = name
+        self.ResolveSpan = tracer.span(name + ": resolve")
+        self.OperationSpans = {}
+        self.Statuses = {}
+        transaction.connect("new-operation", self.on_new_operation)
+        transaction.connect("operation-done", self.on_operation_done)
+
+    def on_new_operation(self, transaction, operation, progress):
+        if self.ResolveSpan is not None:
+            self.ResolveSpan.end()
+            self.ResolveSpan = None
+
+        ref = operation.get_ref()
+        self.OperationSpans[ref] = tracer.span(
+            self.Name + ": " + operation.get_operation_type().value_nick, ref=ref)
+        progress.connect("changed", self.on_progress_changed, ref)
+
+    def on_progress_changed(self, progress, ref):
+        status = progress.get_status()
+        if status and self.Statuses.get(ref) != status:
+            self.Statuses[ref] = status
+            tracer.instant(status, ref=ref)
+
+    def on_operation_done(self, transaction, operation, commit, result):
+        span = self.OperationSpans.pop(operation.get_ref(), None)
+        if span is not None:
+            span.end()
+
+
+def trace_transaction(transaction, name):
+    if tracer.Enabled:
+        TransactionTrace(transaction, name)
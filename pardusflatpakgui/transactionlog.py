@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+#
+# Pardus Flatpak GUI transaction log module
+# Copyright (C) 2020 Erdem Ersoy
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import collections
+import threading
+import gi
+gi.require_version('GLib', '2.0')
+from gi.repository import GLib
+
+
+# Append-only log shown in an action window's text buffer. Lines may be
+# appended from any thread; they are inserted at the buffer end by at most
+# one flush per frame, and only the last MaxLines lines are kept.
+class TransactionLog(object):
+    FlushInterval = 16  # Milliseconds, about one frame at 60 Hz
+
+    def __init__(self, text_buffer, max_lines):
+        self.TextBuffer = text_buffer
+        self.MaxLines = max(max_lines, 1)
+        self.Empty = True
+
+        self.Lock = threading.Lock()
+        self.PendingLines = collections.deque(maxlen=self.MaxLines)
+        self.FlushPending = False
+
+        self.TextBuffer.set_text("", -1)
+
+    def append(self, line):
+        with self.Lock:
+            self.PendingLines.append(line)
+            if not self.FlushPending:
+                self.FlushPending = True
+                GLib.timeout_add(TransactionLog.FlushInterval, self.flush,
+                                 priority=GLib.PRIORITY_DEFAULT_IDLE)
+
+    def flush(self):
+        with self.Lock:
+            lines = list(self.PendingLines)
+            self.PendingLines.clear()
+            self.FlushPending = False
+
+        if not lines:
+            return False
+
+        text = "\n".join(lines)
+        if not self.Empty:
+            text = "\n" + text
+        self.TextBuffer.insert(self.TextBuffer.get_end_iter(), text, -1)
+        self.Empty = False
+
+        # Lines are counted by the buffer, as an entry (e.g. an error
+        # message) may have several.
+        line_count = self.TextBuffer.get_line_count()
+        if line_count > self.MaxLines:
+            line_iter = self.TextBuffer.get_iter_at_line(line_count - self.MaxLines)
+            self.TextBuffer.delete(self.TextBuffer.get_start_iter(), line_iter)
+        return False
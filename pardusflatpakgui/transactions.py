@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+#
+# Pardus Flatpak GUI transactions module
+# Copyright (C) 2020 Erdem Ersoy
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+from pardusflatpakgui.refcatalog import ref_key
+
+import gi
+gi.require_version('Flatpak', '1.0')
+gi.require_version('GLib', '2.0')
+from gi.repository import Flatpak, GLib
+
+# Transaction helpers shared by the action windows and the headless mode.
+# Nothing here imports Gtk.
+
+# Makes the transactions of an installation; the benchmarks replace it to run
+# the windows on their in-memory transactions.
+TransactionFactory = Flatpak.Transaction.new_for_installation
+
+
+def app_ref(real_name, arch, branch):
+    return "app/" + real_name + "/" + arch + "/" + branch
+
+
+def new_transaction(flatpak_installation, cancellable=None, no_deploy=False, no_pull=False):
+    transaction = TransactionFactory(flatpak_installation, cancellable)
+    transaction.set_default_arch(Flatpak.get_default_arch())
+    transaction.set_disable_dependencies(False)
+    # A pull without deploying keeps its objects for the deploy after it.
+    transaction.set_disable_prune(no_deploy)
+    transaction.set_disable_related(False)
+    transaction.set_disable_static_deltas(False)
+    transaction.set_no_deploy(no_deploy)
+    transaction.set_no_pull(no_pull)
+    return transaction
+
+
+# refs are (real name, arch, branch, remote) tuples.
+def install_transaction(flatpak_installation, refs, cancellable=None):
+    transaction = new_transaction(flatpak_installation, cancellable)
+    for real_name, arch, branch, remote in refs:
+        transaction.add_install(remote, app_ref(real_name, arch, branch), None)
+    return transaction
+
+
+# refs are (real name, arch, branch) tuples.
+def uninstall_transaction(flatpak_installation, refs, cancellable=None):
+    transaction = new_transaction(flatpak_installation, cancellable)
+    for real_name, arch, branch in refs:
+        transaction.add_uninstall(app_ref(real_name, arch, branch))
+    return transaction
+
+
+# refs_to_update are the installed refs from list_installed_refs_for_update().
+def update_transaction(flatpak_installation, refs_to_update, cancellable=None):
+    transaction = new_transaction(flatpak_installation, cancellable)
+    for ref_to_update in refs_to_update:
+        add_update(transaction, ref_to_update.format_ref())
+    return transaction
+
+
+def add_update(transaction, ref_str):
+    transaction.add_update(ref_str, None, None)
+
+
+# Only pulls the updates of the given refs (as strings), so a transaction
+# with no_pull deploys them later without downloading.
+def prefetch_transaction(flatpak_installation, ref_strs, cancellable=None):
+    transaction = new_transaction(flatpak_installation, cancellable, no_deploy=True)
+    for ref_str in ref_strs:
+        add_update(transaction, ref_str)
+    return transaction
+
+
+def install_from_file_transaction(flatpak_installation, file_contents_glib_bytes,
+                                  cancellable=None):
+    transaction = new_transaction(flatpak_installation, cancellable)
+    transaction.add_install_flatpakref(file_contents_glib_bytes)
+    return transaction
+
+
+# The metadata of the new commit in the remote decides the runtime an update
+# needs; the installed metadata is used when the catalog doesn't list it.
+def update_metadata(ref, catalog):
+    remote_ref = catalog.get_remote_ref(ref_key(ref))
+    if remote_ref is not None and remote_ref.get_metadata() is not None:
+        return remote_ref.get_metadata()
+    try:
+        return ref.load_metadata(None)
+    except GLib.Error:
+        return None
+
+
+# Returns the installed ref an operation installed or updated, or None.
+def operation_installed_ref(flatpak_installation, operation):
+    operation_ref = Flatpak.Ref.parse(operation.get_ref())
+    try:
+        return flatpak_installation.get_installed_ref(
+            operation_ref.get_kind(),
+            operation_ref.get_name(),
+            operation_ref.get_arch(),
+            operation_ref.get_branch(),
+            None)
+    except GLib.Error:
+        return None
@@ -0,0 +1,244 @@
+#!/usr/bin/env python3
+#
+# Pardus Flatpak GUI transaction statistics module
+# Copyright (C) 2020 Erdem Ersoy
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+from pardusflatpakgui.i18n import _
+from pardusflatpakgui.refinfo import format_size
+
+import json
+import os
+import threading
+import time
+
+
+def format_duration(seconds):
+    minutes, seconds = divmod(int(seconds), 60)
+    hours, minutes = divmod(minutes, 60)
+    if hours:
+        return f"{hours}:{minutes:02}:{seconds:02}"
+    return f"{minutes}:{seconds:02}"
+
+
+class OperationStats(object):
+    def __init__(self, operation, weight):
+        self.Ref = operation.get_ref()
+        self.OperationType = operation.get_operation_type().value_nick
+        self.Remote = operation.get_remote()
+        self.DownloadSize = operation.get_download_size()
+        self.Weight = weight
+        self.StartTime = None
+        self.EndTime = None
+        self.BytesTransferred = 0
+        self.Fraction = 0.0
+        self.Error = None
+
+    def to_dict(self):
+        duration = None
+        if self.StartTime is not None and self.EndTime is not None:
+            duration = self.EndTime - self.StartTime
+        return {"ref": self.Ref,
+                "type": self.OperationType,
+                "remote": self.Remote,
+                "download_size": self.DownloadSize,
+                "bytes_transferred": self.BytesTransferred,
+                "seconds": duration,
+                "error": self.Error}
+
+
+# Follows the operations of a Flatpak transaction while it runs: bytes
+# transferred, the transfer rate, the duration of every operation and the
+# overall progress, in which every operation weighs its download size (or the
+# same, when nothing is downloaded). The progress bar of an action window is
+# driven through its ProgressSink, with these numbers as its text; when the
+# transaction finishes, a summary record is appended to
+# $XDG_DATA_HOME/pardus-flatpak-gui/transactions.jsonl.
+class TransactionStats(object):
+    ProgressUpdateFrequency = 200  # Milliseconds, of Flatpak.TransactionProgress
+    RateSmoothing = 0.3  # Weight of the latest sample in the transfer rate
+    RateSampleInterval = 0.5  # Seconds
+
+    def __init__(self, transaction, name, progress_sink=None, file_name=None):
+        if file_name is None:
+            data_dir = os.environ.get("XDG_DATA_HOME",
+                                      os.path.expanduser("~/.local/share"))
+            file_name = os.path.join(data_dir, "pardus-flatpak-gui", "transactions.jsonl")
+        self.FileName = file_name
+
+        self.Name = name
+        self.ProgressSink = progress_sink
+        self.Lock = threading.Lock()
+        self.StartTime = time.time()
+        self.StartCounter = time.perf_counter()
+        self.Phases = {}
+        self.Operations = {}
+        self.CurrentOperation = None
+        self.TotalWeight = 0
+        self.TotalDownloadSize = 0
+        self.DoneWeight = 0
+        self.DoneBytes = 0
+
+        self.Rate = None
+        self.RateSampleTime = None
+        self.RateSampleBytes = 0
+
+        # operation-error isn't connected: the last handler of a signal
+        # returns its value, which must be the window's. Windows call
+        # operation_failed() from their handler instead.
+        transaction.connect("new-operation", self.on_new_operation)
+        transaction.connect("operation-done", self.on_operation_done)
+
+    # Time taken by a step before the transaction runs, e.g. parallel pulls.
+    def add_phase(self, name, seconds):
+        self.Phases[name] = seconds
+
+    # The operations are only known once the transaction is resolved, i.e.
+    # at its first new operation.
+    def plan(self, transaction):
+        operations = transaction.get_operations()
+        download_sizes = [operation.get_download_size() for operation in operations]
+        self.TotalDownloadSize = sum(download_sizes)
+        for operation, download_size in zip(operations, download_sizes):
+            weight = download_size if self.TotalDownloadSize > 0 else 1
+            self.Operations[operation.get_ref()] = OperationStats(operation, weight)
+            self.TotalWeight += weight
+
+    def on_new_operation(self, transaction, operation, progress):
+        with self.Lock:
+            if not self.Operations:
+                self.plan(transaction)
+            operation_stats = self.Operations.get(operation.get_ref())
+            if operation_stats is None:
+                operation_stats = OperationStats(operation, 0)
+                self.Operations[operation_stats.Ref] = operation_stats
+            operation_stats.StartTime = time.perf_counter()
+            self.CurrentOperation = operation_stats
+
+        progress.set_update_frequency(TransactionStats.ProgressUpdateFrequency)
+        progress.connect("changed", self.on_progress_changed, operation_stats)
+
+    def on_progress_changed(self, progress, operation_stats):
+        with self.Lock:
+            if operation_stats is not self.CurrentOperation:
+                return None
+            operation_stats.Fraction = progress.get_progress() / 100.0
+            operation_stats.BytesTransferred = progress.get_bytes_transferred()
+            self.sample_rate()
+        self.update_progress_sink()
+
+    def sample_rate(self):
+        now = time.perf_counter()
+        transferred = self.bytes_transferred()
+        if self.RateSampleTime is None:
+            self.RateSampleTime = now
+            self.RateSampleBytes = transferred
+            return None
+        interval = now - self.RateSampleTime
+        if interval < TransactionStats.RateSampleInterval:
+            return None
+
+        rate = (transferred - self.RateSampleBytes) / interval
+        if self.Rate is None:
+            self.Rate = rate
+        else:
+            self.Rate += TransactionStats.RateSmoothing * (rate - self.Rate)
+        self.RateSampleTime = now
+        self.RateSampleBytes = transferred
+
+    def on_operation_done(self, transaction, operation, commit, result):
+        self.finish_operation(operation, None)
+
+    def operation_failed(self, operation, error):
+        self.finish_operation(operation, error.message)
+
+    def finish_operation(self, operation, error_message):
+        with self.Lock:
+            operation_stats = self.Operations.get(operation.get_ref())
+            if operation_stats is None or operation_stats.EndTime is not None:
+                return None
+            operation_stats.EndTime = time.perf_counter()
+            if operation_stats.StartTime is None:
+                operation_stats.StartTime = operation_stats.EndTime
+            operation_stats.Error = error_message
+            operation_stats.Fraction = 1.0
+            self.DoneWeight += operation_stats.Weight
+            self.DoneBytes += operation_stats.BytesTransferred
+            if operation_stats is self.CurrentOperation:
+                self.CurrentOperation = None
+        self.update_progress_sink()
+
+    def bytes_transferred(self):
+        if self.CurrentOperation is None:
+            return self.DoneBytes
+        return self.DoneBytes + self.CurrentOperation.BytesTransferred
+
+    def overall_fraction(self):
+        if self.TotalWeight == 0:
+            return 0.0
+        weight = self.DoneWeight
+        if self.CurrentOperation is not None:
+            weight += self.CurrentOperation.Weight * self.CurrentOperation.Fraction
+        return min(weight / self.TotalWeight, 1.0)
+
+    def progress_text(self):
+        transferred = self.bytes_transferred()
+        if transferred == 0:
+            return f"{self.overall_fraction():.0%}"
+
+        text = format_size(transferred)
+        if self.TotalDownloadSize > 0:
+            text = text + _(" of ") + format_size(self.TotalDownloadSize)
+        if self.Rate:
+            text = text + ", " + format_size(self.Rate) + _("/s")
+            remaining = self.TotalDownloadSize - transferred
+            if remaining > 0:
+                text = text + ", " + format_duration(remaining / self.Rate) + _(" left")
+        return text
+
+    def update_progress_sink(self):
+        if self.ProgressSink is None:
+            return None
+        with self.Lock:
+            fraction = self.overall_fraction()
+            text = self.progress_text()
+        self.ProgressSink.set_fraction(fraction, text)
+
+    def summary(self, result):
+        with self.Lock:
+            duration = time.perf_counter() - self.StartCounter
+            transferred = self.bytes_transferred()
+            operations = [operation_stats.to_dict()
+                          for operation_stats in self.Operations.values()]
+        return {"transaction": self.Name,
+                "time": time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(self.StartTime)),
+                "result": result,
+                "seconds": duration,
+                "phases": self.Phases,
+                "download_size": self.TotalDownloadSize,
+                "bytes_transferred": transferred,
+                "bytes_per_second": transferred / duration if duration > 0 else 0,
+                "operations": operations}
+
+    # result is e.g. "finished", "failed" or "canceled". Returns the summary.
+    def finish(self, result):
+        summary = self.summary(result)
+        try:
+            os.makedirs(os.path.dirname(self.FileName), exist_ok=True)
+            with open(self.FileName, "a") as summary_file:
+                summary_file.write(json.dumps(summary) + "\n")
+        except OSError:
+            print("Error writing transaction summary file: " + self.FileName)
+        return summary
@@ -16,97 +16,69 @@
 # You should have received a copy of the GNU General Public License
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
-import gettext
-import locale
-import threading
+from pardusflatpakgui.actionwindow import ActionWindow
+from pardusflatpakgui.dispatcher import main_loop_dispatcher
+from pardusflatpakgui.i18n import _
+from pardusflatpakgui.jobqueue import job_queue
+from pardusflatpakgui.parallelpull import ParallelPuller, group_refs
+from pardusflatpakgui.profiling import startup_timer
+from pardusflatpakgui.progresssink import ProgressSink
+from pardusflatpakgui.refcatalog import ref_key
+from pardusflatpakgui.settings import settings
+from pardusflatpakgui.tracing import trace_transaction, traced
+from pardusflatpakgui.transactionlog import TransactionLog
+from pardusflatpakgui.transactions import add_update, operation_installed_ref, \
+    update_metadata, update_transaction
+from pardusflatpakgui.transactionstats import TransactionStats
+
+import sys
 import time
 import gi
-gi.require_version('Gtk', '3.0')
 gi.require_version('GLib', '2.0')
 gi.require_version('Flatpak', '1.0')
 gi.require_version('Gio', '2.0')
-from gi.repository import Gtk, GLib, Flatpak, Gio
-
-locale.setlocale(locale.LC_ALL, "")
-gettext.bindtextdomain("pardus-flatpak-gui", "/usr/share/locale/")
-gettext.textdomain("pardus-flatpak-gui")
-_ = gettext.gettext
-gettext.install("pardus-flatpak-gui", "/usr/share/locale/")
+from gi.repository import GLib, Flatpak, Gio
 
 
 class UpdateAllWindow(object):
-    at_updating = False
-
-    def __init__(self, application, flatpak_installation, tree_model, show_button):
+    def __init__(self, application, flatpak_installation, main_window, show_button):
         self.Application = application
 
+        # Updating starts from the refs of the last update check, so the
+        # window doesn't wait for every remote; a new check runs meanwhile.
         self.FlatpakInstallation = flatpak_installation
-        self.RefsToUpdate = flatpak_installation.list_installed_refs_for_update(Gio.Cancellable.new())
-        self.InstalledRefsList = self.FlatpakInstallation.list_installed_refs()
-        self.FlatHubRefsList = self.FlatpakInstallation.list_remote_refs_sync(
-            "flathub", Gio.Cancellable.new())
-        self.NonInstalledRefsList = []
-
-        for item in self.FlatHubRefsList:
-            self.NonInstalledRefsList.append(item)
-            for item_2 in self.InstalledRefsList:
-                if item.get_name() == item_2.get_name() and \
-                        item.get_arch() == item_2.get_arch() and \
-                        item.get_branch() == item_2.get_branch():
-                    if len(self.NonInstalledRefsList) != 0:
-                        self.NonInstalledRefsList.pop(len(self.NonInstalledRefsList) - 1)
-                    else:
-                        self.NonInstalledRefsList = []
-
-        self.FlatpakTransaction = \
-            Flatpak.Transaction.new_for_installation(
-                self.FlatpakInstallation,
-                Gio.Cancellable.new())
-        self.FlatpakTransaction.set_default_arch(Flatpak.get_default_arch())
-        self.FlatpakTransaction.set_disable_dependencies(False)
-        self.FlatpakTransaction.set_disable_prune(False)
-        self.FlatpakTransaction.set_disable_related(False)
-        self.FlatpakTransaction.set_disable_static_deltas(False)
-        self.FlatpakTransaction.set_no_deploy(False)
-        self.FlatpakTransaction.set_no_pull(False)
-        for ref_to_update in self.RefsToUpdate:
-            ref_str = ref_to_update.format_ref()
-            self.FlatpakTransaction.add_update(ref_str, None, None)
-
-        self.TreeModel = tree_model
-        self.HeaderBarShowButton = show_button
+        self.RefsToUpdate = main_window.UpdateChecker.cached_refs(main_window.RefCatalog)
+        main_window.UpdateChecker.cancel_prefetch()
+        self.Revalidation = main_window.UpdateChecker.check(prefetch=False)
 
-        try:
-            update_all_gui_file = "/usr/share/pardus/pardus-flatpak-gui/ui/actionwindow.glade"
-            update_all_builder = Gtk.Builder.new_from_file(update_all_gui_file)
-            update_all_builder.connect_signals(self)
-        except GLib.GError:
-            print(_("Error reading GUI file: ") + update_all_gui_file)
-            raise
+        self.FlatpakTransaction = update_transaction(
+            self.FlatpakInstallation, self.RefsToUpdate, Gio.Cancellable.new())
+
+        self.MainWindow = main_window
+        self.HeaderBarShowButton = show_button
 
         self.UpdateAllCancellation = Gio.Cancellable.new()
 
-        self.UpdateAllWindow = update_all_builder.get_object("ActionWindow")
-        self.UpdateAllWindow.set_application(application)
+        self.UpdateAllWindow = ActionWindow(application, self)
         self.UpdateAllWindow.set_title(_("Updating All"))
         self.UpdateAllWindow.show()
 
-        self.UpdateAllButtonCancel = update_all_builder.get_object("ActionButtonCancel")
+        self.UpdateAllButtonCancel = self.UpdateAllWindow.ActionButtonCancel
         self.UpdateAllButtonCancel.set_sensitive(True)
 
-        self.UpdateAllProgressBar = update_all_builder.get_object(
-                                        "ActionProgressBar")
+        self.UpdateAllProgressBar = self.UpdateAllWindow.ActionProgressBar
+        self.ProgressSink = ProgressSink(self.UpdateAllProgressBar)
         self.ProgressBarValue = int(
             self.UpdateAllProgressBar.get_fraction() * 100)
 
-        self.UpdateAllLabel = update_all_builder.get_object("ActionLabel")
-        self.UpdateAllTextBuffer = update_all_builder.get_object(
-                                       "ActionTextBuffer")
+        self.UpdateAllLabel = self.UpdateAllWindow.ActionLabel
+        self.UpdateAllTextBuffer = self.UpdateAllWindow.ActionTextBuffer
 
-        self.UpdateAllTextBuffer.set_text("\0", -1)
-        self.StatusText = _("Updating...")
-        self.UpdateAllLabel.set_text(self.StatusText)
-        self.UpdateAllTextBuffer.set_text(self.StatusText)
+        self.UpdateAllLog = TransactionLog(self.UpdateAllTextBuffer,
+                                           settings.get_int("LogMaxLines"))
+        status_text = _("Updating...")
+        self.UpdateAllLabel.set_text(status_text)
+        self.UpdateAllLog.append(status_text)
 
         self.handler_id = self.FlatpakTransaction.connect(
             "new-operation",
@@ -118,55 +90,106 @@ class UpdateAllWindow(object):
             "operation-error",
             self.update_all_progress_callback_error)
 
-        self.UpdateAllThread = threading.Thread(
-                           target=self.update_all,
-                           args=())
-        self.UpdateAllThread.start()
-        GLib.threads_init()
+        self.UpdateAllJob = job_queue.submit("update", [], self.update_all)
+        if not self.UpdateAllJob.Running:
+            self.UpdateAllLabel.set_text(_("Waiting for other operations..."))
 
+    @traced
     def update_all(self):
         handler_id_cancel = self.UpdateAllCancellation.connect(self.cancellation_callback, None)
+        # Refs the new check found are added when it is done by now; with
+        # nothing cached, it is waited for.
+        if not self.RefsToUpdate or self.Revalidation.done():
+            self.add_revalidated_refs()
+
+        # Updates prefetched in the background are only deployed. The time
+        # of both kinds is in the transaction summaries, under their names.
+        start_time = time.perf_counter()
+        prefetched = self.MainWindow.UpdateChecker.is_prefetched(self.RefsToUpdate)
+        transaction_name = "update (deploy only)" if prefetched else "update"
+        trace_transaction(self.FlatpakTransaction, transaction_name)
+        self.TransactionStats = TransactionStats(self.FlatpakTransaction, transaction_name,
+                                                 self.ProgressSink)
+
+        parallelism = settings.get_int("UpdateParallelism")
+        if prefetched:
+            self.FlatpakTransaction.set_no_pull(True)
+        elif parallelism > 1:
+            groups = group_refs([(ref.format_ref(),
+                                  update_metadata(ref, self.MainWindow.RefCatalog))
+                                 for ref in self.RefsToUpdate])
+            if len(groups) > 1:
+                self.pull_groups(groups, parallelism)
+                # Everything is pulled, so the transaction only deploys.
+                self.FlatpakTransaction.set_no_pull(True)
+        pull_time = time.perf_counter() - start_time
+        self.TransactionStats.add_phase("parallel pull", pull_time)
+
         try:
             self.FlatpakTransaction.run(self.UpdateAllCancellation)
         except GLib.Error:
             status_text = _("Error at updating!")
-            self.StatusText = self.StatusText + "\n" + status_text
-            GLib.idle_add(self.UpdateAllLabel.set_text,
-                          status_text,
-                          priority=GLib.PRIORITY_DEFAULT)
-            GLib.idle_add(self.UpdateAllTextBuffer.set_text,
-                          self.StatusText,
-                          priority=GLib.PRIORITY_DEFAULT)
+            main_loop_dispatcher.post(self.UpdateAllLabel.set_text, status_text)
+            self.UpdateAllLog.append(status_text)
+            self.TransactionStats.finish(
+                "canceled" if self.UpdateAllCancellation.is_cancelled() else "failed")
             self.disconnect_handlers(handler_id_cancel)
-            UpdateAllWindow.at_updating = False
+            main_loop_dispatcher.post(self.finish_updating)
             return None
         else:
             status_text = _("Updating completed!")
-            self.StatusText = self.StatusText + "\n" + status_text
-            GLib.idle_add(self.UpdateAllLabel.set_text,
-                          status_text,
-                          priority=GLib.PRIORITY_DEFAULT)
-            GLib.idle_add(self.UpdateAllTextBuffer.set_text,
-                          self.StatusText,
-                          priority=GLib.PRIORITY_DEFAULT)
-            time.sleep(0.2)
+            main_loop_dispatcher.post(self.UpdateAllLabel.set_text, status_text)
+            self.UpdateAllLog.append(status_text)
+            self.TransactionStats.finish("finished")
         self.disconnect_handlers(handler_id_cancel)
-        GLib.idle_add(self.UpdateAllButtonCancel.set_sensitive,
-                      False,
-                      priority=GLib.PRIORITY_DEFAULT)
-        time.sleep(0.5)
+        main_loop_dispatcher.post(self.UpdateAllButtonCancel.set_sensitive, False)
+        main_loop_dispatcher.post(self.finish_updating)
 
-        UpdateAllWindow.at_updating = False
+        if startup_timer.Enabled:
+            print("update all: pull: {:.3f} s, total: {:.3f} s".format(
+                pull_time, time.perf_counter() - start_time), file=sys.stderr)
 
-        if self.HeaderBarShowButton.get_active():
-            GLib.idle_add(self.HeaderBarShowButton.set_active,
-                          False,
-                          priority=GLib.PRIORITY_DEFAULT)
-            time.sleep(0.2)
+    def add_revalidated_refs(self):
+        ref_strs = self.Revalidation.result()
+        if ref_strs is None:
+            return None
 
-            GLib.idle_add(self.HeaderBarShowButton.set_active,
-                          True,
-                          priority=GLib.PRIORITY_DEFAULT)
+        known_ref_strs = {ref.format_ref() for ref in self.RefsToUpdate}
+        catalog = self.MainWindow.RefCatalog
+        for ref_str in ref_strs:
+            installed_ref = catalog.InstalledRefs.get(ref_key(Flatpak.Ref.parse(ref_str)))
+            if ref_str not in known_ref_strs and installed_ref is not None:
+                self.RefsToUpdate.append(installed_ref)
+                add_update(self.FlatpakTransaction, ref_str)
+
+    # Pulls groups of updates that don't share dependencies concurrently.
+    # A group that fails to pull fails again at deploying and is reported by
+    # the operation-error handler.
+    def pull_groups(self, groups, parallelism):
+        status_text = _("Downloading updates...")
+        main_loop_dispatcher.post(self.UpdateAllLabel.set_text, status_text)
+        self.UpdateAllLog.append(status_text)
+
+        puller = ParallelPuller(self.FlatpakInstallation, parallelism)
+        pulled_group_count = 0
+        for group, error in puller.iterate_pulls(groups, add_update,
+                                                 self.UpdateAllCancellation):
+            pulled_group_count += 1
+            for ref_str in group:
+                if error is None:
+                    status_text = _("Downloaded: ") + Flatpak.Ref.parse(ref_str).get_name()
+                else:
+                    status_text = _("Not downloaded: ") + Flatpak.Ref.parse(ref_str).get_name()
+                self.UpdateAllLog.append(status_text)
+            self.ProgressSink.set_fraction(pulled_group_count / len(groups))
+
+    def finish_updating(self):
+        self.MainWindow.UpdatingAll = False
+        self.MainWindow.UpdateChecker.check()
+
+        # Installed-only view hides non-installed rows again.
+        if self.HeaderBarShowButton.get_active():
+            self.MainWindow.start_filter_pass()
 
     def update_all_progress_callback(self, transaction, operation, progress):
         ref_to_update = Flatpak.Ref.parse(operation.get_ref())
@@ -175,117 +198,42 @@ class UpdateAllWindow(object):
 
         if operation_type == Flatpak.TransactionOperationType.UPDATE:
             status_text = _("Updating: ") + ref_to_update_real_name
-            self.StatusText = self.StatusText + "\n" + status_text
-            GLib.idle_add(self.UpdateAllLabel.set_text,
-                          status_text,
-                          priority=GLib.PRIORITY_DEFAULT)
-            GLib.idle_add(self.UpdateAllTextBuffer.set_text,
-                          self.StatusText,
-                          priority=GLib.PRIORITY_DEFAULT)
+            main_loop_dispatcher.post(self.UpdateAllLabel.set_text, status_text)
+            self.UpdateAllLog.append(status_text)
         elif operation_type == Flatpak.TransactionOperationType.INSTALL:
             status_text = _("Installing: ") + ref_to_update_real_name
-            self.StatusText = self.StatusText + "\n" + status_text
-            GLib.idle_add(self.UpdateAllLabel.set_text,
-                          status_text,
-                          priority=GLib.PRIORITY_DEFAULT)
-            GLib.idle_add(self.UpdateAllTextBuffer.set_text,
-                          self.StatusText,
-                          priority=GLib.PRIORITY_DEFAULT)
-
-        self.TransactionProgress = progress  # FIXME: Fix PyCharm warning
-        self.TransactionProgress.set_update_frequency(200)
-        self.handler_id_progress = self.TransactionProgress.connect(
-            "changed",
-            self.progress_bar_update)  # FIXME: Fix PyCharm warning
-
-    def update_all_progress_callback_done(self, transaction, operation, commit, result):  # FIXME: Test and review
-        self.TransactionProgress.disconnect(self.handler_id_progress)
-
-        operation_ref = Flatpak.Ref.parse(operation.get_ref())
-        operation_ref_real_name = operation_ref.get_name()
-        operation_ref_arch = operation_ref.get_arch()
-        operation_ref_branch = operation_ref.get_branch()
-        for updated_ref in self.RefsToUpdate:
-            if updated_ref.get_name() == operation_ref_real_name and \
-               updated_ref.get_arch() == operation_ref_arch and \
-               updated_ref.get_branch() == operation_ref_branch and \
-               updated_ref.get_kind() == Flatpak.RefKind.APP:
-                updated_ref_real_name = updated_ref.get_name()
-                updated_ref_arch = updated_ref.get_arch()
-                updated_ref_branch = updated_ref.get_branch()
-                updated_ref_remote = "FlatHub"
-
-                installed_size = updated_ref.get_installed_size()
-                installed_size_mib = installed_size / 1048576
-                installed_size_mib_str = \
-                    f"{installed_size_mib:.2f}" + " MiB"
-
-                download_size_mib_str = ""
-                name = updated_ref.get_appdata_name()
-
-                tree_iter = self.TreeModel.get_model().get_iter_first()
-                while tree_iter:
-                    real_name = self.TreeModel.get_value(tree_iter, 0)
-                    arch = self.TreeModel.get_value(tree_iter, 1)
-                    branch = self.TreeModel.get_value(tree_iter, 2)
-                    if real_name == updated_ref_real_name and \
-                       arch == updated_ref_arch and \
-                       branch == updated_ref_branch:
-                        GLib.idle_add(self.TreeModel.set_row,
-                                      tree_iter, [updated_ref_real_name,
-                                                  updated_ref_arch,
-                                                  updated_ref_branch,
-                                                  updated_ref_remote,
-                                                  installed_size_mib_str,
-                                                  download_size_mib_str,
-                                                  name],
-                                      priority=GLib.PRIORITY_DEFAULT)
-                        time.sleep(0.2)
-
-                        self.TreeModel.refilter()
-                        time.sleep(0.3)
-                    tree_iter = self.TreeModel.iter_next(tree_iter)
+            main_loop_dispatcher.post(self.UpdateAllLabel.set_text, status_text)
+            self.UpdateAllLog.append(status_text)
+
+    def update_all_progress_callback_done(self, transaction, operation, commit, result):
+        self.MainWindow.UpdateChecker.forget_prefetched([operation.get_ref()])
+        updated_ref = operation_installed_ref(self.FlatpakInstallation, operation)
+        if updated_ref is None:
+            return None
+
+        main_loop_dispatcher.post(self.MainWindow.set_ref_installed, updated_ref)
 
     def update_all_progress_callback_error(self, transaction, operation, error, details):
+        self.TransactionStats.operation_failed(operation, error)
         ref_to_update_all = Flatpak.Ref.parse(operation.get_ref())
         ref_to_update_all_real_name = ref_to_update_all.get_name()
         operation_type = operation.get_operation_type()
 
         if operation_type == Flatpak.TransactionOperationType.UPDATE:
             status_text = _("Not updated: ") + ref_to_update_all_real_name
-            self.StatusText = self.StatusText + "\n" + status_text
-            GLib.idle_add(self.UpdateAllLabel.set_text,
-                          status_text,
-                          priority=GLib.PRIORITY_DEFAULT)
-            GLib.idle_add(self.UpdateAllTextBuffer.set_text,
-                          self.StatusText,
-                          priority=GLib.PRIORITY_DEFAULT)
+            main_loop_dispatcher.post(self.UpdateAllLabel.set_text, status_text)
+            self.UpdateAllLog.append(status_text)
         elif operation_type == Flatpak.TransactionOperationType.INSTALL:
             status_text = _("Not installed: ") + ref_to_update_all_real_name
-            self.StatusText = self.StatusText + "\n" + status_text
-            GLib.idle_add(self.UpdateAllLabel.set_text,
-                          status_text,
-                          priority=GLib.PRIORITY_DEFAULT)
-            GLib.idle_add(self.UpdateAllTextBuffer.set_text,
-                          self.StatusText,
-                          priority=GLib.PRIORITY_DEFAULT)
+            main_loop_dispatcher.post(self.UpdateAllLabel.set_text, status_text)
+            self.UpdateAllLog.append(status_text)
 
         return True
 
-    def progress_bar_update(self, transaction_progress):
-        GLib.idle_add(self.UpdateAllProgressBar.set_fraction,
-                      float(transaction_progress.get_progress()) / 100.0,
-                      priority=GLib.PRIORITY_DEFAULT)
-
     def cancellation_callback(self, *data):
         status_text = _("Updating canceled!")
-        self.StatusText = self.StatusText + "\n" + status_text
-        GLib.idle_add(self.UpdateAllLabel.set_text,
-                      status_text,
-                      priority=GLib.PRIORITY_DEFAULT)
-        GLib.idle_add(self.UpdateAllTextBuffer.set_text,
-                      self.StatusText,
-                      priority=GLib.PRIORITY_DEFAULT)
+        main_loop_dispatcher.post(self.UpdateAllLabel.set_text, status_text)
+        self.UpdateAllLog.append(status_text)
 
     def disconnect_handlers(self, handler_id_cancel):
         self.UpdateAllCancellation.disconnect(handler_id_cancel)
@@ -295,8 +243,12 @@ class UpdateAllWindow(object):
 
     def on_press_cancel(self, button):
         self.UpdateAllCancellation.cancel()
+        if job_queue.cancel(self.UpdateAllJob):
+            self.finish_updating()
         self.UpdateAllWindow.hide_on_delete()
 
     def on_delete_action_window(self, widget, event):
         self.UpdateAllCancellation.cancel()
+        if job_queue.cancel(self.UpdateAllJob):
+            self.finish_updating()
         widget.hide_on_delete()
@@ -0,0 +1,276 @@
+#!/usr/bin/env python3
+#
+# Pardus Flatpak GUI update checker module
+# Copyright (C) 2020 Erdem Ersoy
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+from pardusflatpakgui.dispatcher import main_loop_dispatcher
+from pardusflatpakgui.installations import ThreadInstallations
+from pardusflatpakgui.jobqueue import job_queue
+from pardusflatpakgui.refcatalog import ref_key
+from pardusflatpakgui.settings import settings
+from pardusflatpakgui.tracing import tracer
+from pardusflatpakgui.transactions import prefetch_transaction
+
+import concurrent.futures
+import json
+import os
+import threading
+import time
+import gi
+gi.require_version('Flatpak', '1.0')
+gi.require_version('GLib', '2.0')
+gi.require_version('Gio', '2.0')
+from gi.repository import Flatpak, GLib, Gio
+
+
+# The thread of the checks yields to everything else, as far as the
+# platform lets a thread lower its own priority.
+def lower_thread_priority():
+    try:
+        os.setpriority(os.PRIO_PROCESS, threading.get_native_id(), 19)
+    except (AttributeError, OSError):
+        pass
+
+
+# Checks for updates of the installed refs in the background, every
+# UpdateCheckInterval seconds, since listing them contacts every remote. The
+# refs of the last check and its time are cached in
+# $XDG_CACHE_HOME/pardus-flatpak-gui/updates.json, so they are known right
+# after the next launch too. on_checked(refs) is called on the main loop with
+# the refs (as strings) after every check.
+#
+# With UpdatePrefetch, the updates a check finds are also pulled without
+# deploying them, by a background job of the job queue, so Update All only
+# deploys them later. The commit every prefetch pulled is kept in the cache
+# file too; a ref only counts as prefetched while that is the commit the
+# last check found in its remote.
+class UpdateChecker(object):
+    def __init__(self, flatpak_installation, on_checked, file_name=None, interval=None,
+                 prefetch=None):
+        if file_name is None:
+            cache_dir = os.environ.get("XDG_CACHE_HOME", os.path.expanduser("~/.cache"))
+            file_name = os.path.join(cache_dir, "pardus-flatpak-gui", "updates.json")
+        self.FileName = file_name
+
+        if interval is None:
+            interval = settings.get_int("UpdateCheckInterval")
+        self.Interval = interval
+        if prefetch is None:
+            prefetch = settings.get_bool("UpdatePrefetch")
+        self.PrefetchEnabled = prefetch
+        self.OnChecked = on_checked
+
+        self.ThreadInstallations = ThreadInstallations(flatpak_installation)
+        self.Executor = concurrent.futures.ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix="update-check",
+            initializer=lower_thread_priority)
+        self.Lock = threading.Lock()
+        self.Futures = {}
+        self.TimeoutSourceId = 0
+        self.PrefetchJob = None
+        self.PrefetchCancellable = None
+
+        self.Refs, self.CheckedTime, self.RemoteCommits, self.PrefetchedCommits = self.load()
+        self.drop_stale_prefetches()
+
+    # Commits are kept as dicts from ref strings to commit checksums.
+    def load(self):
+        try:
+            with open(self.FileName, "r") as updates_file:
+                cache = json.load(updates_file)
+            return [str(ref) for ref in cache["refs"]], float(cache["checked"]), \
+                {str(ref): str(commit) for ref, commit in cache.get("commits", {}).items()}, \
+                {str(ref): str(commit) for ref, commit in cache.get("prefetched", {}).items()}
+        except FileNotFoundError:
+            return [], 0.0, {}, {}
+        except (OSError, ValueError, KeyError, TypeError, AttributeError):
+            print("Error reading update cache file: " + self.FileName)
+            return [], 0.0, {}, {}
+
+    def save(self):
+        temporary_file_name = self.FileName + ".tmp"
+        try:
+            os.makedirs(os.path.dirname(self.FileName), exist_ok=True)
+            with open(temporary_file_name, "w") as updates_file:
+                json.dump({"checked": self.CheckedTime, "refs": self.Refs,
+                           "commits": self.RemoteCommits,
+                           "prefetched": self.PrefetchedCommits}, updates_file)
+            os.replace(temporary_file_name, self.FileName)
+        except OSError:
+            print("Error writing update cache file: " + self.FileName)
+
+    # The cached refs that are still installed, as installed refs of the
+    # catalog. They may be out of date; an update of a ref that is already up
+    # to date is skipped by its transaction.
+    def cached_refs(self, catalog):
+        with self.Lock:
+            ref_strs = list(self.Refs)
+        refs = []
+        for ref_str in ref_strs:
+            installed_ref = catalog.InstalledRefs.get(ref_key(Flatpak.Ref.parse(ref_str)))
+            if installed_ref is not None:
+                refs.append(installed_ref)
+        return refs
+
+    # Starts the periodic checks; the first one runs right away when the
+    # cached result is older than the interval. An interval of 0 disables
+    # them.
+    def start(self):
+        if self.Interval <= 0 or self.TimeoutSourceId:
+            return None
+        if time.time() - self.CheckedTime >= self.Interval:
+            self.check()
+        self.TimeoutSourceId = GLib.timeout_add_seconds(self.Interval, self.on_timeout,
+                                                        priority=GLib.PRIORITY_LOW)
+
+    def on_timeout(self):
+        self.check()
+        return True
+
+    # Whether the latest commit of every given installed ref is pulled by a
+    # prefetch and only has to be deployed.
+    def is_prefetched(self, refs):
+        with self.Lock:
+            return len(refs) > 0 and \
+                all(ref.format_ref() in self.PrefetchedCommits for ref in refs)
+
+    # Called with the refs (as strings) an update deployed: their prefetched
+    # commits are in use now.
+    def forget_prefetched(self, ref_strs):
+        with self.Lock:
+            for ref_str in ref_strs:
+                self.PrefetchedCommits.pop(ref_str, None)
+            self.save()
+
+    # Called with Lock held, after every change, so PrefetchedCommits only
+    # has commits that are still the latest ones.
+    def drop_stale_prefetches(self):
+        self.PrefetchedCommits = {
+            ref_str: commit for ref_str, commit in self.PrefetchedCommits.items()
+            if commit == self.RemoteCommits.get(ref_str)}
+
+    # Returns a future of the list of refs (as strings) with updates, or
+    # None when the check failed. A check asked for while another one with
+    # the same prefetch is waiting to run shares its future. The prefetch
+    # starts once the future is done, so waiting for it doesn't wait for the
+    # pull.
+    def check(self, prefetch=True):
+        with self.Lock:
+            future = self.Futures.get(prefetch)
+            if future is not None and not future.running() and not future.done():
+                return future
+            future = self.Executor.submit(self.run_check)
+            self.Futures[prefetch] = future
+        if prefetch and self.PrefetchEnabled:
+            future.add_done_callback(self.on_check_done)
+        return future
+
+    def on_check_done(self, future):
+        ref_strs = future.result()
+        if ref_strs:
+            self.start_prefetch(ref_strs)
+
+    # The cancellable is made with the job, so a prefetch cancelled before it
+    # runs doesn't pull anything.
+    def start_prefetch(self, ref_strs):
+        with self.Lock:
+            if self.PrefetchJob is not None:
+                return None
+            cancellable = Gio.Cancellable.new()
+            job = job_queue.submit_background(
+                "prefetch", lambda: self.prefetch(ref_strs, cancellable), cancellable.cancel)
+            if job is not None:
+                self.PrefetchJob = job
+                self.PrefetchCancellable = cancellable
+
+    # Stops a queued or running prefetch, e.g. when Update All starts: what
+    # it pulled so far isn't downloaded again. A queued one still runs, only
+    # to finish right away.
+    def cancel_prefetch(self):
+        with self.Lock:
+            cancellable = self.PrefetchCancellable
+        if cancellable is not None:
+            cancellable.cancel()
+
+    def run_check(self):
+        installation = self.ThreadInstallations.get()
+        try:
+            with tracer.span("checking for updates"):
+                refs = installation.list_installed_refs_for_update(Gio.Cancellable.new())
+        except GLib.Error as error:
+            print("Error checking for updates: " + error.message)
+            return None
+
+        ref_strs = [ref.format_ref() for ref in refs]
+        remote_commits = self.remote_commits(installation, refs)
+        with self.Lock:
+            self.Refs = ref_strs
+            self.CheckedTime = time.time()
+            self.RemoteCommits = remote_commits
+            self.drop_stale_prefetches()
+            self.save()
+        main_loop_dispatcher.post(self.OnChecked, list(ref_strs))
+        return ref_strs
+
+    # The commits of the remotes for the refs with updates, from the
+    # summaries the check has just fetched. A ref whose remote can't be
+    # listed is left out, so it doesn't count as prefetched.
+    def remote_commits(self, installation, refs):
+        remote_commits = {}
+        for origin in {ref.get_origin() for ref in refs}:
+            try:
+                remote_refs = installation.list_remote_refs_sync_full(
+                    origin, Flatpak.QueryFlags.ONLY_CACHED, Gio.Cancellable.new())
+            except GLib.Error as error:
+                print("Error listing remote " + origin + ": " + error.message)
+                continue
+            commits = {ref_key(remote_ref): remote_ref.get_commit() for remote_ref in remote_refs}
+            for ref in refs:
+                if ref.get_origin() == origin and ref_key(ref) in commits:
+                    remote_commits[ref.format_ref()] = commits[ref_key(ref)]
+        return remote_commits
+
+    # Pulls every update again, as a newer commit may have appeared since
+    # the last prefetch; objects already pulled aren't downloaded again.
+    # Runs in a thread of the job queue.
+    def prefetch(self, ref_strs, cancellable):
+        pulled_commits = {}
+        try:
+            if not cancellable.is_cancelled():
+                lower_thread_priority()
+                self.pull_updates(ref_strs, cancellable, pulled_commits)
+        finally:
+            with self.Lock:
+                self.PrefetchJob = None
+                self.PrefetchCancellable = None
+                self.PrefetchedCommits.update(pulled_commits)
+                self.drop_stale_prefetches()
+                self.save()
+
+    def pull_updates(self, ref_strs, cancellable, pulled_commits):
+        installation = self.ThreadInstallations.get()
+        transaction = prefetch_transaction(installation, ref_strs, cancellable)
+
+        def on_operation_done(transaction, operation, commit, result):
+            pulled_commits[operation.get_ref()] = commit
+
+        transaction.connect("operation-done", on_operation_done)
+        try:
+            with tracer.span("prefetching updates", refs=len(ref_strs)):
+                transaction.run(cancellable)
+        except GLib.Error as error:
+            if not cancellable.is_cancelled():
+                print("Error prefetching updates: " + error.message)
@@ -20,17 +20,25 @@
 from pardusflatpakgui.version import Version
 
 from setuptools import setup, find_packages
-from os import listdir
+from setuptools.command.build_py import build_py
+import subprocess
+
+
+# GUI files are installed as one compiled GResource bundle, compiled while
+# building, before install_data copies it.
+class BuildWithResources(build_py):
+    def run(self):
+        subprocess.run(["glib-compile-resources", "--sourcedir=ui",
+                        "--target=ui/pardus-flatpak-gui.gresource",
+                        "ui/pardus-flatpak-gui.gresource.xml"], check=True)
+        build_py.run(self)
 
-ui_files = []
-for file_ui in listdir("ui"):
-    ui_files.append("ui/" + file_ui)
 
 data_files = [
         ("/usr/share/applications", ["tr.org.pardus.pardus_flatpak_gui.desktop"]),
         ("/usr/share/locale/en/LC_MESSAGES", ["po/en/LC_MESSAGES/pardus-flatpak-gui.mo"]),
         ("/usr/share/locale/tr/LC_MESSAGES", ["po/tr/LC_MESSAGES/pardus-flatpak-gui.mo"]),
-        ("/usr/share/pardus/pardus-flatpak-gui/ui", ui_files)
+        ("/usr/share/pardus/pardus-flatpak-gui", ["ui/pardus-flatpak-gui.gresource"])
     ]
 
 setup(
@@ -40,6 +48,7 @@ setup(
     scripts=["pardus-flatpak-gui"],
     install_requires=["PyGObject"],
     data_files=data_files,
+    cmdclass={"build_py": BuildWithResources},
     author="Erdem Ersoy",
     author_email="erdem.ersoy@pardus.org.tr",
     description="Flatpak GUI for Pardus.",
@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+#
+# Pardus Flatpak GUI AppStream index tests
+# Copyright (C) 2020 Erdem Ersoy
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+# Run from the source tree:
+#
+#     python3 -m unittest discover tests
+
+import gzip
+import os
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from pardusflatpakgui.appstreamindex import AppStreamIndex, iterate_components, write_index
+
+DuplicateComponents = b"""<?xml version="1.0" encoding="UTF-8"?>
+<components version="0.8" origin="flathub">
+  <component type="desktop">
+    <id>org.example.Editor.desktop</id>
+    <name>First Editor</name>
+    <summary>The first component</summary>
+  </component>
+  <component type="desktop">
+    <id>org.example.Editor</id>
+    <name>Second Editor</name>
+    <summary>The second component</summary>
+  </component>
+  <component type="desktop">
+    <id>org.example.Player</id>
+    <name>Player</name>
+    <summary>Plays</summary>
+  </component>
+</components>
+"""
+
+
+class AppStreamIndexTest(unittest.TestCase):
+    def test_duplicate_app_id_keeps_first_component(self):
+        with tempfile.TemporaryDirectory() as directory:
+            xml_file_name = os.path.join(directory, "appstream.xml.gz")
+            with gzip.open(xml_file_name, "wb") as xml_file:
+                xml_file.write(DuplicateComponents)
+            index_file_name = os.path.join(directory, "appstream.index")
+
+            write_index(iterate_components(xml_file_name, os.path.join(directory, "icons")),
+                        index_file_name, "0" * 64)
+            index = AppStreamIndex(index_file_name)
+            try:
+                self.assertEqual(len(index), 2)
+                app_data = index.get("org.example.Editor")
+                self.assertEqual(app_data.Name, "First Editor")
+                self.assertEqual(app_data.Summary, "The first component")
+                self.assertEqual(index.get("org.example.Player").Name, "Player")
+            finally:
+                index.close()
+
+
+if __name__ == "__main__":
+    unittest.main()